@@ -7,6 +7,8 @@ from typing import Dict, Any
 from dataclasses import dataclass
 from dotenv import load_dotenv
 
+from app.models.lead import JUNK_STATUS_NAMES
+
 # Load environment variables
 load_dotenv()
 
@@ -17,6 +19,7 @@ class BitrixConfig:
     webhook_url: str
     timeout_seconds: int = 30
     max_retries: int = 3
+    max_concurrent_requests: int = 2
 
     def __post_init__(self):
         if not self.webhook_url:
@@ -29,6 +32,16 @@ class TranscriptionConfig:
     service_url: str
     timeout_seconds: int = 60
     max_retries: int = 3
+    cache_path: str = ""  # SQLite file for the transcription cache; empty (the default) disables it
+    cache_ttl_hours: float = 720.0
+    cache_max_entries: int = 100000
+    min_duration_seconds: float = 2.0  # shorter WAV recordings are not sent for transcription
+    compress_uploads: bool = False  # gzip upload bodies; the service must accept Content-Encoding: gzip
+    connection_pool_size: int = 32  # kept-alive connections per host for the service and download sessions
+    pool_block: bool = False  # wait for a pooled connection instead of opening a throwaway one when all are busy
+    keepalive_timeout_seconds: float = 75.0  # idle time before an async session closes a kept-alive connection
+    warmup_on_startup: bool = False  # send a silent clip in the background whenever an analyzer is created
+    warmup_idle_minutes: float = 30.0  # scheduled runs warm the backend up only after this long without requests
 
     def __post_init__(self):
         if not self.service_url:
@@ -42,6 +55,8 @@ class GeminiConfig:
     model_name: str = "gemini-2.0-flash"
     timeout_seconds: int = 30
     max_retries: int = 3
+    max_concurrency: int = 5
+    requests_per_minute: int = 60
 
     def __post_init__(self):
         if not self.api_key:
@@ -54,6 +69,9 @@ class SchedulerConfig:
     check_interval_hours: int = 24
     max_concurrent_leads: int = 10
     delay_between_leads: float = 2.0  # seconds
+    max_parallel_leads: int = 4
+    health_check_timeout_seconds: float = 5.0  # per service probe in check_health
+    async_analyzer: bool = False  # analyze new-lead batches on one asyncio event loop
 
 
 @dataclass
@@ -80,13 +98,7 @@ class LeadStatusConfig:
 
     def __post_init__(self):
         if self.junk_statuses is None:
-            self.junk_statuses = {
-                158: "5 marta javob bermadi",
-                227: "Notog'ri raqam",
-                229: "Ariza qoldirmagan",
-                783: "Notog'ri mijoz",
-                807: "Yoshi to'g'ri kelmadi"
-            }
+            self.junk_statuses = dict(JUNK_STATUS_NAMES)
 
 
 class Config:
@@ -96,26 +108,42 @@ class Config:
         self.bitrix = BitrixConfig(
             webhook_url=os.getenv('BITRIX_WEBHOOK_URL', ''),
             timeout_seconds=int(os.getenv('BITRIX_TIMEOUT_SECONDS', '30')),
-            max_retries=int(os.getenv('BITRIX_MAX_RETRIES', '3'))
+            max_retries=int(os.getenv('BITRIX_MAX_RETRIES', '3')),
+            max_concurrent_requests=int(os.getenv('BITRIX_MAX_CONCURRENT_REQUESTS', '2'))
         )
 
         self.transcription = TranscriptionConfig(
             service_url=os.getenv('TRANSCRIPTION_SERVICE_URL', ''),
             timeout_seconds=int(os.getenv('TRANSCRIPTION_TIMEOUT_SECONDS', '60')),
-            max_retries=int(os.getenv('TRANSCRIPTION_MAX_RETRIES', '3'))
+            max_retries=int(os.getenv('TRANSCRIPTION_MAX_RETRIES', '3')),
+            cache_path=os.getenv('TRANSCRIPTION_CACHE_PATH', ''),
+            cache_ttl_hours=float(os.getenv('TRANSCRIPTION_CACHE_TTL_HOURS', '720')),
+            cache_max_entries=int(os.getenv('TRANSCRIPTION_CACHE_MAX_ENTRIES', '100000')),
+            min_duration_seconds=float(os.getenv('TRANSCRIPTION_MIN_DURATION_SECONDS', '2.0')),
+            compress_uploads=os.getenv('TRANSCRIPTION_COMPRESS_UPLOADS', 'false').lower() == 'true',
+            connection_pool_size=int(os.getenv('CONNECTION_POOL_SIZE', '32')),
+            pool_block=os.getenv('HTTP_POOL_BLOCK', 'false').lower() == 'true',
+            keepalive_timeout_seconds=float(os.getenv('HTTP_KEEPALIVE_TIMEOUT', '75')),
+            warmup_on_startup=os.getenv('TRANSCRIPTION_WARMUP_ON_STARTUP', 'false').lower() == 'true',
+            warmup_idle_minutes=float(os.getenv('TRANSCRIPTION_WARMUP_IDLE_MINUTES', '30'))
         )
 
         self.gemini = GeminiConfig(
             api_key=os.getenv('GEMINI_API_KEY', ''),
             model_name=os.getenv('GEMINI_MODEL_NAME', 'gemini-2.0-flash'),
             timeout_seconds=int(os.getenv('GEMINI_TIMEOUT_SECONDS', '30')),
-            max_retries=int(os.getenv('GEMINI_MAX_RETRIES', '3'))
+            max_retries=int(os.getenv('GEMINI_MAX_RETRIES', '3')),
+            max_concurrency=int(os.getenv('GEMINI_MAX_CONCURRENCY', '5')),
+            requests_per_minute=int(os.getenv('GEMINI_REQUESTS_PER_MINUTE', '60'))
         )
 
         self.scheduler = SchedulerConfig(
             check_interval_hours=int(os.getenv('CHECK_INTERVAL_HOURS', '24')),
             max_concurrent_leads=int(os.getenv('MAX_CONCURRENT_LEADS', '10')),
-            delay_between_leads=float(os.getenv('DELAY_BETWEEN_LEADS', '2.0'))
+            delay_between_leads=float(os.getenv('DELAY_BETWEEN_LEADS', '2.0')),
+            max_parallel_leads=int(os.getenv('MAX_PARALLEL_LEADS', '4')),
+            health_check_timeout_seconds=float(os.getenv('HEALTH_CHECK_TIMEOUT_SECONDS', '5.0')),
+            async_analyzer=os.getenv('ASYNC_ANALYZER', 'false').lower() == 'true'
         )
 
         self.logging = LoggingConfig(
@@ -171,6 +199,27 @@ class Config:
             if self.scheduler.max_concurrent_leads <= 0:
                 raise ValueError("MAX_CONCURRENT_LEADS must be positive")
 
+            if self.scheduler.max_parallel_leads <= 0:
+                raise ValueError("MAX_PARALLEL_LEADS must be positive")
+
+            if self.scheduler.health_check_timeout_seconds <= 0:
+                raise ValueError("HEALTH_CHECK_TIMEOUT_SECONDS must be positive")
+
+            if self.transcription.connection_pool_size <= 0:
+                raise ValueError("CONNECTION_POOL_SIZE must be positive")
+
+            if self.transcription.warmup_idle_minutes < 0:
+                raise ValueError("TRANSCRIPTION_WARMUP_IDLE_MINUTES must not be negative")
+
+            if self.bitrix.max_concurrent_requests <= 0:
+                raise ValueError("BITRIX_MAX_CONCURRENT_REQUESTS must be positive")
+
+            if self.gemini.max_concurrency <= 0:
+                raise ValueError("GEMINI_MAX_CONCURRENCY must be positive")
+
+            if self.gemini.requests_per_minute <= 0:
+                raise ValueError("GEMINI_REQUESTS_PER_MINUTE must be positive")
+
             return True
 
         except Exception as e:
@@ -183,23 +232,39 @@ class Config:
             'bitrix': {
                 'webhook_url': self.bitrix.webhook_url,
                 'timeout_seconds': self.bitrix.timeout_seconds,
-                'max_retries': self.bitrix.max_retries
+                'max_retries': self.bitrix.max_retries,
+                'max_concurrent_requests': self.bitrix.max_concurrent_requests
             },
             'transcription': {
                 'service_url': self.transcription.service_url,
                 'timeout_seconds': self.transcription.timeout_seconds,
-                'max_retries': self.transcription.max_retries
+                'max_retries': self.transcription.max_retries,
+                'cache_path': self.transcription.cache_path,
+                'cache_ttl_hours': self.transcription.cache_ttl_hours,
+                'cache_max_entries': self.transcription.cache_max_entries,
+                'min_duration_seconds': self.transcription.min_duration_seconds,
+                'compress_uploads': self.transcription.compress_uploads,
+                'connection_pool_size': self.transcription.connection_pool_size,
+                'pool_block': self.transcription.pool_block,
+                'keepalive_timeout_seconds': self.transcription.keepalive_timeout_seconds,
+                'warmup_on_startup': self.transcription.warmup_on_startup,
+                'warmup_idle_minutes': self.transcription.warmup_idle_minutes
             },
             'gemini': {
                 'model_name': self.gemini.model_name,
                 'timeout_seconds': self.gemini.timeout_seconds,
                 'max_retries': self.gemini.max_retries,
+                'max_concurrency': self.gemini.max_concurrency,
+                'requests_per_minute': self.gemini.requests_per_minute,
                 'api_key_set': bool(self.gemini.api_key)
             },
             'scheduler': {
                 'check_interval_hours': self.scheduler.check_interval_hours,
                 'max_concurrent_leads': self.scheduler.max_concurrent_leads,
-                'delay_between_leads': self.scheduler.delay_between_leads
+                'delay_between_leads': self.scheduler.delay_between_leads,
+                'max_parallel_leads': self.scheduler.max_parallel_leads,
+                'health_check_timeout_seconds': self.scheduler.health_check_timeout_seconds,
+                'async_analyzer': self.scheduler.async_analyzer
             },
             'lead_status': {
                 'junk_status_field': self.lead_status.junk_status_field,
@@ -196,21 +196,19 @@ class LoggerMixin:
         """Get logger for this class"""
         return get_logger(self.__class__.__name__)
 
-    def log_with_context(self, level: int, message: str, **context):
-        """Log message with additional context"""
-        extra = {}
-        for key, value in context.items():
-            extra[key] = value
+    def log_with_context(self, level: int, message: str, *args, **context):
+        """Log message with additional context; message is %-formatted with args only if emitted"""
+        logger = self.logger
+        if logger.isEnabledFor(level):
+            logger.log(level, message, *args, extra=context)
 
-        self.logger.log(level, message, extra=extra)
-
-    def log_lead_action(self, lead_id: str, action: str, message: str, level: int = logging.INFO):
+    def log_lead_action(self, lead_id: str, action: str, message: str, *args, level: int = logging.INFO):
         """Log action related to a specific lead"""
-        self.log_with_context(level, f"{action}: {message}", lead_id=lead_id)
+        self.log_with_context(level, f"{action}: {message}", *args, lead_id=lead_id)
 
-    def log_service_action(self, service: str, action: str, message: str, level: int = logging.INFO):
+    def log_service_action(self, service: str, action: str, message: str, *args, level: int = logging.INFO):
         """Log action related to a specific service"""
-        self.log_with_context(level, f"{action}: {message}", service=service)
+        self.log_with_context(level, f"{action}: {message}", *args, service=service)
 
 
 # Initialize logging on import
@@ -2,7 +2,9 @@
 Data models and structures
 """
 
-from .lead import Lead, LeadFilter, LeadBatch, LeadActivity, LeadContact
+from .lead import (
+    Lead, LeadFilter, LeadBatch, LeadActivity, LeadContact, JunkStatusCode, JUNK_STATUS_NAMES, JUNK_STATUS_IDS
+)
 from .analysis_result import (
     LeadAnalysisResult, BatchAnalysisResult, TranscriptionResult,
     AIAnalysisResult, AnalysisAction, AnalysisReason
@@ -10,6 +12,7 @@ from .analysis_result import (
 
 __all__ = [
     'Lead', 'LeadFilter', 'LeadBatch', 'LeadActivity', 'LeadContact',
+    'JunkStatusCode', 'JUNK_STATUS_NAMES', 'JUNK_STATUS_IDS',
     'LeadAnalysisResult', 'BatchAnalysisResult', 'TranscriptionResult',
     'AIAnalysisResult', 'AnalysisAction', 'AnalysisReason'
 ]
\ No newline at end of file
@@ -41,7 +41,7 @@ class TranscriptionResult:
         """Check if transcription was successful"""
         return bool(self.transcription) and not self.error
 
-@dataclass
+@dataclass(slots=True)
 class AIAnalysisResult:
     """AI analysis result with alternative status support"""
     is_suitable: bool
@@ -26,6 +26,17 @@ class JunkStatusCode(Enum):
     WRONG_AGE = 807  # "Yoshi to'g'ri kelmadi"
 
 
+# The single source of the junk status names; built once, since the properties below run for every lead
+JUNK_STATUS_NAMES: Dict[int, str] = {
+    JunkStatusCode.FIVE_NO_RESPONSE.value: "5 marta javob bermadi",
+    JunkStatusCode.WRONG_NUMBER.value: "Notog'ri raqam",
+    JunkStatusCode.NO_APPLICATION.value: "Ariza qoldirmagan",
+    JunkStatusCode.WRONG_CLIENT.value: "Notog'ri mijoz",
+    JunkStatusCode.WRONG_AGE.value: "Yoshi to'g'ri kelmadi"
+}
+JUNK_STATUS_IDS = frozenset(JUNK_STATUS_NAMES)
+
+
 @dataclass
 class LeadContact:
     """Lead contact information"""
@@ -91,7 +102,7 @@ class Lead:
         date_create = None
         if data.get('DATE_CREATE'):
             try:
-                date_create = datetime.fromisoformat(data['DATE_CREATE'].replace('Z', '+00:00'))
+                date_create = datetime.fromisoformat(data['DATE_CREATE'])
             except ValueError:
                 pass
 
@@ -127,20 +138,12 @@ class Lead:
     @property
     def junk_status_name(self) -> Optional[str]:
         """Get junk status name"""
-        junk_status_names = {
-            158: "5 marta javob bermadi",
-            227: "Notog'ri raqam",
-            229: "Ariza qoldirmagan",
-            783: "Notog'ri mijoz",
-            807: "Yoshi to'g'ri kelmadi"
-        }
-        return junk_status_names.get(self.junk_status)
+        return JUNK_STATUS_NAMES.get(self.junk_status)
 
     @property
     def has_target_junk_status(self) -> bool:
         """Check if lead has one of the target junk statuses"""
-        target_statuses = [158, 227, 229, 783, 807]
-        return self.junk_status in target_statuses
+        return self.junk_status in JUNK_STATUS_IDS
 
     @property
     def unsuccessful_calls_count(self) -> int:
@@ -162,7 +165,7 @@ class Lead:
         date = None
         if activity_data.get('DATE'):
             try:
-                date = datetime.fromisoformat(activity_data['DATE'].replace('Z', '+00:00'))
+                date = datetime.fromisoformat(activity_data['DATE'])
             except ValueError:
                 pass
 
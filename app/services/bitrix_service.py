@@ -1,12 +1,23 @@
 """
 Bitrix24 API service for lead management with Voximplant integration
 """
+import asyncio
+import json
 import logging
+import random
 
+import aiohttp
 import requests
+import threading
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
+from urllib.parse import urlencode
+
+try:
+    import orjson
+except ImportError:  # optional, faster JSON encoding and decoding
+    orjson = None
 
 from app.config import get_config
 from app.logger import LoggerMixin
@@ -14,6 +25,25 @@ from app.models.lead import Lead, LeadFilter, LeadActivity
 from app.utils.exceptions import BitrixAPIError, ValidationError
 from app.utils.validators import validate_lead_id, validate_webhook_url
 
+# Bitrix24 executes at most 50 sub-commands per batch call
+_BATCH_MAX_COMMANDS = 50
+
+# Rate limiting and gateway errors are transient; other 4xx/5xx responses fail the same way on retry
+_RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+_RETRY_BACKOFF_CAP_SECONDS = 30.0
+
+# A dead host should fail fast and be retried; the configured timeout bounds the response itself
+_CONNECT_TIMEOUT_SECONDS = 3.0
+
+# orjson errors subclass ValueError, like the stdlib ones
+_json_loads = orjson.loads if orjson is not None else json.loads
+_json_dumps = orjson.dumps if orjson is not None else json.dumps
+
+
+def _retry_delay(attempt: int) -> float:
+    """Capped exponential backoff with jitter so parallel workers do not retry in lockstep"""
+    return min(_RETRY_BACKOFF_CAP_SECONDS, 2 ** attempt) * (1 + random.random() * 0.5)
+
 
 class BitrixService(LoggerMixin):
     """Service for interacting with Bitrix24 API"""
@@ -26,8 +56,12 @@ class BitrixService(LoggerMixin):
         if not validate_webhook_url(self.config.webhook_url):
             raise ValidationError("Invalid Bitrix24 webhook URL")
 
+        # requests ignores a timeout set on the session, so it is passed with every call
         self.session = requests.Session()
-        self.session.timeout = self.config.timeout_seconds
+        self._request_timeout = (_CONNECT_TIMEOUT_SECONDS, self.config.timeout_seconds)
+
+        # Leads are analyzed in parallel; cap simultaneous calls to stay within Bitrix24 limits
+        self._request_slots = threading.BoundedSemaphore(self.config.max_concurrent_requests)
 
         self.log_service_action("BitrixService", "init", "Initialized Bitrix24 service")
 
@@ -39,14 +73,19 @@ class BitrixService(LoggerMixin):
             try:
                 self.logger.debug(f"Making request to {endpoint}, attempt {attempt + 1}")
 
-                if method.upper() == "POST":
-                    response = self.session.post(url, json=data)
-                else:
-                    response = self.session.get(url, params=data)
+                with self._request_slots:
+                    if method.upper() == "POST":
+                        response = self.session.post(url, data=_json_dumps(data),
+                                                     headers={'Content-Type': 'application/json'},
+                                                     timeout=self._request_timeout)
+                    else:
+                        response = self.session.get(url, params=data, timeout=self._request_timeout)
 
+                if response.status_code >= 400 and response.status_code not in _RETRYABLE_STATUS_CODES:
+                    raise BitrixAPIError(f"Bitrix24 API error: HTTP {response.status_code} from {endpoint}")
                 response.raise_for_status()
 
-                result = response.json()
+                result = _json_loads(response.content)
 
                 # Check for Bitrix24 API errors
                 if 'error' in result:
@@ -56,16 +95,58 @@ class BitrixService(LoggerMixin):
                 self.logger.debug(f"Request to {endpoint} successful")
                 return result
 
-            except requests.exceptions.RequestException as e:
+            except (requests.exceptions.RequestException, ValueError) as e:
+                # Malformed JSON bodies raise ValueError; retry them like transport errors
                 self.logger.warning(f"Request attempt {attempt + 1} failed: {e}")
                 if attempt == self.config.max_retries - 1:
                     raise BitrixAPIError(f"Failed to connect to Bitrix24 after {self.config.max_retries} attempts: {e}")
-                time.sleep(2 ** attempt)  # Exponential backoff
+                time.sleep(_retry_delay(attempt))
+
+            except BitrixAPIError:
+                raise
 
             except Exception as e:
                 self.logger.error(f"Unexpected error in request to {endpoint}: {e}")
                 raise BitrixAPIError(f"Unexpected error: {e}")
 
+    def open_async_session(self) -> aiohttp.ClientSession:
+        """Create an aiohttp session whose connection pool enforces the concurrent request cap"""
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.config.max_concurrent_requests),
+            timeout=aiohttp.ClientTimeout(total=self.config.timeout_seconds, connect=_CONNECT_TIMEOUT_SECONDS)
+        )
+
+    async def _make_request_async(self, session: aiohttp.ClientSession, endpoint: str,
+                                  data: Dict[str, Any]) -> Dict[str, Any]:
+        """Async variant of _make_request issuing a POST over a shared aiohttp session"""
+        url = f"{self.config.webhook_url}/{endpoint}"
+
+        for attempt in range(self.config.max_retries):
+            try:
+                self.logger.debug(f"Making async request to {endpoint}, attempt {attempt + 1}")
+
+                async with session.post(url, data=_json_dumps(data),
+                                        headers={'Content-Type': 'application/json'}) as response:
+                    if response.status >= 400 and response.status not in _RETRYABLE_STATUS_CODES:
+                        raise BitrixAPIError(f"Bitrix24 API error: HTTP {response.status} from {endpoint}")
+                    response.raise_for_status()
+                    result = _json_loads(await response.read())
+
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                self.logger.warning(f"Request attempt {attempt + 1} failed: {e}")
+                if attempt == self.config.max_retries - 1:
+                    raise BitrixAPIError(f"Failed to connect to Bitrix24 after {self.config.max_retries} attempts: {e}")
+                await asyncio.sleep(_retry_delay(attempt))
+                continue
+
+            # Check for Bitrix24 API errors
+            if 'error' in result:
+                error_msg = result['error_description'] if 'error_description' in result else result['error']
+                raise BitrixAPIError(f"Bitrix24 API error: {error_msg}")
+
+            self.logger.debug(f"Request to {endpoint} successful")
+            return result
+
     def get_leads(self, lead_filter: LeadFilter) -> List[Lead]:
         """Get leads based on filter criteria"""
         try:
@@ -153,10 +234,35 @@ class BitrixService(LoggerMixin):
             self.log_lead_action(lead_id, "get_voximplant_calls", f"Error fetching call data: {e}")
             raise
 
+    async def get_voximplant_call_data_async(self, session: aiohttp.ClientSession,
+                                             lead_id: str) -> List[Dict[str, Any]]:
+        """Async variant of get_voximplant_call_data"""
+        if not validate_lead_id(lead_id):
+            raise ValidationError(f"Invalid lead ID: {lead_id}")
+
+        try:
+            params = {
+                "filter": {"CRM_ENTITY_ID": lead_id},
+            }
+
+            self.log_lead_action(lead_id, "get_voximplant_calls", "Fetching call records from Voximplant")
+
+            result = await self._make_request_async(session, "voximplant.statistic.get", params)
+            call_data = result.get('result', [])
+
+            self.log_lead_action(lead_id, "get_voximplant_calls", f"Found {len(call_data)} call records")
+            return call_data
+
+        except Exception as e:
+            self.log_lead_action(lead_id, "get_voximplant_calls", f"Error fetching call data: {e}")
+            raise
+
     def get_lead_call_statistics(self, lead_id: str) -> Dict[str, Any]:
         """Get call statistics for a lead including unsuccessful calls count"""
-        call_data = self.get_voximplant_call_data(lead_id)
+        return self.build_call_statistics(self.get_voximplant_call_data(lead_id))
 
+    def build_call_statistics(self, call_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Summarize a lead's Voximplant call records"""
         total_calls = len(call_data)
         unsuccessful_calls = 0
         audio_files = []
@@ -189,18 +295,76 @@ class BitrixService(LoggerMixin):
             'call_data': call_data
         }
 
+    def _batch_request(self, commands: Dict[str, str]) -> Dict[str, Any]:
+        """Run sub-commands through the batch endpoint, 50 per request; failed sub-commands are left out"""
+        results = {}
+        keys = list(commands)
+
+        for start in range(0, len(keys), _BATCH_MAX_COMMANDS):
+            chunk = {key: commands[key] for key in keys[start:start + _BATCH_MAX_COMMANDS]}
+            response = self._make_request("batch", {'halt': 0, 'cmd': chunk})
+            batch = response.get('result', {})
+
+            # PHP serializes empty maps as lists
+            chunk_results = batch.get('result')
+            if isinstance(chunk_results, dict):
+                results.update(chunk_results)
+
+            chunk_errors = batch.get('result_error')
+            if isinstance(chunk_errors, dict):
+                for key, error in chunk_errors.items():
+                    self.logger.warning(f"Batch command {chunk[key]} failed: {error}")
+
+        return results
+
+    def batch_get_voximplant_call_data(self, lead_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Get Voximplant call records for many leads with batched requests"""
+        lead_ids = [lead_id for lead_id in lead_ids if validate_lead_id(lead_id)]
+        if not lead_ids:
+            return {}
+
+        commands = {
+            f"lead{i}": "voximplant.statistic.get?" + urlencode({'filter[CRM_ENTITY_ID]': lead_id})
+            for i, lead_id in enumerate(lead_ids)
+        }
+
+        self.log_service_action("BitrixService", "batch_get_voximplant_calls",
+                                f"Fetching call records for {len(lead_ids)} leads")
+
+        results = self._batch_request(commands)
+        call_data = {
+            lead_id: results[f"lead{i}"] or []
+            for i, lead_id in enumerate(lead_ids)
+            if f"lead{i}" in results
+        }
+
+        self.log_service_action("BitrixService", "batch_get_voximplant_calls",
+                                f"Fetched call records for {len(call_data)} leads")
+        return call_data
+
+    def batch_get_lead_activities(self, lead_ids: List[str]) -> Dict[str, List[LeadActivity]]:
+        """Get call activities for many leads with batched requests"""
+        return {
+            lead_id: self.build_call_activities(call_data)
+            for lead_id, call_data in self.batch_get_voximplant_call_data(lead_ids).items()
+        }
+
     def get_lead_activities(self, lead_id: str) -> List[LeadActivity]:
         """Get activities for a specific lead (deprecated, use get_lead_call_statistics instead)"""
         # Keep this method for backward compatibility but use Voximplant data
         call_stats = self.get_lead_call_statistics(lead_id)
+        return self.build_call_activities(call_stats['call_data'])
+
+    def build_call_activities(self, call_data: List[Dict[str, Any]]) -> List[LeadActivity]:
+        """Convert Voximplant call records to lead activities"""
         activities = []
 
-        for i, call in enumerate(call_stats['call_data']):
+        for i, call in enumerate(call_data):
             # Parse date
             date = None
             if call.get('CALL_START_DATE'):
                 try:
-                    date = datetime.fromisoformat(call['CALL_START_DATE'].replace('Z', '+00:00'))
+                    date = datetime.fromisoformat(call['CALL_START_DATE'])
                 except ValueError:
                     pass
 
@@ -338,6 +502,35 @@ class BitrixService(LoggerMixin):
             self.log_lead_action(lead_id, "update_complete", f"Error updating lead: {e}")
             raise
 
+    def batch_update_leads(self, updates: Dict[str, Tuple[str, Optional[int]]]) -> Dict[str, bool]:
+        """Update main and junk status of many leads with batched requests, returning success by lead"""
+        lead_ids = [lead_id for lead_id in updates if validate_lead_id(lead_id)]
+        if not lead_ids:
+            return {lead_id: False for lead_id in updates}
+
+        commands = {}
+        for i, lead_id in enumerate(lead_ids):
+            new_status, new_junk_status = updates[lead_id]
+            # An empty value clears the junk status, as None does in update_lead_complete
+            commands[f"lead{i}"] = "crm.lead.update?" + urlencode({
+                'ID': lead_id,
+                f'fields[{self.lead_config.main_status_field}]': new_status,
+                f'fields[{self.lead_config.junk_status_field}]': '' if new_junk_status is None else new_junk_status
+            })
+
+        self.log_service_action("BitrixService", "batch_update_leads", f"Updating {len(lead_ids)} leads")
+
+        results = self._batch_request(commands)
+        success = {lead_id: bool(results.get(f"lead{i}")) for i, lead_id in enumerate(lead_ids)}
+
+        for lead_id in updates:
+            if success.setdefault(lead_id, False):
+                self.log_lead_action(lead_id, "update_complete", "Successfully updated lead")
+            else:
+                self.log_lead_action(lead_id, "update_complete", "Failed to update lead", level=logging.ERROR)
+
+        return success
+
     def test_connection(self) -> bool:
         """Test connection to Bitrix24 API"""
         try:
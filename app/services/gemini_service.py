@@ -1,16 +1,74 @@
 """
 Gemini AI service for lead analysis
 """
+import json
 import logging
+import re
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Optional, Dict, Any
-import google.generativeai as genai
 
 from app.config import get_config
 from app.logger import LoggerMixin
 from app.models.analysis_result import AIAnalysisResult
 from app.utils.exceptions import AIAnalysisError, ValidationError
 
+# What each junk status means, listed in the prompt for the statuses configured
+_STATUS_DESCRIPTIONS = {
+    158: "Use when the customer has not responded after 5 or more call attempts",
+    227: "Use when phone number is incorrect or doesn't belong to target person",
+    229: "Use when person hasn't submitted any application or request",
+    783: "Use when person is not the target client/customer type",
+    807: "Use when person's age doesn't meet the requirements",
+}
+
+# Static prompt text; the status definitions are filled in once per service and the rest per call
+_ANALYSIS_PROMPT_TEMPLATE = """
+Analyze the following phone call transcription and determine if the current junk status is appropriate.
+
+CURRENT STATUS: "{status_name}" (Code: {junk_status})
+
+CALL TRANSCRIPTION:
+{transcription}
+
+JUNK STATUS DEFINITIONS:
+{status_definitions}
+
+ANALYSIS INSTRUCTIONS:
+1. Read the transcription carefully to understand what happened during the call
+2. Determine if the current junk status "{status_name}" accurately reflects the situation
+3. Consider if the conversation supports this classification or if it should be changed
+
+IMPORTANT:
+- Set "suitable" to true only if the current status is suitable and accurate
+- Set "suitable" to false if the current status is incorrect or doesn't match the conversation
+- Base your decision solely on the content of the transcription
+- Be strict in your evaluation - when in doubt, answer false
+
+RESPONSE FORMAT:
+Respond with only the JSON object {{"suitable": true}} or {{"suitable": false}}.
+""".strip()
+
+# A single boolean is all the caller needs; a schema-constrained, deterministic answer keeps the output to a few tokens
+_GENERATION_CONFIG = {
+    'temperature': 0.0,
+    'max_output_tokens': 16,
+    'response_mime_type': 'application/json',
+    'response_schema': {
+        'type': 'object',
+        'properties': {'suitable': {'type': 'boolean'}},
+        'required': ['suitable'],
+    },
+}
+
+
+@lru_cache(maxsize=1)
+def _genai():
+    """Import the Gemini SDK on first use; it is most of this package's import time"""
+    import google.generativeai as genai
+    return genai
+
 
 class GeminiService(LoggerMixin):
     """Service for interacting with Google Gemini AI"""
@@ -24,8 +82,9 @@ class GeminiService(LoggerMixin):
 
         try:
             # Configure Gemini AI
+            genai = _genai()
             genai.configure(api_key=self.config.api_key)
-            self.model = genai.GenerativeModel(self.config.model_name)
+            self.model = genai.GenerativeModel(self.config.model_name, generation_config=_GENERATION_CONFIG)
 
             self.log_service_action("GeminiService", "init",
                                     f"Initialized Gemini AI with model {self.config.model_name}")
@@ -33,6 +92,8 @@ class GeminiService(LoggerMixin):
         except Exception as e:
             raise AIAnalysisError(f"Failed to initialize Gemini AI: {e}")
 
+        self._prompt_template = self._build_prompt_template()
+
     def analyze_lead_status(self, transcription: str, current_junk_status: int,
                             status_name: str) -> AIAnalysisResult:
         """Analyze if junk status is suitable based on transcription"""
@@ -76,10 +137,7 @@ class GeminiService(LoggerMixin):
             processing_time = time.time() - start_time
 
             # Parse response
-            result_text = response.text.strip().lower()
-
-            # Extract boolean result
-            is_suitable = self._parse_suitability_response(result_text)
+            is_suitable = self._parse_suitability_response(response.text)
 
             # Try to extract reasoning if available
             reasoning = self._extract_reasoning(response.text)
@@ -100,62 +158,37 @@ class GeminiService(LoggerMixin):
                 error=str(e)
             )
 
+    def _build_prompt_template(self) -> str:
+        """Fill the configured status definitions into the prompt template once"""
+        status_definitions = '\n'.join(
+            f'- "{name}" ({code}): {_STATUS_DESCRIPTIONS[code]}'
+            for code, name in self.lead_config.junk_statuses.items()
+            if code in _STATUS_DESCRIPTIONS
+        )
+        # The remaining fields are filled per call by format_map
+        return _ANALYSIS_PROMPT_TEMPLATE.replace('{status_definitions}', status_definitions)
+
     def _build_analysis_prompt(self, transcription: str, junk_status: int, status_name: str) -> str:
         """Build prompt for junk status analysis"""
-
-        # Get all status definitions
-        status_definitions = []
-        for code, name in self.lead_config.junk_statuses.items():
-            if code == 158:
-                status_definitions.append(
-                    f'- "{name}" ({code}): Use when the customer has not responded after 5 or more call attempts')
-            elif code == 227:
-                status_definitions.append(
-                    f'- "{name}" ({code}): Use when phone number is incorrect or doesn\'t belong to target person')
-            elif code == 229:
-                status_definitions.append(
-                    f'- "{name}" ({code}): Use when person hasn\'t submitted any application or request')
-            elif code == 783:
-                status_definitions.append(
-                    f'- "{name}" ({code}): Use when person is not the target client/customer type')
-            elif code == 807:
-                status_definitions.append(f'- "{name}" ({code}): Use when person\'s age doesn\'t meet the requirements')
-
-        prompt = f"""
-Analyze the following phone call transcription and determine if the current junk status is appropriate.
-
-CURRENT STATUS: "{status_name}" (Code: {junk_status})
-
-CALL TRANSCRIPTION:
-{transcription}
-
-JUNK STATUS DEFINITIONS:
-{chr(10).join(status_definitions)}
-
-ANALYSIS INSTRUCTIONS:
-1. Read the transcription carefully to understand what happened during the call
-2. Determine if the current junk status "{status_name}" accurately reflects the situation
-3. Consider if the conversation supports this classification or if it should be changed
-
-IMPORTANT:
-- Only respond with "true" if the current status is suitable and accurate
-- Respond with "false" if the current status is incorrect or doesn't match the conversation
-- Base your decision solely on the content of the transcription
-- Be strict in your evaluation - when in doubt, respond "false"
-
-RESPONSE FORMAT:
-Respond with only "true" or "false" (no other text, explanations, or punctuation).
-"""
-
-        return prompt.strip()
+        return self._prompt_template.format_map({
+            'status_name': status_name,
+            'junk_status': junk_status,
+            'transcription': transcription,
+        })
 
     def _parse_suitability_response(self, response_text: str) -> bool:
         """Parse AI response to extract suitability decision"""
-        # Clean the response
+        try:
+            decision = json.loads(response_text)
+            if isinstance(decision, dict) and isinstance(decision.get('suitable'), bool):
+                return decision['suitable']
+        except ValueError:
+            pass
+
+        # Fall back to reading a plain-text answer
         cleaned_response = response_text.strip().lower()
 
         # Remove any punctuation
-        import re
         cleaned_response = re.sub(r'[^\w\s]', '', cleaned_response)
 
         # Check for true/false indicators
@@ -174,8 +207,8 @@ Respond with only "true" or "false" (no other text, explanations, or punctuation
 
     def _extract_reasoning(self, full_response: str) -> Optional[str]:
         """Extract reasoning from AI response if available"""
-        # If response is just true/false, no reasoning available
-        if len(full_response.strip()) <= 10:
+        # If response is just true/false or the JSON decision, no reasoning available
+        if len(full_response.strip()) <= 10 or full_response.lstrip().startswith('{'):
             return None
 
         # Look for reasoning patterns
@@ -217,7 +250,7 @@ Respond with only "true" or "false" (no other text, explanations, or punctuation
         """Get information about the AI model"""
         try:
             # Try to get model info from Gemini API
-            models = list(genai.list_models())
+            models = list(_genai().list_models())
             current_model_info = None
 
             for model in models:
@@ -246,28 +279,30 @@ Respond with only "true" or "false" (no other text, explanations, or punctuation
             }
 
     def analyze_batch(self, transcriptions_and_statuses: list) -> list:
-        """Analyze multiple transcriptions in batch"""
+        """Analyze multiple transcriptions in batch using a bounded thread pool"""
+        total = len(transcriptions_and_statuses)
         results = []
 
-        self.logger.info(f"Starting batch analysis of {len(transcriptions_and_statuses)} items")
+        self.logger.info(f"Starting batch analysis of {total} items")
 
-        for i, (transcription, junk_status, status_name) in enumerate(transcriptions_and_statuses):
+        def _analyze_item(indexed_item) -> AIAnalysisResult:
+            i, (transcription, junk_status, status_name) = indexed_item
             try:
-                result = self.analyze_lead_status(transcription, junk_status, status_name)
-                results.append(result)
-
-                # Small delay between requests to respect rate limits
-                time.sleep(0.1)
-
-                if (i + 1) % 10 == 0:
-                    self.logger.info(f"Processed {i + 1}/{len(transcriptions_and_statuses)} analyses")
-
+                return self.analyze_lead_status(transcription, junk_status, status_name)
             except Exception as e:
                 self.logger.error(f"Error in batch analysis item {i}: {e}")
-                results.append(AIAnalysisResult(
+                return AIAnalysisResult(
                     is_suitable=False,
                     error=str(e)
-                ))
+                )
+
+        # The SDK releases the GIL while waiting on the network, so threads overlap requests;
+        # max_concurrency caps in-flight calls in place of a fixed per-item delay
+        with ThreadPoolExecutor(max_workers=self.config.max_concurrency) as executor:
+            for i, result in enumerate(executor.map(_analyze_item, enumerate(transcriptions_and_statuses)), 1):
+                results.append(result)
+                if i % 10 == 0:
+                    self.logger.info(f"Processed {i}/{total} analyses")
 
         successful = sum(1 for r in results if r.is_successful)
         self.logger.info(f"Batch analysis completed: {successful}/{len(results)} successful")
@@ -4,6 +4,7 @@ Core lead analysis service that orchestrates the analysis process
 
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 
@@ -18,6 +19,10 @@ from app.services.bitrix_service import BitrixService
 from app.services.transcription_service import TranscriptionService
 from app.services.gemini_service import GeminiService
 from app.utils.exceptions import LeadAnalyzerError, ValidationError
+from app.utils.health import run_health_probes
+
+# Upper bound on recordings of one lead transcribed at the same time
+_MAX_TRANSCRIPTION_WORKERS = 8
 
 
 class LeadAnalyzerService(LoggerMixin):
@@ -255,6 +260,12 @@ class LeadAnalyzerService(LoggerMixin):
             result.set_error(f"Error analyzing unsuccessful calls: {e}")
             return result
 
+    def _transcribe_audio_file(self, audio_file: str) -> TranscriptionResult:
+        """Transcribe an audio URL or local file"""
+        if audio_file.startswith(('http://', 'https://')):
+            return self.transcription_service.transcribe_url(audio_file)
+        return self.transcription_service.transcribe_file(audio_file)
+
     def _analyze_with_ai(self, lead: Lead, result: LeadAnalysisResult,
                         call_stats: Dict[str, Any], dry_run: bool) -> LeadAnalysisResult:
         """Analyze lead using AI transcription analysis"""
@@ -269,14 +280,18 @@ class LeadAnalyzerService(LoggerMixin):
 
             self.log_lead_action(lead.id, "ai_analysis", f"Found {len(audio_files)} audio files")
 
-            # Transcribe all audio files
+            # Transcribe all audio files concurrently; they are independent network-bound jobs,
+            # collected in call order so the combined transcript stays stable
+            with ThreadPoolExecutor(max_workers=max(1, min(_MAX_TRANSCRIPTION_WORKERS, len(audio_files)))) as executor:
+                futures = [
+                    (audio_file, executor.submit(self._transcribe_audio_file, audio_file))
+                    for audio_file in audio_files
+                ]
+
             transcription_results = []
-            for audio_file in audio_files:
+            for audio_file, future in futures:
                 try:
-                    if audio_file.startswith(('http://', 'https://')):
-                        transcription_result = self.transcription_service.transcribe_url(audio_file)
-                    else:
-                        transcription_result = self.transcription_service.transcribe_file(audio_file)
+                    transcription_result = future.result()
 
                     transcription_results.append(transcription_result)
                     result.add_transcription_result(transcription_result)
@@ -349,24 +364,13 @@ class LeadAnalyzerService(LoggerMixin):
 
     def check_health(self) -> Dict[str, bool]:
         """Check health of all services"""
-        health_status = {}
-
-        try:
-            health_status['bitrix'] = self.bitrix_service.test_connection()
-        except Exception:
-            health_status['bitrix'] = False
-
-        try:
-            health_status['transcription'] = self.transcription_service.test_connection()
-        except Exception:
-            health_status['transcription'] = False
-
-        try:
-            health_status['gemini'] = self.gemini_service.test_connection()
-        except Exception:
-            health_status['gemini'] = False
+        probes = {
+            'bitrix': self.bitrix_service.test_connection,
+            'transcription': self.transcription_service.test_connection,
+            'gemini': self.gemini_service.test_connection
+        }
 
-        return health_status
+        return run_health_probes(probes, self.config.scheduler.health_check_timeout_seconds, self.logger)
 
     def test_analysis_pipeline(self) -> bool:
         """Test the complete analysis pipeline"""
@@ -0,0 +1,104 @@
+"""
+Persistent SQLite cache of call recording transcriptions
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from app.logger import LoggerMixin
+from app.models.analysis_result import TranscriptionResult
+
+
+class TranscriptionCache(LoggerMixin):
+    """On-disk LRU cache of transcriptions keyed by recording URL (recordings are immutable)"""
+
+    def __init__(self, path: str, ttl_hours: float, max_entries: int):
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Shared by the transcription worker threads; access is serialized by _lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS recordings (
+                url_hash TEXT PRIMARY KEY,
+                audio_url TEXT NOT NULL,
+                transcription TEXT NOT NULL,
+                confidence REAL,
+                language TEXT,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_recordings_accessed_at ON recordings (accessed_at)")
+        self._conn.commit()
+
+        self.log_service_action("TranscriptionCache", "init", f"Using transcription cache at {path}")
+
+    @staticmethod
+    def _key(audio_url: str) -> str:
+        """Generate hash for audio URL"""
+        return hashlib.sha256(audio_url.encode()).hexdigest()
+
+    def get(self, audio_url: str) -> Optional[TranscriptionResult]:
+        """Return the cached transcription for a recording, or None if missing or expired"""
+        key = self._key(audio_url)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT transcription, confidence, language, created_at FROM recordings WHERE url_hash = ?",
+                (key,)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            transcription, confidence, language, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM recordings WHERE url_hash = ?", (key,))
+                self._conn.commit()
+                return None
+
+            self._conn.execute("UPDATE recordings SET accessed_at = ? WHERE url_hash = ?", (now, key))
+            self._conn.commit()
+
+        return TranscriptionResult(
+            audio_file=audio_url,
+            transcription=transcription,
+            confidence=confidence,
+            language=language
+        )
+
+    def put(self, result: TranscriptionResult):
+        """Store a successful transcription, evicting the least recently used entries over the limit"""
+        if not result.is_successful:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """INSERT OR REPLACE INTO recordings
+                   (url_hash, audio_url, transcription, confidence, language, created_at, accessed_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (self._key(result.audio_file), result.audio_file, result.transcription,
+                 result.confidence, result.language, now, now)
+            )
+            self._conn.execute(
+                """DELETE FROM recordings WHERE url_hash IN (
+                       SELECT url_hash FROM recordings ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                   )""",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
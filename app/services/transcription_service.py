@@ -12,6 +12,7 @@ from pathlib import Path
 from app.config import get_config
 from app.logger import LoggerMixin
 from app.models.analysis_result import TranscriptionResult
+from app.services.transcription_cache import TranscriptionCache
 from app.utils.exceptions import TranscriptionError, ValidationError
 from app.utils.validators import validate_audio_file
 
@@ -26,8 +27,14 @@ class TranscriptionService(LoggerMixin):
         if not self.config.service_url:
             raise ValidationError("Transcription service URL is required")
 
+        # requests ignores a timeout set on the session; _make_request passes it per call
         self.session = requests.Session()
-        self.session.timeout = self.config.timeout_seconds
+
+        # Recordings never change, so a transcription is reused across runs
+        self.cache = None
+        if self.config.cache_path:
+            self.cache = TranscriptionCache(self.config.cache_path, self.config.cache_ttl_hours,
+                                            self.config.cache_max_entries)
 
         self.log_service_action("TranscriptionService", "init", "Initialized transcription service")
 
@@ -41,9 +48,9 @@ class TranscriptionService(LoggerMixin):
                 self.logger.debug(f"Making request to transcription service, attempt {attempt + 1}")
 
                 if method.upper() == "POST":
-                    response = self.session.post(url, files=files, data=data)
+                    response = self.session.post(url, files=files, data=data, timeout=self.config.timeout_seconds)
                 else:
-                    response = self.session.get(url, params=data)
+                    response = self.session.get(url, params=data, timeout=self.config.timeout_seconds)
 
                 response.raise_for_status()
 
@@ -160,7 +167,25 @@ class TranscriptionService(LoggerMixin):
             )
 
     def transcribe_url(self, audio_url: str) -> TranscriptionResult:
-        """Transcribe audio from URL"""
+        """Transcribe audio from URL, reusing a cached transcription of the same recording"""
+        if self.cache is not None:
+            cached = self.cache.get(audio_url)
+            if cached is not None:
+                self.logger.info(f"Using cached transcription for: {audio_url}")
+                return cached
+
+        result = self._transcribe_url_uncached(audio_url)
+
+        if self.cache is not None:
+            try:
+                self.cache.put(result)
+            except Exception as e:
+                self.logger.warning(f"Failed to cache transcription for {audio_url}: {e}")
+
+        return result
+
+    def _transcribe_url_uncached(self, audio_url: str) -> TranscriptionResult:
+        """Download and transcribe audio from URL"""
         try:
             self.logger.info(f"Transcribing audio from URL: {audio_url}")
 
@@ -235,8 +260,8 @@ class TranscriptionService(LoggerMixin):
             temp_filename = f"temp_audio_{uuid.uuid4().hex[:8]}.wav"
             temp_path = temp_dir / temp_filename
 
-            # Download file
-            response = requests.get(url, timeout=30, stream=True)
+            # Download file over the service session so repeated downloads reuse pooled connections
+            response = self.session.get(url, timeout=30, stream=True)
             response.raise_for_status()
 
             with open(temp_path, 'wb') as f:
@@ -290,4 +315,6 @@ class TranscriptionService(LoggerMixin):
         """Close the service and cleanup resources"""
         if hasattr(self, 'session'):
             self.session.close()
+        if getattr(self, 'cache', None) is not None:
+            self.cache.close()
         self.log_service_action("TranscriptionService", "close", "Service closed")
\ No newline at end of file
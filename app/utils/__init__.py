@@ -12,6 +12,7 @@ from .exceptions import (
     BitrixAPIError, TranscriptionError, AIAnalysisError,
     SchedulerError, WebhookError
 )
+from .health import run_health_probes
 
 __all__ = [
     'validate_webhook_url', 'validate_lead_id', 'validate_junk_status',
@@ -19,5 +20,6 @@ __all__ = [
     'validate_lead_data', 'validate_activity_data',
     'LeadAnalyzerError', 'ConfigurationError', 'ValidationError',
     'BitrixAPIError', 'TranscriptionError', 'AIAnalysisError',
-    'SchedulerError', 'WebhookError'
+    'SchedulerError', 'WebhookError',
+    'run_health_probes'
 ]
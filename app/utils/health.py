@@ -0,0 +1,44 @@
+"""
+Health check helpers for Bitrix24 Lead Analyzer
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+def run_health_probes(probes: Dict[str, Callable[[], Any]], timeout: float,
+                      logger: Optional[logging.Logger] = None) -> Dict[str, bool]:
+    """Run independent health probes concurrently and report each as healthy or not.
+
+    All probes start at once, so a single deadline bounds the whole check; a probe still
+    running when it passes is reported unhealthy. Probes run on daemon threads so a stalled
+    backend can neither delay the caller past the deadline nor keep the process alive.
+    """
+    results: Dict[str, bool] = {}
+
+    def _run(service: str, probe: Callable[[], Any]):
+        try:
+            results[service] = bool(probe())
+        except Exception:
+            results[service] = False
+
+    threads = {
+        service: threading.Thread(target=_run, args=(service, probe), name=f"health-{service}", daemon=True)
+        for service, probe in probes.items()
+    }
+    for thread in threads.values():
+        thread.start()
+
+    deadline = time.monotonic() + timeout
+    health_status = {}
+    for service, thread in threads.items():
+        thread.join(max(0.0, deadline - time.monotonic()))
+        if thread.is_alive():
+            if logger is not None:
+                logger.warning("%s health check timed out", service)
+            health_status[service] = False
+        else:
+            health_status[service] = results.get(service, False)
+    return health_status
@@ -7,6 +7,8 @@ from typing import Optional, List
 from urllib.parse import urlparse
 from pathlib import Path
 
+from app.models.lead import JUNK_STATUS_IDS
+
 
 def validate_webhook_url(url: str) -> bool:
     """Validate Bitrix24 webhook URL format"""
@@ -46,7 +48,7 @@ def validate_lead_id(lead_id: str) -> bool:
 def validate_junk_status(junk_status: int, valid_statuses: Optional[List[int]] = None) -> bool:
     """Validate junk status code"""
     if valid_statuses is None:
-        valid_statuses = [158, 227, 229, 783, 807]
+        valid_statuses = JUNK_STATUS_IDS
 
     return junk_status in valid_statuses
 
@@ -8,9 +8,10 @@ import threading
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 
-from database_models import SchedulerState, db_manager, get_db
+from database_models import SchedulerState, get_db_manager, session_scope
 from app.config import get_config
 from app.logger import LoggerMixin
+from app.models.lead import JUNK_STATUS_NAMES
 from app.utils.exceptions import SchedulerError
 
 
@@ -30,9 +31,11 @@ class EnhancedDailySchedulerWithDB(LoggerMixin):
         self._running = False
         self._thread: Optional[threading.Thread] = None
         self._stop_event = threading.Event()
+        # Set on stop or when the job list changes so the loop recomputes its sleep
+        self._wakeup_event = threading.Event()
 
         # Initialize database
-        db_manager.init_system_config()
+        get_db_manager().init_system_config()
 
         # Setup default schedule
         schedule.every().day.at("09:00").do(self._scheduled_analysis)
@@ -66,6 +69,7 @@ class EnhancedDailySchedulerWithDB(LoggerMixin):
 
         self._running = False
         self._stop_event.set()
+        self._wakeup_event.set()
 
         if self._thread and self._thread.is_alive():
             self._thread.join(timeout=timeout)
@@ -84,20 +88,19 @@ class EnhancedDailySchedulerWithDB(LoggerMixin):
 
         while self._running and not self._stop_event.is_set():
             try:
-                # Run pending scheduled jobs
-                schedule.run_pending()
-
-                # Sleep for 1 minute before checking again
-                if not self._stop_event.wait(60):
-                    continue
-                else:
+                # Sleep until the next job is due instead of polling
+                self._wakeup_event.clear()
+                self._wakeup_event.wait(self._seconds_until_next_run())
+                if self._stop_event.is_set():
                     break
 
+                schedule.run_pending()
+
             except Exception as e:
                 self.logger.error(f"Error in scheduler loop: {e}")
 
                 # Log error to database
-                with next(get_db()) as db:
+                with session_scope() as db:
                     error_state = SchedulerState(
                         last_analysis_time=datetime.utcnow(),
                         status='failed',
@@ -114,6 +117,13 @@ class EnhancedDailySchedulerWithDB(LoggerMixin):
 
         self.logger.info("Enhanced scheduler loop ended")
 
+    def _seconds_until_next_run(self) -> float:
+        """Seconds to sleep before the next scheduled job is due"""
+        next_run = schedule.next_run()
+        if next_run is None:
+            return self.config.check_interval_hours * 3600
+        return max(1.0, (next_run - datetime.now()).total_seconds())
+
     def _scheduled_analysis(self):
         """Scheduled analysis job with database state tracking"""
         try:
@@ -130,14 +140,14 @@ class EnhancedDailySchedulerWithDB(LoggerMixin):
             self._log_analysis_results(batch_result, processing_time)
 
             # Update system configuration
-            db_manager.set_config_value('last_scheduled_run', end_time.isoformat())
+            get_db_manager().set_config_value('last_scheduled_run', end_time.isoformat())
 
             # Clean up old data periodically (every 7 days)
-            last_cleanup = db_manager.get_config_value('last_cleanup')
+            last_cleanup = get_db_manager().get_config_value('last_cleanup')
             if not last_cleanup or (datetime.utcnow() - datetime.fromisoformat(last_cleanup)).days >= 7:
                 self.logger.info("Running periodic data cleanup")
                 self.analyzer.cleanup_old_data(days=30)
-                db_manager.set_config_value('last_cleanup', datetime.utcnow().isoformat())
+                get_db_manager().set_config_value('last_cleanup', datetime.utcnow().isoformat())
 
         except Exception as e:
             self.logger.error(f"Scheduled analysis failed: {e}")
@@ -167,8 +177,8 @@ class EnhancedDailySchedulerWithDB(LoggerMixin):
             self.logger.info(f"Action breakdown: {action_summary}")
 
         # Update system statistics
-        total_processed = int(db_manager.get_config_value('total_leads_processed', '0')) + batch_result.total_leads
-        db_manager.set_config_value('total_leads_processed', str(total_processed))
+        total_processed = int(get_db_manager().get_config_value('total_leads_processed', '0')) + batch_result.total_leads
+        get_db_manager().set_config_value('total_leads_processed', str(total_processed))
 
     def force_run(self):
         """Force an immediate analysis run"""
@@ -185,16 +195,16 @@ class EnhancedDailySchedulerWithDB(LoggerMixin):
 
     def get_status(self) -> Dict[str, Any]:
         """Get detailed scheduler status from database"""
-        with next(get_db()) as db:
+        with session_scope() as db:
             # Get recent scheduler states
             recent_states = db.query(SchedulerState).order_by(
                 SchedulerState.created_at.desc()
             ).limit(5).all()
 
             # Get system configuration
-            last_analysis = db_manager.get_config_value('last_analysis_time')
-            last_scheduled_run = db_manager.get_config_value('last_scheduled_run')
-            total_processed = db_manager.get_config_value('total_leads_processed', '0')
+            last_analysis = get_db_manager().get_config_value('last_analysis_time')
+            last_scheduled_run = get_db_manager().get_config_value('last_scheduled_run')
+            total_processed = get_db_manager().get_config_value('total_leads_processed', '0')
 
             return {
                 'running': self._running,
@@ -222,31 +232,25 @@ class EnhancedDailySchedulerWithDB(LoggerMixin):
     def add_custom_schedule(self, time_str: str):
         """Add custom schedule time"""
         schedule.every().day.at(time_str).do(self._scheduled_analysis)
+        self._wakeup_event.set()
         self.logger.info(f"Added custom schedule at {time_str}")
 
     def set_interval_schedule(self, hours: int):
         """Set interval-based scheduling instead of daily"""
         schedule.clear()
         schedule.every(hours).hours.do(self._scheduled_analysis)
+        self._wakeup_event.set()
         self.logger.info(f"Set interval schedule: every {hours} hours")
 
     def get_analytics_dashboard_data(self) -> Dict[str, Any]:
         """Get data for analytics dashboard"""
-        with next(get_db()) as db:
+        with session_scope() as db:
             # Import here to avoid circular imports
             from database_models import Lead, AnalysisHistory, Transcription
 
             # Lead statistics by junk status
             junk_status_stats = {}
-            junk_statuses = {
-                158: "5 marta javob bermadi",
-                227: "Notog'ri raqam",
-                229: "Ariza qoldirmagan",
-                783: "Notog'ri mijoz",
-                807: "Yoshi to'g'ri kelmadi"
-            }
-
-            for status_code, status_name in junk_statuses.items():
+            for status_code, status_name in JUNK_STATUS_NAMES.items():
                 count = db.query(Lead).filter(Lead.junk_status == status_code).count()
                 junk_status_stats[status_name] = count
 
@@ -309,7 +313,7 @@ class EnhancedDailySchedulerWithDB(LoggerMixin):
         """Export analysis data for reporting"""
         cutoff_date = datetime.utcnow() - timedelta(days=days)
 
-        with next(get_db()) as db:
+        with session_scope() as db:
             # Import here to avoid circular imports
             from database_models import Lead, AnalysisHistory, Transcription
 
@@ -2,15 +2,42 @@
 Database models for Lead Analysis with transcription caching
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Float, Text, Boolean, JSON, ForeignKey
+import hashlib
+from contextlib import contextmanager
+from sqlalchemy import (
+    create_engine, event, inspect, text, Column, Index, Integer, BigInteger, String, DateTime, Float, Text, Boolean, JSON, ForeignKey
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.pool import QueuePool
 from datetime import datetime
 from typing import Optional, Dict, Any
 import os
+import threading
 
 Base = declarative_base()
 
+# Connection pool shared by the lead analysis worker threads
+_POOL_SIZE = 20
+_POOL_MAX_OVERFLOW = 10
+_POOL_RECYCLE_SECONDS = 1800
+
+# WAL lets readers run alongside the batch writer; NORMAL skips the fsync on every commit
+_SQLITE_PRAGMAS = ("PRAGMA journal_mode=WAL", "PRAGMA synchronous=NORMAL")
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply the SQLite write settings to a new connection"""
+    cursor = dbapi_connection.cursor()
+    for pragma in _SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def audio_url_hash(audio_url: str) -> int:
+    """Transcription cache key: the first 8 bytes of the audio URL's SHA256 as a signed 64-bit integer"""
+    return int.from_bytes(hashlib.sha256(audio_url.encode()).digest()[:8], 'big', signed=True)
+
 
 class Lead(Base):
     """Lead model with analysis history"""
@@ -43,8 +70,10 @@ class Lead(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
-    transcriptions = relationship("Transcription", back_populates="lead", cascade="all, delete-orphan")
-    analysis_history = relationship("AnalysisHistory", back_populates="lead", cascade="all, delete-orphan")
+    transcriptions = relationship("Transcription", back_populates="lead", cascade="all, delete-orphan",
+                                  order_by="Transcription.created_at.desc()")
+    analysis_history = relationship("AnalysisHistory", back_populates="lead", cascade="all, delete-orphan",
+                                    order_by="AnalysisHistory.analysis_date.desc()")
 
 
 class Transcription(Base):
@@ -54,7 +83,7 @@ class Transcription(Base):
     id = Column(Integer, primary_key=True)
     lead_id = Column(String(50), ForeignKey('leads.id'), nullable=False)
     audio_url = Column(Text, nullable=False)
-    audio_hash = Column(String(64), unique=True, nullable=False)  # SHA256 hash of audio URL
+    audio_hash = Column(BigInteger, unique=True, nullable=False)  # First 8 bytes of the audio URL's SHA256
 
     # Transcription results
     transcription_text = Column(Text)
@@ -78,6 +107,12 @@ class Transcription(Base):
     # Relationships
     lead = relationship("Lead", back_populates="transcriptions")
 
+    # A lead's transcriptions newest first, and a covering index for the cache statistics counts
+    __table_args__ = (
+        Index('ix_transcriptions_lead_created', 'lead_id', created_at.desc()),
+        Index('ix_transcriptions_success', 'is_successful'),
+    )
+
 
 class AnalysisHistory(Base):
     """Analysis history for leads"""
@@ -116,12 +151,19 @@ class AnalysisHistory(Base):
     dry_run = Column(Boolean, default=False)
 
     # Timestamps
-    analysis_date = Column(DateTime, default=datetime.utcnow)
+    analysis_date = Column(DateTime, default=datetime.utcnow, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
     lead = relationship("Lead", back_populates="analysis_history")
 
+    # Per-lead lookups and history newest first, and narrow covering indexes for the statistics counts
+    __table_args__ = (
+        Index('ix_analysis_history_lead_success', 'lead_id', 'is_successful'),
+        Index('ix_analysis_history_lead_date', 'lead_id', analysis_date.desc()),
+        Index('ix_analysis_history_success_update', 'is_successful', 'requires_update'),
+    )
+
 
 class SystemConfig(Base):
     """System configuration and state"""
@@ -152,7 +194,7 @@ class SchedulerState(Base):
     # Timestamps
     started_at = Column(DateTime)
     completed_at = Column(DateTime)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
 
 class DatabaseManager:
@@ -164,16 +206,106 @@ class DatabaseManager:
             os.makedirs('data', exist_ok=True)
             database_url = 'sqlite:///data/lead_analysis.db'
 
-        self.engine = create_engine(database_url, echo=False)
+        self.engine = create_engine(
+            database_url,
+            echo=False,
+            poolclass=QueuePool,
+            pool_size=_POOL_SIZE,
+            max_overflow=_POOL_MAX_OVERFLOW,
+            pool_pre_ping=True,
+            pool_recycle=_POOL_RECYCLE_SECONDS
+        )
+        if self.engine.dialect.name == 'sqlite':
+            event.listen(self.engine, 'connect', _set_sqlite_pragmas)
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
 
         # Create tables
+        self._migrate_transcription_hashes()
         Base.metadata.create_all(bind=self.engine)
 
+        # create_all skips tables that already exist, so add indexes introduced since they were created
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=self.engine, checkfirst=True)
+
+    def _migrate_transcription_hashes(self):
+        """Rekey a transcriptions table still holding hex digests to the 64-bit URL hash, keeping its rows"""
+        inspector = inspect(self.engine)
+        if not inspector.has_table(Transcription.__tablename__):
+            return
+
+        column_types = {column['name']: column['type'] for column in inspector.get_columns(Transcription.__tablename__)}
+        if isinstance(column_types.get('audio_hash'), Integer):
+            return
+
+        with self.engine.begin() as connection:
+            # Recompute every key from its URL into a new integer column
+            connection.execute(text("ALTER TABLE transcriptions ADD COLUMN audio_hash_new BIGINT"))
+            rows = connection.execute(text("SELECT id, audio_url FROM transcriptions")).all()
+            if rows:
+                connection.execute(
+                    text("UPDATE transcriptions SET audio_hash_new = :audio_hash WHERE id = :id"),
+                    [{'id': row.id, 'audio_hash': audio_url_hash(row.audio_url)} for row in rows]
+                )
+
+            # Then swap it in for the hex column
+            if self.engine.dialect.name == 'sqlite':
+                self._rebuild_sqlite_transcriptions(connection, list(column_types))
+            else:
+                connection.execute(text("ALTER TABLE transcriptions DROP COLUMN audio_hash"))
+                connection.execute(text("ALTER TABLE transcriptions RENAME COLUMN audio_hash_new TO audio_hash"))
+                connection.execute(text("ALTER TABLE transcriptions ALTER COLUMN audio_hash SET NOT NULL"))
+                connection.execute(text(
+                    "ALTER TABLE transcriptions ADD CONSTRAINT transcriptions_audio_hash_key UNIQUE (audio_hash)"
+                ))
+
+    @staticmethod
+    def _rebuild_sqlite_transcriptions(connection, legacy_columns):
+        """Copy the rekeyed rows into a freshly created table; SQLite cannot drop a UNIQUE column"""
+        connection.execute(text("ALTER TABLE transcriptions RENAME TO transcriptions_legacy"))
+        # Index names are database-wide in SQLite, so free them for the new table
+        for index in inspect(connection).get_indexes('transcriptions_legacy'):
+            connection.execute(text(f'DROP INDEX "{index["name"]}"'))
+        Transcription.__table__.create(bind=connection)
+
+        columns = [column.name for column in Transcription.__table__.columns if column.name in legacy_columns]
+        target = ", ".join(columns)
+        source = ", ".join('audio_hash_new' if name == 'audio_hash' else name for name in columns)
+        connection.execute(text(f"INSERT INTO transcriptions ({target}) SELECT {source} FROM transcriptions_legacy"))
+        connection.execute(text("DROP TABLE transcriptions_legacy"))
+
     def get_session(self):
         """Get database session"""
         return self.SessionLocal()
 
+    @contextmanager
+    def session_scope(self):
+        """Provide a session that commits on success and rolls back on error"""
+        session = self.SessionLocal()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def ping(self) -> bool:
+        """Run a trivial query on a pooled connection"""
+        with self.engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        return True
+
+    def get_pool_status(self) -> Dict[str, int]:
+        """Snapshot the connection pool usage without touching the database"""
+        pool = self.engine.pool
+        return {
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow()
+        }
+
     def init_system_config(self):
         """Initialize system configuration"""
         with self.get_session() as session:
@@ -218,14 +350,30 @@ class DatabaseManager:
         self.engine.dispose()
 
 
-# Initialize database manager
-db_manager = DatabaseManager()
+# Default database manager, created on first use so importing the models opens no database
+_db_manager: Optional[DatabaseManager] = None
+_db_manager_lock = threading.Lock()
+
+
+def get_db_manager() -> DatabaseManager:
+    """Return the default database manager, creating it on first use"""
+    global _db_manager
+    if _db_manager is None:
+        with _db_manager_lock:
+            if _db_manager is None:
+                _db_manager = DatabaseManager()
+    return _db_manager
 
 
 def get_db():
     """Dependency to get database session"""
-    db = db_manager.get_session()
+    db = get_db_manager().get_session()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def session_scope():
+    """Provide a pooled database session that commits on success and rolls back on error"""
+    return get_db_manager().session_scope()
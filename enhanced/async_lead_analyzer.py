@@ -0,0 +1,181 @@
+"""
+Asyncio-based lead analyzer for Bitrix24 running every lead's I/O on one event loop
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from app.config import get_config
+from app.models.lead import Lead, LeadFilter
+from app.models.analysis_result import (
+    LeadAnalysisResult, BatchAnalysisResult, AnalysisAction, AnalysisReason
+)
+from app.utils.exceptions import LeadAnalyzerError
+from enhanced.enhanced_lead_analyzer import EnhancedLeadAnalyzerService
+
+
+class AsyncLeadAnalyzerService(EnhancedLeadAnalyzerService):
+    """Lead analyzer that interleaves Bitrix, recording, transcription and Gemini calls with asyncio"""
+
+    def analyze_new_leads(self, dry_run: bool = False) -> BatchAnalysisResult:
+        """Analyze leads added since last check"""
+        return asyncio.run(self.analyze_new_leads_async(dry_run))
+
+    async def analyze_new_leads_async(self, dry_run: bool = False) -> BatchAnalysisResult:
+        """Analyze leads added since last check, all leads concurrently"""
+        batch_id = f"new_leads_{time.time_ns()}"
+        batch_result = BatchAnalysisResult(batch_id=batch_id)
+
+        try:
+            self.logger.info("Starting async analysis of new junk leads")
+
+            # Create filter for new junk leads added since last analysis
+            lead_filter = LeadFilter(
+                status_id=self.config.lead_status.junk_status_value,
+                junk_statuses=list(self.junk_statuses),
+                date_from=self.last_analysis_time,
+                limit=self.config.scheduler.max_concurrent_leads
+            )
+
+            leads = await asyncio.to_thread(self.bitrix_service.get_leads, lead_filter)
+
+            if not leads:
+                self.logger.info("No new junk leads found")
+                batch_result.mark_completed()
+                return batch_result
+
+            self.logger.info("Found %s new junk leads to analyze", len(leads))
+
+            # Bitrix calls are capped by their session's pool; recordings and Gemini have their own
+            async with self.bitrix_service.open_async_session() as bitrix_session, \
+                    self.transcription_service.open_async_session() as media_session, \
+                    self.gemini_service.open_rest_session() as gemini_session:
+                prepared = await asyncio.gather(*[
+                    self._analyze_lead_async(lead, dry_run, bitrix_session, media_session)
+                    for lead in leads
+                ])
+                results = await self._classify_leads_async(leads, prepared, dry_run, gemini_session)
+
+            for result in results:
+                batch_result.add_result(result)
+
+            # Update last analysis time
+            self.last_analysis_time = datetime.now()
+            batch_result.mark_completed()
+
+            self.logger.info("New leads analysis completed: %.2f success rate", batch_result.success_rate)
+            return batch_result
+
+        except Exception as e:
+            self.logger.error("Error in new leads analysis: %s", e)
+            batch_result.mark_completed()
+            raise LeadAnalyzerError(f"New leads analysis failed: {e}")
+
+    async def _analyze_lead_async(self, lead: Lead, dry_run: bool, bitrix_session: aiohttp.ClientSession,
+                                  media_session: aiohttp.ClientSession) -> Tuple[LeadAnalysisResult, Optional[str]]:
+        """Analyze a single lead based on junk status, returning the transcription still awaiting Gemini"""
+        result = LeadAnalysisResult(
+            lead_id=lead.id,
+            original_status=lead.status_id,
+            original_junk_status=lead.junk_status
+        )
+
+        try:
+            self.log_lead_action(lead.id, "analyze", "Analyzing junk status %s", lead.junk_status)
+
+            # Check if lead has valid junk status
+            if lead.junk_status not in self.junk_statuses:
+                result.set_action(AnalysisAction.SKIP, AnalysisReason.NOT_TARGET_STATUS)
+                result.mark_completed()
+                return result, None
+
+            # Call activities and recordings both come from the lead's Voximplant records
+            call_data = await self.bitrix_service.get_voximplant_call_data_async(bitrix_session, lead.id)
+
+            if lead.junk_status == 158:
+                # Status 158: "5 marta javob bermadi" - check unsuccessful calls
+                activities = self.bitrix_service.build_call_activities(call_data)
+                result = await asyncio.to_thread(self._analyze_unsuccessful_calls, lead, result, dry_run, activities)
+                result.mark_completed()
+                return result, None
+
+            combined_transcription = await self._transcribe_lead_async(lead, result, call_data, media_session)
+            if combined_transcription is None:
+                result.mark_completed()
+            return result, combined_transcription
+
+        except Exception as e:
+            self.log_lead_action(lead.id, "analyze_error", "Analysis error: %s", e)
+            result.set_error(str(e))
+            return result, None
+
+    async def _transcribe_lead_async(self, lead: Lead, result: LeadAnalysisResult,
+                                     call_data: List[Dict[str, Any]],
+                                     media_session: aiohttp.ClientSession) -> Optional[str]:
+        """Transcribe the lead's recordings concurrently and return the combined text"""
+        audio_files = self._recording_urls(call_data)
+        if not audio_files:
+            result.set_action(AnalysisAction.SKIP, AnalysisReason.NO_AUDIO_FILES)
+            self.log_lead_action(lead.id, "ai_analysis", "No audio files found")
+            return None
+
+        self.log_lead_action(lead.id, "ai_analysis", "Found %s audio files", len(audio_files))
+
+        transcription_results = await asyncio.gather(*[
+            self.transcription_service.transcribe_url_async(media_session, audio_file)
+            for audio_file in audio_files
+        ])
+
+        return self._combine_transcriptions(lead, result, list(transcription_results))
+
+    async def _classify_leads_async(self, leads: List[Lead],
+                                    prepared: List[Tuple[LeadAnalysisResult, Optional[str]]], dry_run: bool,
+                                    gemini_session: aiohttp.ClientSession) -> List[LeadAnalysisResult]:
+        """Send every transcribed lead to Gemini in grouped requests and apply the decisions"""
+        pending = [(lead, result, transcription)
+                   for lead, (result, transcription) in zip(leads, prepared) if transcription is not None]
+        if not pending:
+            return [result for result, _ in prepared]
+
+        try:
+            ai_results = await self.gemini_service.analyze_leads_grouped_async(gemini_session, [
+                {
+                    'transcription': transcription,
+                    'junk_status': lead.junk_status,
+                    'status_name': self.junk_statuses.get(lead.junk_status, "Unknown"),
+                }
+                for lead, _, transcription in pending
+            ])
+        except Exception as e:
+            self.logger.error("Grouped AI analysis failed: %s", e)
+            for lead, result, _ in pending:
+                self.log_lead_action(lead.id, "analyze_error", "Analysis error: %s", e)
+                result.set_error(str(e))
+            return [result for result, _ in prepared]
+
+        # Status writes are rare; run them on worker threads with the shared decision logic
+        applied = await asyncio.gather(*[
+            asyncio.to_thread(self._apply_ai_result, lead, result, ai_result, dry_run)
+            for (lead, result, _), ai_result in zip(pending, ai_results)
+        ], return_exceptions=True)
+
+        for (lead, result, _), outcome in zip(pending, applied):
+            if isinstance(outcome, Exception):
+                self.log_lead_action(lead.id, "analyze_error", "Analysis error: %s", outcome)
+                result.set_error(str(outcome))
+            else:
+                outcome.mark_completed()
+
+        # _apply_ai_result updates the result in place, so the prepared list is the final order
+        return [result for result, _ in prepared]
+
+
+def create_lead_analyzer() -> EnhancedLeadAnalyzerService:
+    """Create the lead analyzer selected by the ASYNC_ANALYZER setting"""
+    if get_config().scheduler.async_analyzer:
+        return AsyncLeadAnalyzerService()
+    return EnhancedLeadAnalyzerService()
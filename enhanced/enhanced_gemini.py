@@ -1,158 +1,106 @@
 """
 Enhanced Gemini AI service for detailed lead analysis
 """
+import asyncio
+import dataclasses
+import hashlib
+import json
 import logging
+import random
+import re
+import threading
 import time
-from typing import Optional, Dict, Any, List
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Tuple, Callable
+import aiohttp
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+from google.generativeai.types import generation_types
+
+try:
+    import orjson
+except ImportError:  # optional, faster JSON decoding
+    orjson = None
 
 from app.config import get_config
 from app.logger import LoggerMixin
 from app.models.analysis_result import AIAnalysisResult
+from app.models.lead import JUNK_STATUS_NAMES, JunkStatusCode
 from app.utils.exceptions import AIAnalysisError, ValidationError
 
-
-class EnhancedGeminiService(LoggerMixin):
-    """Enhanced service for interacting with Google Gemini AI for lead analysis"""
-
-    def __init__(self):
-        self.config = get_config().gemini
-        self.lead_config = get_config().lead_status
-
-        if not self.config.api_key:
-            raise ValidationError("Gemini API key is required")
-
-        try:
-            # Configure Gemini AI
-            genai.configure(api_key=self.config.api_key)
-            self.model = genai.GenerativeModel(self.config.model_name)
-
-            self.log_service_action("EnhancedGeminiService", "init",
-                                    f"Initialized Enhanced Gemini AI with model {self.config.model_name}")
-
-        except Exception as e:
-            raise AIAnalysisError(f"Failed to initialize Gemini AI: {e}")
-
-    def analyze_lead_status(self, transcription: str, current_junk_status: int,
-                            status_name: str) -> AIAnalysisResult:
-        """Analyze if junk status is suitable based on transcription with enhanced prompting"""
-        try:
-            if not transcription.strip():
-                return AIAnalysisResult(
-                    is_suitable=False,
-                    error="Empty transcription provided"
-                )
-
-            # Validate junk status
-            valid_statuses = {
-                227: "Notog'ri raqam",
-                229: "Ariza qoldirmagan",
-                783: "Notog'ri mijoz",
-                807: "Yoshi to'g'ri kelmadi"
-            }
-
-            if current_junk_status not in valid_statuses:
-                return AIAnalysisResult(
-                    is_suitable=False,
-                    error=f"Unknown junk status: {current_junk_status}"
-                )
-
-            start_time = time.time()
-
-            # Build enhanced prompt based on status
-            prompt = self._build_enhanced_analysis_prompt(transcription, current_junk_status, status_name)
-
-            self.logger.debug(f"Analyzing junk status {current_junk_status} with Enhanced Gemini AI")
-
-            # Make request to Gemini with retry logic
-            response = None
-            for attempt in range(self.config.max_retries):
-                try:
-                    response = self.model.generate_content(prompt)
-                    break
-                except Exception as e:
-                    self.logger.warning(f"Gemini API attempt {attempt + 1} failed: {e}")
-                    if attempt == self.config.max_retries - 1:
-                        raise
-                    time.sleep(2 ** attempt)
-
-            if not response or not response.text:
-                return AIAnalysisResult(
-                    is_suitable=False,
-                    error="No response from Gemini AI"
-                )
-
-            processing_time = time.time() - start_time
-
-            # Parse response with enhanced logic
-            result_text = response.text.strip()
-            is_suitable, reasoning, alternative_status = self._parse_enhanced_response(result_text)
-
-            self.logger.info(f"Enhanced Gemini analysis completed in {processing_time:.2f}s: suitable={is_suitable}")
-
-            if alternative_status:
-                self.logger.info(f"Alternative status suggested: {alternative_status}")
-
-            # Create extended result with alternative status info
-            result = AIAnalysisResult(
-                is_suitable=is_suitable,
-                reasoning=reasoning,
-                model_used=self.config.model_name,
-                processing_time=processing_time
-            )
-
-            # Add alternative status to result (you might need to extend AIAnalysisResult class)
-            result.alternative_status = alternative_status
-
-            return result
-
-        except Exception as e:
-            self.logger.error(f"Error in Enhanced Gemini analysis: {e}")
-            return AIAnalysisResult(
-                is_suitable=False,
-                error=str(e)
-            )
-
-    def _build_enhanced_analysis_prompt(self, transcription: str, junk_status: int, status_name: str) -> str:
-        """Build enhanced analysis prompt that checks current status and suggests alternative if unsuitable"""
-
-        # Define all available junk statuses
-        all_junk_statuses = {
-            227: "Notog'ri raqam",
-            229: "Ariza qoldirmagan",
-            783: "Notog'ri mijoz",
-            807: "Yoshi to'g'ri kelmadi"
-        }
-
-        # Get other possible statuses (excluding current one)
-        other_statuses = {k: v for k, v in all_junk_statuses.items() if k != junk_status}
-
-        # Base context about the system
-        base_context = f"""
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch the stdlib type
+_json_loads = orjson.loads if orjson is not None else json.loads
+_json_dumps = orjson.dumps if orjson is not None else json.dumps
+
+# Junk statuses the AI can verify or suggest; "5 marta javob bermadi" is decided from call counts instead
+JUNK_STATUSES: Dict[int, str] = {
+    code: name for code, name in JUNK_STATUS_NAMES.items() if code != JunkStatusCode.FIVE_NO_RESPONSE.value
+}
+
+# Transcriptions with fewer words are kept as-is without asking the model
+_MIN_TRANSCRIPTION_WORDS = 3
+
+# Retry backoff: min(cap, base * 2**attempt) scaled by up to +50% jitter
+_RETRY_BASE_DELAY = 1.0
+_RETRY_MAX_DELAY = 30.0
+_RETRY_JITTER = 0.5
+
+# Transient errors worth retrying (quota, overload, timeouts, dropped connections);
+# anything else (bad request, auth, missing model, ...) fails immediately
+_RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+    ConnectionError,
+    TimeoutError,
+)
+
+# REST endpoint used by the async batch path
+_REST_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+_REST_JSON_HEADERS = {'Content-Type': 'application/json'}
+_REST_KEEPALIVE_SECONDS = 60.0
+
+# HTTP statuses and client errors worth retrying on the REST path
+_RETRYABLE_HTTP_STATUSES = {429, 500, 502, 503, 504}
+_RETRYABLE_REST_ERRORS = (aiohttp.ClientResponseError, aiohttp.ClientConnectionError, asyncio.TimeoutError)
+
+# Invariant instructions sent once per model as the system instruction
+_STATIC_INSTRUCTIONS = """
 Sen Bitrix24 CRM tizimida ishlayotgan mijozlar bilan qo'ng'iroqlarni tahlil qiluvchi AI assistantisan.
 
-HOZIRGI HOLAT: "{status_name}" (Kod: {junk_status})
+BARCHA JUNK HOLATLARI:
+- 227: "Notog'ri raqam" - Telefon raqami noto'g'ri yoki boshqa kishiga tegishli
+- 229: "Ariza qoldirmagan" - Mijoz hech qachon ariza bermagan
+- 783: "Notog'ri mijoz" - Mijoz xizmat uchun mos kelmaydi
+- 807: "Yoshi to'g'ri kelmadi" - Mijoz yoshi talablarga javob bermaydi
 
-QO'NG'IROQ YOZUVI:
-{transcription}
+JAVOB FORMATI:
+Javobingizni JSON obyekt sifatida bering:
+- "is_suitable": QAROR, true yoki false
+- "alternative_status": agar hozirgi holat mos kelmasa, boshqa mos holat kodi (227, 229, 783, 807), aks holda null
+- "reasons": sabablar ro'yxati (2-4 ta qisqa sabab)
+- "explanation": qisqa xulosangiz
 
-BARCHA JUNK HOLATLARI:
+QOIDALAR:
+- "true" = hozirgi holat to'g'ri va saqlanishi kerak
+- "false" = hozirgi holat noto'g'ri va o'zgartirilishi kerak
+- Agar hozirgi holat mos kelmasa, lekin boshqa junk holati mos kelsa, "true" deb javob bering va "alternative_status" ni ko'rsating
+- Faqat mijoz haqiqatan ham NEW holatga o'tishi kerak bo'lsagina "false" deb javob bering
+- Shubha bo'lsa, "true" deb javob bering
+- "alternative_status" faqat boshqa junk holati mos kelganda yozing
+- Har bir sababni aniq va qisqa yozing
+- Sabablar qo'ng'iroq yozuviga asoslangan bo'lishi kerak
+
+MUHIM:
+- Agar mijoz haqiqatan ham qiziqsa va hech qanday junk sabab bo'lmasa, faqat o'shanda "false" qaytaring
+- Agar biror junk sabab mavjud bo'lsa (hatto hozirgi holatdan farqli bo'lsa ham), "true" qaytaring va to'g'ri "alternative_status" ni belgilang
 """
 
-        # Add all status definitions
-        for code, name in all_junk_statuses.items():
-            if code == 227:
-                base_context += f"- {code}: \"{name}\" - Telefon raqami noto'g'ri yoki boshqa kishiga tegishli\n"
-            elif code == 229:
-                base_context += f"- {code}: \"{name}\" - Mijoz hech qachon ariza bermagan\n"
-            elif code == 783:
-                base_context += f"- {code}: \"{name}\" - Mijoz xizmat uchun mos kelmaydi\n"
-            elif code == 807:
-                base_context += f"- {code}: \"{name}\" - Mijoz yoshi talablarga javob bermaydi\n"
-
-        # Status-specific instructions
-        if junk_status == 227:  # "Notog'ri raqam"
-            specific_prompt = """
+# Status-specific task instructions keyed by junk status code
+_SPECIFIC_PROMPTS: Dict[int, str] = {
+    227: """
 VAZIFA: Bu qo'ng'iroq yozuviga asoslanib, "Notog'ri raqam" holati to'g'ri yoki noto'g'ri ekanligini aniqlang.
 
 "Notog'ri raqam" holati QO'LLANILISHI KERAK agar:
@@ -165,10 +113,8 @@ LEKIN AGAR "Notog'ri raqam" mos kelmasa, boshqa holatlarga tekshiring:
 - Agar mijoz "men ariza bermaganman" desa → 229 "Ariza qoldirmagan" mos keladi
 - Agar mijoz yoshi kichik bo'lsa → 807 "Yoshi to'g'ri kelmadi" mos keladi  
 - Agar mijoz xizmat uchun mos kelmasa → 783 "Notog'ri mijoz" mos keladi
-"""
-
-        elif junk_status == 229:  # "Ariza qoldirmagan"
-            specific_prompt = """
+""",
+    229: """
 VAZIFA: Bu qo'ng'iroq yozuviga asoslanib, "Ariza qoldirmagan" holati to'g'ri yoki noto'g'ri ekanligini aniqlang.
 
 "Ariza qoldirmagan" holati QO'LLANILISHI KERAK agar:
@@ -181,10 +127,8 @@ LEKIN AGAR "Ariza qoldirmagan" mos kelmasa, boshqa holatlarga tekshiring:
 - Agar telefon noto'g'ri bo'lsa → 227 "Notog'ri raqam" mos keladi
 - Agar mijoz yoshi kichik bo'lsa → 807 "Yoshi to'g'ri kelmadi" mos keladi
 - Agar mijoz xizmat uchun mos kelmasa → 783 "Notog'ri mijoz" mos keladi
-"""
-
-        elif junk_status == 783:  # "Notog'ri mijoz"
-            specific_prompt = """
+""",
+    783: """
 VAZIFA: Bu qo'ng'iroq yozuviga asoslanib, "Notog'ri mijoz" holati to'g'ri yoki noto'g'ri ekanligini aniqlang.
 
 "Notog'ri mijoz" holati QO'LLANILISHI KERAK agar:
@@ -197,10 +141,8 @@ LEKIN AGAR "Notog'ri mijoz" mos kelmasa, boshqa holatlarga tekshiring:
 - Agar telefon noto'g'ri bo'lsa → 227 "Notog'ri raqam" mos keladi
 - Agar mijoz ariza bermagan bo'lsa → 229 "Ariza qoldirmagan" mos keladi
 - Agar mijoz yoshi kichik bo'lsa → 807 "Yoshi to'g'ri kelmadi" mos keladi
-"""
-
-        elif junk_status == 807:  # "Yoshi to'g'ri kelmadi"
-            specific_prompt = """
+""",
+    807: """
 VAZIFA: Bu qo'ng'iroq yozuviga asoslanib, "Yoshi to'g'ri kelmadi" holati to'g'ri yoki noto'g'ri ekanligini aniqlang.
 
 "Yoshi to'g'ri kelmadi" holati QO'LLANILISHI KERAK agar:
@@ -213,216 +155,787 @@ LEKIN AGAR "Yoshi to'g'ri kelmadi" mos kelmasa, boshqa holatlarga tekshiring:
 - Agar mijoz ariza bermagan bo'lsa → 229 "Ariza qoldirmagan" mos keladi
 - Agar mijoz boshqa sababdan mos kelmasa → 783 "Notog'ri mijoz" mos keladi
 """
+}
 
-        else:  # Default for other statuses
-            specific_prompt = f"""
+_DEFAULT_SPECIFIC_PROMPT = """
 VAZIFA: Bu qo'ng'iroq yozuviga asoslanib, "{status_name}" holati to'g'ri yoki noto'g'ri ekanligini aniqlang.
 
 Qo'ng'iroq mazmuniga asoslanib, hozirgi holat mijozning haqiqiy ahvoliga mos keladimi yoki yo'qmi deb baholang.
 """
 
-        # Enhanced final instructions with alternative status checking
-        final_instructions = """
-JAVOB FORMATI:
-Javobingizni quyidagi formatda bering:
+# Per-call prompt; the invariant instructions live in _STATIC_INSTRUCTIONS
+_ANALYSIS_PROMPT_TEMPLATE = """
+HOZIRGI HOLAT: "{status_name}" (Kod: {junk_status})
 
-QAROR: [true yoki false]
+QO'NG'IROQ YOZUVI:
+{transcription}
 
-ALTERNATIVE_STATUS: [agar hozirgi holat mos kelmasa, boshqa mos holatni yozing, masalan: 227, 229, 783, 807]
+{specific_prompt}"""
+
+# Structured output: the model answers with JSON matching these schemas
+_RESULT_PROPERTIES = {
+    'is_suitable': {'type': 'BOOLEAN'},
+    'alternative_status': {'type': 'INTEGER', 'nullable': True},
+    'reasons': {'type': 'ARRAY', 'items': {'type': 'STRING'}},
+    'explanation': {'type': 'STRING'},
+}
+# alternative_status is always emitted (null when unused) so a streamed decision is complete once it appears
+_RESULT_REQUIRED = ['is_suitable', 'alternative_status', 'reasons']
+
+_RESPONSE_SCHEMA = {'type': 'OBJECT', 'properties': _RESULT_PROPERTIES, 'required': _RESULT_REQUIRED}
+
+# Deterministic decoding keeps repeated prompts answering identically
+_TEMPERATURE = 0.0
+_TOP_P = 1.0
+_MAX_OUTPUT_TOKENS = 512
+
+
+def _generation_config(schema: Dict[str, Any], max_output_tokens: int) -> genai.types.GenerationConfig:
+    """Build a reusable JSON-mode generation config, converting the schema to its proto once"""
+    response_schema = generation_types.to_generation_config_dict({'response_schema': schema})['response_schema']
+    return genai.types.GenerationConfig(
+        temperature=_TEMPERATURE,
+        top_p=_TOP_P,
+        max_output_tokens=max_output_tokens,
+        response_mime_type='application/json',
+        response_schema=response_schema
+    )
+
+
+_GENERATION_CONFIG = _generation_config(_RESPONSE_SCHEMA, _MAX_OUTPUT_TOKENS)
+
+# Same settings for the REST endpoint, which takes camelCase JSON
+_REST_GENERATION_CONFIG = {
+    'temperature': _TEMPERATURE,
+    'topP': _TOP_P,
+    'maxOutputTokens': _MAX_OUTPUT_TOKENS,
+    'responseMimeType': 'application/json',
+    'responseSchema': _RESPONSE_SCHEMA,
+}
+
+# Grouped analysis: several leads per request, answered as a JSON array
+_GROUP_MAX_LEADS = 10
+_GROUP_CHAR_BUDGET = 24000  # transcription characters per request (~6k tokens)
+
+_GROUP_RESPONSE_SCHEMA = {
+    'type': 'ARRAY',
+    'items': {
+        'type': 'OBJECT',
+        'properties': {'index': {'type': 'INTEGER'}, **_RESULT_PROPERTIES},
+        'required': ['index', *_RESULT_REQUIRED],
+    },
+}
+
+_GROUP_GENERATION_CONFIG = _generation_config(_GROUP_RESPONSE_SCHEMA, _MAX_OUTPUT_TOKENS * _GROUP_MAX_LEADS)
+_REST_GROUP_GENERATION_CONFIG = {
+    **_REST_GENERATION_CONFIG,
+    'maxOutputTokens': _MAX_OUTPUT_TOKENS * _GROUP_MAX_LEADS,
+    'responseSchema': _GROUP_RESPONSE_SCHEMA,
+}
+
+_GROUP_LEAD_TEMPLATE = """
+=== YOZUV #{index} ===
+HOZIRGI HOLAT: "{status_name}" (Kod: {junk_status})
 
-SABABLARI:
-- [Birinchi sabab]
-- [Ikkinchi sabab] 
-- [Uchinchi sabab]
-- [To'rtinchi sabab (agar kerak bo'lsa)]
+QO'NG'IROQ YOZUVI:
+{transcription}
+"""
 
-TUSHUNTIRISH:
-[Qisqa xulosangiz]
+_GROUP_ANSWER_INSTRUCTIONS = """
+Yuqoridagi har bir yozuvni alohida baholang va JSON obyektlar massivini qaytaring:
+har bir yozuv uchun bitta obyekt, "index" maydonida yozuv raqami bilan.
+"""
 
-QOIDALAR:
-- "true" = hozirgi holat to'g'ri va saqlanishi kerak
-- "false" = hozirgi holat noto'g'ri va o'zgartirilishi kerak
-- Agar hozirgi holat mos kelmasa, lekin boshqa junk holati mos kelsa, "true" deb javob bering va ALTERNATIVE_STATUS ni ko'rsating
-- Faqat mijoz haqiqatan ham NEW holatga o'tishi kerak bo'lsagina "false" deb javob bering
-- Shubha bo'lsa, "true" deb javob bering
-- ALTERNATIVE_STATUS faqat boshqa junk holati mos kelganda yozing
-- Har bir sababni aniq va qisqa yozing
-- Sabablar qo'ng'iroq yozuviga asoslangan bo'lishi kerak
+# Decision keys picked out of a partially streamed JSON answer; values must be complete tokens
+_STREAM_IS_SUITABLE_RE = re.compile(r'"is_suitable"\s*:\s*(true|false)')
+_STREAM_ALTERNATIVE_STATUS_RE = re.compile(r'"alternative_status"\s*:\s*(null|-?\d+)(?=\s*[,}])')
 
-MUHIM:
-- Agar mijoz haqiqatan ham qiziqsa va hech qanday junk sabab bo'lmasa, faqat o'shanda "false" qaytaring
-- Agar biror junk sabab mavjud bo'lsa (hatto hozirgi holatdan farqli bo'lsa ham), "true" qaytaring va to'g'ri ALTERNATIVE_STATUS ni belgilang
+# Upper bound on built prompts kept for replayed transcriptions
+_PROMPT_CACHE_SIZE = 1024
+
+# Parsed results reused for identical transcription/status pairs
+_RESULT_CACHE_SIZE = 1024
+_RESULT_CACHE_TTL = 3600.0
+
+# How long health probe results are reused (seconds)
+_CONNECTION_CACHE_TTL = 60.0
+_STATS_CACHE_TTL = 300.0
+
+_TEST_CONNECTION_PROMPT = """
+Bu test so'rovidir. Iltimos, faqat "test successful" deb javob bering.
 """
 
-        return base_context + "\n" + specific_prompt + "\n" + final_instructions
+
+def _backoff_delay(attempt: int) -> float:
+    """Capped exponential backoff with jitter for the given zero-based attempt"""
+    delay = min(_RETRY_MAX_DELAY, _RETRY_BASE_DELAY * 2 ** attempt)
+    return delay * (1 + random.random() * _RETRY_JITTER)
+
+
+@lru_cache(maxsize=None)
+def _base_model(api_key: str, model_name: str) -> genai.GenerativeModel:
+    """Configure the client and build the plain model once per key and model for the process"""
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(model_name)
+
+
+class _AsyncTokenBucket:
+    """Token-bucket limiter for coroutines; refills at rate/period and allows bursts up to capacity"""
+
+    def __init__(self, rate: float, period: float, capacity: float):
+        self._fill_rate = rate / period
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+
+    async def acquire(self):
+        """Wait until a token is available and consume it"""
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._fill_rate)
+            self._updated_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self._fill_rate)
+
+
+class EnhancedGeminiService(LoggerMixin):
+    """Enhanced service for interacting with Google Gemini AI for lead analysis"""
+
+    def __init__(self):
+        self.config = get_config().gemini
+        self.lead_config = get_config().lead_status
+
+        if not self.config.api_key:
+            raise ValidationError("Gemini API key is required")
+
+        try:
+            # Configure Gemini AI; analyzers rebuilt by the schedulers share the configured model
+            self.model = _base_model(self.config.api_key, self.config.model_name)
+
+            self.log_service_action("EnhancedGeminiService", "init",
+                                    "Initialized Enhanced Gemini AI with model %s", self.config.model_name)
+
+        except Exception as e:
+            raise AIAnalysisError(f"Failed to initialize Gemini AI: {e}")
+
+        self._prompt_cache: OrderedDict[Tuple[str, int, str], str] = OrderedDict()
+        self._prompt_cache_lock = threading.Lock()
+
+        self._result_cache: OrderedDict[str, Tuple[float, AIAnalysisResult]] = OrderedDict()
+        self._result_cache_lock = threading.Lock()
+
+        # Health probe results, reused for a short while to spare the API
+        self._connection_ok: Optional[bool] = None
+        self._connection_checked_at = 0.0
+        self._stats_cache: Optional[Dict[str, Any]] = None
+        self._stats_cached_at = 0.0
+
+        # Shared across batches so the quota holds for the service as a whole
+        self._rate_limiter = _AsyncTokenBucket(self.config.requests_per_minute, 60.0,
+                                               capacity=self.config.max_concurrency)
+
+        # Analysis model carrying the static instructions as its system instruction, created lazily
+        self._analysis_model = None
+        self._analysis_model_lock = threading.Lock()
+
+    def _get_analysis_model(self):
+        """Return the analysis model, creating it on first use"""
+        with self._analysis_model_lock:
+            if self._analysis_model is None:
+                self._analysis_model = genai.GenerativeModel(
+                    self.config.model_name,
+                    system_instruction=_STATIC_INSTRUCTIONS
+                )
+            return self._analysis_model
+
+    def _get_prompt(self, transcription: str, junk_status: int, status_name: str) -> str:
+        """Return a cached prompt for this transcription/status, building it on first use"""
+        key = (transcription, junk_status, status_name)
+        with self._prompt_cache_lock:
+            prompt = self._prompt_cache.get(key)
+            if prompt is not None:
+                self._prompt_cache.move_to_end(key)
+                return prompt
+
+        prompt = self._build_enhanced_analysis_prompt(transcription, junk_status, status_name)
+
+        with self._prompt_cache_lock:
+            self._prompt_cache[key] = prompt
+            if len(self._prompt_cache) > _PROMPT_CACHE_SIZE:
+                self._prompt_cache.popitem(last=False)
+        return prompt
+
+    @staticmethod
+    def _result_cache_key(transcription: str, junk_status: int) -> str:
+        """Key a transcription/status pair without holding the full text"""
+        digest = hashlib.blake2b(transcription.encode(), digest_size=16).hexdigest()
+        return f"{digest}:{junk_status}"
+
+    def _get_cached_result(self, key: str) -> Optional[AIAnalysisResult]:
+        """Return a copy of a fresh cached result, dropping it if expired"""
+        with self._result_cache_lock:
+            entry = self._result_cache.get(key)
+            if entry is None:
+                return None
+            stored_at, result = entry
+            if time.monotonic() - stored_at > _RESULT_CACHE_TTL:
+                del self._result_cache[key]
+                return None
+            self._result_cache.move_to_end(key)
+        return dataclasses.replace(result)
+
+    def _store_cached_result(self, key: str, result: AIAnalysisResult):
+        """Remember a successful result, evicting the least recently used"""
+        with self._result_cache_lock:
+            self._result_cache[key] = (time.monotonic(), dataclasses.replace(result))
+            self._result_cache.move_to_end(key)
+            if len(self._result_cache) > _RESULT_CACHE_SIZE:
+                self._result_cache.popitem(last=False)
+
+    def _precheck(self, transcription: str, current_junk_status: int) -> Optional[AIAnalysisResult]:
+        """Return an early result for invalid input or a cache hit, None if the model must be called"""
+        if not transcription.strip():
+            return AIAnalysisResult(
+                is_suitable=False,
+                error="Empty transcription provided"
+            )
+
+        # Validate junk status
+        if current_junk_status not in JUNK_STATUSES:
+            return AIAnalysisResult(
+                is_suitable=False,
+                error=f"Unknown junk status: {current_junk_status}"
+            )
+
+        # Too little speech to contradict the current status; keep it without a model call
+        if len(transcription.split()) < _MIN_TRANSCRIPTION_WORDS:
+            return AIAnalysisResult(
+                is_suitable=True,
+                reasoning="Yozuv juda qisqa, holatni o'zgartirish uchun ma'lumot yetarli emas.",
+                processing_time=0.0
+            )
+
+        cached = self._get_cached_result(self._result_cache_key(transcription, current_junk_status))
+        if cached is not None:
+            self.logger.debug("Reusing cached analysis for junk status %s", current_junk_status)
+        return cached
+
+    def _finish_analysis(self, response_text: Optional[str], start_time: float,
+                         transcription: str, current_junk_status: int) -> AIAnalysisResult:
+        """Parse the model output into a result and remember it"""
+        if not response_text:
+            return AIAnalysisResult(
+                is_suitable=False,
+                error="No response from Gemini AI"
+            )
+
+        processing_time = time.time() - start_time
+
+        # Parse response with enhanced logic
+        is_suitable, reasoning, alternative_status = self._parse_enhanced_response(response_text.strip())
+
+        self.logger.info("Enhanced Gemini analysis completed in %.2fs: suitable=%s", processing_time, is_suitable)
+
+        if alternative_status:
+            self.logger.info("Alternative status suggested: %s", alternative_status)
+
+        result = AIAnalysisResult(
+            is_suitable=is_suitable,
+            reasoning=reasoning,
+            model_used=self.config.model_name,
+            processing_time=processing_time,
+            alternative_status=alternative_status
+        )
+        self._store_cached_result(self._result_cache_key(transcription, current_junk_status), result)
+        return result
+
+    def _with_retries(self, call):
+        """Run a Gemini call, retrying only transient errors with jittered backoff"""
+        for attempt in range(self.config.max_retries):
+            try:
+                return call()
+            except _RETRYABLE_ERRORS as e:
+                self.logger.warning("Gemini API attempt %s failed: %s", attempt + 1, e)
+                if attempt == self.config.max_retries - 1:
+                    raise
+                time.sleep(_backoff_delay(attempt))
+        return None
+
+    def _generate_text(self, model, prompt: str) -> Optional[str]:
+        """Run one JSON-mode generation and return the raw response text"""
+        response = model.generate_content(prompt, generation_config=_GENERATION_CONFIG)
+        return response.text if response else None
+
+    def analyze_lead_status(self, transcription: str, current_junk_status: int,
+                            status_name: str) -> AIAnalysisResult:
+        """Analyze if junk status is suitable based on transcription with enhanced prompting"""
+        try:
+            early = self._precheck(transcription, current_junk_status)
+            if early is not None:
+                return early
+
+            start_time = time.time()
+
+            # Build enhanced prompt based on status
+            prompt = self._get_prompt(transcription, current_junk_status, status_name)
+
+            self.logger.debug("Analyzing junk status %s with Enhanced Gemini AI", current_junk_status)
+
+            model = self._get_analysis_model()
+
+            # Make request to Gemini with retry logic
+            response_text = self._with_retries(lambda: self._generate_text(model, prompt))
+
+            return self._finish_analysis(response_text, start_time, transcription, current_junk_status)
+
+        except Exception as e:
+            self.logger.error("Error in Enhanced Gemini analysis: %s", e)
+            return AIAnalysisResult(
+                is_suitable=False,
+                error=str(e)
+            )
+
+    def analyze_lead_status_stream(self, transcription: str, current_junk_status: int, status_name: str,
+                                   on_decision: Callable[[bool, Optional[int]], None]) -> AIAnalysisResult:
+        """Streaming variant of analyze_lead_status.
+
+        on_decision(is_suitable, alternative_status) is called as soon as both fields have streamed in,
+        before the reasons finish generating. It is not called for prechecked or cached results.
+        """
+        try:
+            early = self._precheck(transcription, current_junk_status)
+            if early is not None:
+                return early
+
+            start_time = time.time()
+            prompt = self._get_prompt(transcription, current_junk_status, status_name)
+
+            self.logger.debug("Streaming analysis of junk status %s with Enhanced Gemini AI", current_junk_status)
+
+            model = self._get_analysis_model()
+
+            # Only opening the stream is retried; once tokens arrive the decision may already be acted on
+            response = self._with_retries(
+                lambda: model.generate_content(prompt, generation_config=_GENERATION_CONFIG, stream=True)
+            )
+
+            received = []
+            decided = False
+            for chunk in response:
+                if not chunk.parts:
+                    continue
+                received.append(chunk.text)
+
+                if not decided:
+                    decision = self._scan_stream_decision("".join(received))
+                    if decision is not None:
+                        decided = True
+                        on_decision(*decision)
+
+            return self._finish_analysis("".join(received), start_time, transcription, current_junk_status)
+
+        except Exception as e:
+            self.logger.error("Error in Enhanced Gemini analysis: %s", e)
+            return AIAnalysisResult(
+                is_suitable=False,
+                error=str(e)
+            )
+
+    @staticmethod
+    def _scan_stream_decision(partial_text: str) -> Optional[Tuple[bool, Optional[int]]]:
+        """Extract (is_suitable, alternative_status) from a partial JSON answer once both are complete"""
+        is_suitable_match = _STREAM_IS_SUITABLE_RE.search(partial_text)
+        alternative_match = _STREAM_ALTERNATIVE_STATUS_RE.search(partial_text)
+        if is_suitable_match is None or alternative_match is None:
+            return None
+
+        # Same normalization as _unpack_result
+        alternative_status = None if alternative_match.group(1) == 'null' else int(alternative_match.group(1))
+        if alternative_status not in JUNK_STATUSES:
+            alternative_status = None
+
+        return is_suitable_match.group(1) == 'true', alternative_status
+
+    def open_rest_session(self) -> aiohttp.ClientSession:
+        """Create a keep-alive HTTP session for the REST generateContent endpoint"""
+        connector = aiohttp.TCPConnector(limit=self.config.max_concurrency, keepalive_timeout=_REST_KEEPALIVE_SECONDS)
+        return aiohttp.ClientSession(
+            connector=connector,
+            headers={'x-goog-api-key': self.config.api_key},
+            timeout=aiohttp.ClientTimeout(total=self.config.timeout_seconds)
+        )
+
+    def _rest_payload(self, prompt: str,
+                      generation_config: Dict[str, Any] = _REST_GENERATION_CONFIG) -> Dict[str, Any]:
+        """Build a generateContent request body carrying the static system instruction"""
+        return {
+            'systemInstruction': {'parts': [{'text': _STATIC_INSTRUCTIONS}]},
+            'contents': [{'role': 'user', 'parts': [{'text': prompt}]}],
+            'generationConfig': generation_config,
+        }
+
+    async def _generate_rest(self, session: aiohttp.ClientSession, prompt: str,
+                             generation_config: Dict[str, Any] = _REST_GENERATION_CONFIG) -> Optional[str]:
+        """POST a prompt to generateContent with retry logic and return the response text"""
+        model_name = self.config.model_name
+        if not model_name.startswith('models/'):
+            model_name = f"models/{model_name}"
+        url = f"{_REST_BASE_URL}/{model_name}:generateContent"
+        # Encoded once; retries resend the same request bytes
+        body = _json_dumps(self._rest_payload(prompt, generation_config))
+
+        for attempt in range(self.config.max_retries):
+            try:
+                await self._rate_limiter.acquire()
+                async with session.post(url, data=body, headers=_REST_JSON_HEADERS) as response:
+                    if response.status >= 400 and response.status not in _RETRYABLE_HTTP_STATUSES:
+                        raise AIAnalysisError(f"Gemini API error {response.status}: {await response.text()}")
+                    response.raise_for_status()
+                    data = await response.json()
+
+                parts = data['candidates'][0]['content']['parts']
+                return "".join(part.get('text', '') for part in parts)
+
+            except _RETRYABLE_REST_ERRORS as e:
+                self.logger.warning("Gemini API attempt %s failed: %s", attempt + 1, e)
+                if attempt == self.config.max_retries - 1:
+                    raise
+                await asyncio.sleep(_backoff_delay(attempt))
+
+        return None
+
+    async def analyze_lead_status_async(self, session: aiohttp.ClientSession, transcription: str,
+                                        current_junk_status: int, status_name: str) -> AIAnalysisResult:
+        """Async variant of analyze_lead_status issuing the request over a shared HTTP session"""
+        try:
+            early = self._precheck(transcription, current_junk_status)
+            if early is not None:
+                return early
+
+            start_time = time.time()
+            prompt = self._get_prompt(transcription, current_junk_status, status_name)
+
+            self.logger.debug("Analyzing junk status %s with Enhanced Gemini AI", current_junk_status)
+
+            response_text = await self._generate_rest(session, prompt)
+            return self._finish_analysis(response_text, start_time, transcription, current_junk_status)
+
+        except Exception as e:
+            self.logger.error("Error in Enhanced Gemini analysis: %s", e)
+            return AIAnalysisResult(
+                is_suitable=False,
+                error=str(e)
+            )
+
+    def _build_enhanced_analysis_prompt(self, transcription: str, junk_status: int, status_name: str) -> str:
+        """Build enhanced analysis prompt that checks current status and suggests alternative if unsuitable"""
+        specific_prompt = _SPECIFIC_PROMPTS.get(junk_status)
+        if specific_prompt is None:
+            specific_prompt = _DEFAULT_SPECIFIC_PROMPT.format(status_name=status_name)
+
+        return _ANALYSIS_PROMPT_TEMPLATE.format(
+            status_name=status_name,
+            junk_status=junk_status,
+            transcription=transcription,
+            specific_prompt=specific_prompt
+        )
 
     def _parse_enhanced_response(self, response_text: str) -> tuple[bool, Optional[str], Optional[int]]:
-        """Parse enhanced AI response to extract decision, reasoning, and alternative status"""
-        lines = response_text.strip().split('\n')
-
-        # Initialize variables
-        is_suitable = None
-        alternative_status = None
-        decision_reasons = []
-        explanation = ""
-        current_section = None
-
-        # Parse the structured response
-        for line in lines:
-            line_stripped = line.strip()
-            line_lower = line_stripped.lower()
-
-            # Skip empty lines
-            if not line_stripped:
-                continue
+        """Parse the JSON AI response to extract decision, reasoning, and alternative status"""
+        try:
+            data = _json_loads(response_text)
+        except json.JSONDecodeError as e:
+            raise AIAnalysisError(f"Invalid JSON from Gemini AI: {e}")
 
-            # Identify sections
-            if line_lower.startswith('qaror:') or line_lower.startswith('decision:'):
-                # Extract decision from this line
-                decision_part = line_stripped.split(':', 1)[1].strip().lower()
-                if 'true' in decision_part and 'false' not in decision_part:
-                    is_suitable = True
-                elif 'false' in decision_part and 'true' not in decision_part:
-                    is_suitable = False
-                current_section = 'decision'
-
-            elif line_lower.startswith('alternative_status:') or line_lower.startswith('alternative:'):
-                # Extract alternative status code
-                status_part = line_stripped.split(':', 1)[1].strip()
-                # Look for numeric status code
-                import re
-                numbers = re.findall(r'\b(227|229|783|807)\b', status_part)
-                if numbers:
-                    try:
-                        alternative_status = int(numbers[0])
-                    except ValueError:
-                        pass
-                current_section = 'alternative'
-
-            elif line_lower.startswith('sabablari:') or line_lower.startswith('reasons:'):
-                current_section = 'reasons'
-
-            elif line_lower.startswith('tushuntirish:') or line_lower.startswith('explanation:'):
-                current_section = 'explanation'
-
-            # Process content based on current section
-            elif current_section == 'reasons':
-                # Look for bullet points
-                if line_stripped.startswith('-') or line_stripped.startswith('•') or line_stripped.startswith('*'):
-                    reason = line_stripped[1:].strip()
-                    if reason:
-                        decision_reasons.append(reason)
-
-            elif current_section == 'explanation':
-                if not any(line_lower.startswith(prefix) for prefix in ['qaror:', 'sabablari:', 'alternative_status:']):
-                    explanation += line_stripped + " "
-
-            # Fallback: look for standalone true/false
-            elif line_lower == 'true':
-                is_suitable = True
-            elif line_lower == 'false':
-                is_suitable = False
-
-        # If no structured format found, try simple parsing
-        if is_suitable is None:
-            response_clean = response_text.strip().lower()
-            if 'true' in response_clean and 'false' not in response_clean:
-                is_suitable = True
-            elif 'false' in response_clean and 'true' not in response_clean:
-                is_suitable = False
-            else:
-                # Default to false if unclear
-                self.logger.warning(f"Unclear AI response: '{response_text}', defaulting to False")
-                is_suitable = False
+        return self._unpack_result(data)
+
+    def _unpack_result(self, data: Dict[str, Any]) -> tuple[bool, Optional[str], Optional[int]]:
+        """Turn one decoded result object into (is_suitable, reasoning, alternative_status)"""
+        is_suitable = data.get('is_suitable')
+        if not isinstance(is_suitable, bool):
+            raise AIAnalysisError(f"Missing is_suitable in Gemini response: {data}")
 
-        # Build detailed reasoning string
-        detailed_reasoning = ""
+        alternative_status = data.get('alternative_status')
+        if alternative_status not in JUNK_STATUSES:
+            alternative_status = None
+
+        reasons = [reason.strip() for reason in data.get('reasons') or [] if reason and reason.strip()]
+        detailed_reasoning = self._format_reasoning(is_suitable, alternative_status, reasons,
+                                                    (data.get('explanation') or "").strip())
+
+        return is_suitable, detailed_reasoning if detailed_reasoning else None, alternative_status
+
+    @staticmethod
+    def _format_reasoning(is_suitable: bool, alternative_status: Optional[int],
+                          decision_reasons: List[str], explanation: str) -> str:
+        """Build the human-readable reasoning text stored on the lead"""
+        parts: List[str] = []
 
         if not is_suitable and decision_reasons:
             # Status is not suitable and no alternative suggested
-            detailed_reasoning = "Holat noto'g'ri deb topilgan sabablari:\n"
-            for i, reason in enumerate(decision_reasons, 1):
-                detailed_reasoning += f"• {reason}\n"
+            parts.append("Holat noto'g'ri deb topilgan sabablari:")
+            parts.extend(f"• {reason}" for reason in decision_reasons)
 
-            if explanation.strip():
-                detailed_reasoning += f"\nQo'shimcha tushuntirish: {explanation.strip()}"
+            if explanation:
+                parts.append(f"\nQo'shimcha tushuntirish: {explanation}")
 
         elif is_suitable and alternative_status and decision_reasons:
             # Current status not suitable but alternative found
-            status_names = {
-                227: "Notog'ri raqam",
-                229: "Ariza qoldirmagan",
-                783: "Notog'ri mijoz",
-                807: "Yoshi to'g'ri kelmadi"
-            }
-            alt_status_name = status_names.get(alternative_status, f"Status {alternative_status}")
+            alt_status_name = JUNK_STATUSES.get(alternative_status, f"Status {alternative_status}")
 
-            detailed_reasoning = f"Hozirgi holat o'rniga '{alt_status_name}' ({alternative_status}) holati ko'proq mos keladi.\n"
-            detailed_reasoning += "Sabablari:\n"
-            for i, reason in enumerate(decision_reasons, 1):
-                detailed_reasoning += f"• {reason}\n"
+            parts.append(f"Hozirgi holat o'rniga '{alt_status_name}' ({alternative_status}) holati ko'proq mos keladi.")
+            parts.append("Sabablari:")
+            parts.extend(f"• {reason}" for reason in decision_reasons)
 
-            if explanation.strip():
-                detailed_reasoning += f"\nTushuntirish: {explanation.strip()}"
+            if explanation:
+                parts.append(f"\nTushuntirish: {explanation}")
 
         elif is_suitable and decision_reasons:
             # Status is suitable
-            detailed_reasoning = "Holat to'g'ri deb tasdiqlandi.\n"
-            detailed_reasoning += "Tasdiqlovchi dalillar:\n"
-            for reason in decision_reasons:
-                detailed_reasoning += f"• {reason}\n"
+            parts.append("Holat to'g'ri deb tasdiqlandi.")
+            parts.append("Tasdiqlovchi dalillar:")
+            parts.extend(f"• {reason}" for reason in decision_reasons)
 
-            if explanation.strip():
-                detailed_reasoning += f"\nTushuntirish: {explanation.strip()}"
+            if explanation:
+                parts.append(f"\nTushuntirish: {explanation}")
 
         elif not is_suitable and not decision_reasons:
             # No specific reasons provided
-            detailed_reasoning = "Holat noto'g'ri deb topildi, lekin batafsil sabab ko'rsatilmagan."
+            parts.append("Holat noto'g'ri deb topildi, lekin batafsil sabab ko'rsatilmagan.")
+
+        return "\n".join(parts)
+
+    def _build_group_prompt(self, group: List[Tuple[int, str, int, str]]) -> str:
+        """Build one prompt covering several leads, with each status's task text included once"""
+        parts: List[str] = []
+        for index, transcription, junk_status, status_name in group:
+            parts.append(_GROUP_LEAD_TEMPLATE.format(index=index, status_name=status_name,
+                                                     junk_status=junk_status, transcription=transcription))
+
+        seen_statuses = set()
+        for _, _, junk_status, status_name in group:
+            if junk_status not in seen_statuses:
+                seen_statuses.add(junk_status)
+                parts.append(_SPECIFIC_PROMPTS.get(junk_status)
+                             or _DEFAULT_SPECIFIC_PROMPT.format(status_name=status_name))
+
+        parts.append(_GROUP_ANSWER_INSTRUCTIONS)
+        return "\n".join(parts)
+
+    @staticmethod
+    def _split_into_groups(items: List[Tuple[int, str, int, str]]) -> List[List[Tuple[int, str, int, str]]]:
+        """Pack leads into groups bounded by lead count and transcription size"""
+        groups: List[List[Tuple[int, str, int, str]]] = []
+        current: List[Tuple[int, str, int, str]] = []
+        current_chars = 0
+        for item in items:
+            size = len(item[1])
+            if current and (len(current) >= _GROUP_MAX_LEADS or current_chars + size > _GROUP_CHAR_BUDGET):
+                groups.append(current)
+                current, current_chars = [], 0
+            current.append(item)
+            current_chars += size
+        if current:
+            groups.append(current)
+        return groups
+
+    def _analyze_group(self, group: List[Tuple[int, str, int, str]]) -> Dict[int, AIAnalysisResult]:
+        """Analyze a group of leads in a single JSON-mode request; missing entries are left out"""
+        start_time = time.time()
+        model = self._get_analysis_model()
+        prompt = self._build_group_prompt(group)
+
+        response = self._with_retries(
+            lambda: model.generate_content(prompt, generation_config=_GROUP_GENERATION_CONFIG)
+        )
+
+        return self._group_results(group, response.text if response else None, start_time)
+
+    async def _analyze_group_async(self, session: aiohttp.ClientSession,
+                                   group: List[Tuple[int, str, int, str]]) -> Dict[int, AIAnalysisResult]:
+        """Async variant of _analyze_group issuing the request over a shared HTTP session"""
+        start_time = time.time()
+        response_text = await self._generate_rest(session, self._build_group_prompt(group),
+                                                  _REST_GROUP_GENERATION_CONFIG)
+        return self._group_results(group, response_text, start_time)
+
+    def _group_results(self, group: List[Tuple[int, str, int, str]], response_text: Optional[str],
+                       start_time: float) -> Dict[int, AIAnalysisResult]:
+        """Parse a grouped JSON answer into results by lead index and remember them"""
+        entries = _json_loads(response_text) if response_text else []
+        processing_time = (time.time() - start_time) / len(group)
+
+        by_index = {index: (transcription, junk_status) for index, transcription, junk_status, _ in group}
+        results: Dict[int, AIAnalysisResult] = {}
+        for entry in entries:
+            index = entry.get('index')
+            if index not in by_index or index in results:
+                continue
+            try:
+                is_suitable, reasoning, alternative_status = self._unpack_result(entry)
+            except AIAnalysisError as e:
+                self.logger.warning("Skipping malformed grouped result #%s: %s", index, e)
+                continue
+            result = AIAnalysisResult(
+                is_suitable=is_suitable,
+                reasoning=reasoning,
+                model_used=self.config.model_name,
+                processing_time=processing_time,
+                alternative_status=alternative_status
+            )
+            transcription, junk_status = by_index[index]
+            self._store_cached_result(self._result_cache_key(transcription, junk_status), result)
+            results[index] = result
 
-        return is_suitable, detailed_reasoning if detailed_reasoning else None, alternative_status
+        return results
 
-    def analyze_batch_leads(self, lead_transcriptions: List[Dict]) -> List[AIAnalysisResult]:
-        """Analyze multiple leads in batch with rate limiting"""
-        results = []
+    def analyze_leads_grouped(self, lead_transcriptions: List[Dict]) -> List[AIAnalysisResult]:
+        """Analyze leads several per request using JSON structured output.
 
-        self.logger.info(f"Starting batch analysis of {len(lead_transcriptions)} leads")
+        Leads the model skips in its answer, or whose group request fails,
+        are re-analyzed individually.
+        """
+        results, pending = self._grouped_pending(lead_transcriptions)
+        groups = self._split_into_groups(pending)
+        self.logger.info("Starting grouped analysis of %s leads in %s requests", len(pending), len(groups))
 
-        for i, lead_data in enumerate(lead_transcriptions):
+        for group in groups:
             try:
-                transcription = lead_data.get('transcription', '')
-                junk_status = lead_data.get('junk_status')
-                status_name = lead_data.get('status_name', 'Unknown')
+                group_results = self._analyze_group(group)
+            except Exception as e:
+                self.logger.warning("Grouped analysis failed, falling back to per-lead requests: %s", e)
+                group_results = {}
 
-                result = self.analyze_lead_status(transcription, junk_status, status_name)
-                results.append(result)
+            for index, transcription, junk_status, status_name in group:
+                result = group_results.get(index)
+                if result is None:
+                    result = self.analyze_lead_status(transcription, junk_status, status_name)
+                results[index] = result
 
-                # Rate limiting between requests
-                time.sleep(0.5)
+        successful = sum(1 for r in results if r.is_successful)
+        self.logger.info("Grouped analysis completed: %s/%s successful", successful, len(results))
 
-                if (i + 1) % 10 == 0:
-                    self.logger.info(f"Processed {i + 1}/{len(lead_transcriptions)} leads")
+        return results
 
-            except Exception as e:
-                self.logger.error(f"Error in batch analysis item {i}: {e}")
-                results.append(AIAnalysisResult(
-                    is_suitable=False,
-                    error=str(e)
-                ))
+    async def analyze_leads_grouped_async(self, session: aiohttp.ClientSession,
+                                          lead_transcriptions: List[Dict]) -> List[AIAnalysisResult]:
+        """Async variant of analyze_leads_grouped; the group requests run concurrently"""
+        results, pending = self._grouped_pending(lead_transcriptions)
+        groups = self._split_into_groups(pending)
+        self.logger.info("Starting grouped analysis of %s leads in %s requests", len(pending), len(groups))
+
+        group_results = await asyncio.gather(
+            *(self._analyze_group_async(session, group) for group in groups), return_exceptions=True
+        )
+
+        fallbacks: List[Tuple[int, str, int, str]] = []
+        for group, grouped in zip(groups, group_results):
+            if isinstance(grouped, BaseException):
+                self.logger.warning("Grouped analysis failed, falling back to per-lead requests: %s", grouped)
+                grouped = {}
+            for item in group:
+                result = grouped.get(item[0])
+                if result is None:
+                    fallbacks.append(item)
+                else:
+                    results[item[0]] = result
+
+        fallback_results = await asyncio.gather(*(
+            self.analyze_lead_status_async(session, transcription, junk_status, status_name)
+            for _, transcription, junk_status, status_name in fallbacks
+        ))
+        for (index, _, _, _), result in zip(fallbacks, fallback_results):
+            results[index] = result
 
         successful = sum(1 for r in results if r.is_successful)
-        self.logger.info(f"Batch analysis completed: {successful}/{len(results)} successful")
+        self.logger.info("Grouped analysis completed: %s/%s successful", successful, len(results))
 
         return results
 
+    def _grouped_pending(self, lead_transcriptions: List[Dict]
+                         ) -> Tuple[List[Optional[AIAnalysisResult]], List[Tuple[int, str, int, str]]]:
+        """Resolve leads answerable without the model; return the partial results and the rest to send"""
+        results: List[Optional[AIAnalysisResult]] = [None] * len(lead_transcriptions)
+        pending: List[Tuple[int, str, int, str]] = []
+
+        for i, lead_data in enumerate(lead_transcriptions):
+            transcription = lead_data.get('transcription', '')
+            junk_status = lead_data.get('junk_status')
+            status_name = lead_data.get('status_name', 'Unknown')
+            early = self._precheck(transcription, junk_status)
+            if early is not None:
+                results[i] = early
+            else:
+                pending.append((i, transcription, junk_status, status_name))
+
+        return results, pending
+
+    def analyze_batch_leads(self, lead_transcriptions: List[Dict]) -> List[AIAnalysisResult]:
+        """Analyze multiple leads in batch with bounded concurrency"""
+        return asyncio.run(self.analyze_batch_leads_async(lead_transcriptions))
+
+    async def analyze_batch_leads_async(self, lead_transcriptions: List[Dict]) -> List[AIAnalysisResult]:
+        """Analyze multiple leads concurrently, capped at max_concurrency in-flight requests"""
+        total = len(lead_transcriptions)
+        semaphore = asyncio.Semaphore(self.config.max_concurrency)
+        completed = 0
+
+        self.logger.info("Starting batch analysis of %s leads", total)
+
+        async def _analyze_one(i: int, lead_data: Dict) -> AIAnalysisResult:
+            nonlocal completed
+            async with semaphore:
+                try:
+                    transcription = lead_data.get('transcription', '')
+                    junk_status = lead_data.get('junk_status')
+                    status_name = lead_data.get('status_name', 'Unknown')
+
+                    result = await self.analyze_lead_status_async(
+                        session, transcription, junk_status, status_name
+                    )
+
+                except Exception as e:
+                    self.logger.error("Error in batch analysis item %s: %s", i, e)
+                    result = AIAnalysisResult(
+                        is_suitable=False,
+                        error=str(e)
+                    )
+
+            completed += 1
+            if completed % 10 == 0:
+                self.logger.info("Processed %s/%s leads", completed, total)
+
+            return result
+
+        # One pooled session per batch so requests reuse warm connections
+        async with self.open_rest_session() as session:
+            results = await asyncio.gather(
+                *(_analyze_one(i, lead_data) for i, lead_data in enumerate(lead_transcriptions))
+            )
+
+        successful = sum(1 for r in results if r.is_successful)
+        self.logger.info("Batch analysis completed: %s/%s successful", successful, len(results))
+
+        return list(results)
+
     def test_connection(self) -> bool:
+        """Test connection to Gemini AI, reusing a probe result younger than the cache TTL"""
+        now = time.monotonic()
+        if self._connection_ok is not None and now - self._connection_checked_at < _CONNECTION_CACHE_TTL:
+            return self._connection_ok
+
+        self._connection_ok = self._probe_connection()
+        self._connection_checked_at = time.monotonic()
+        return self._connection_ok
+
+    def _probe_connection(self) -> bool:
         """Test connection to Gemini AI with enhanced test"""
         try:
             self.log_service_action("EnhancedGeminiService", "test_connection", "Testing Enhanced Gemini AI connection")
 
-            test_prompt = """
-Bu test so'rovidir. Iltimos, faqat "test successful" deb javob bering.
-"""
-            response = self.model.generate_content(test_prompt)
+            response = self.model.generate_content(_TEST_CONNECTION_PROMPT)
 
             if response and response.text:
                 response_clean = response.text.strip().lower()
@@ -431,7 +944,7 @@ Bu test so'rovidir. Iltimos, faqat "test successful" deb javob bering.
                     return True
                 else:
                     self.log_service_action("EnhancedGeminiService", "test_connection",
-                                          f"Unexpected response: {response.text}", level=logging.WARNING)
+                                          "Unexpected response: %s", response.text, level=logging.WARNING)
                     return True  # Still working, just unexpected response
             else:
                 self.log_service_action("EnhancedGeminiService", "test_connection", "No response from Gemini",
@@ -439,11 +952,23 @@ Bu test so'rovidir. Iltimos, faqat "test successful" deb javob bering.
                 return False
 
         except Exception as e:
-            self.log_service_action("EnhancedGeminiService", "test_connection", f"Connection failed: {e}",
+            self.log_service_action("EnhancedGeminiService", "test_connection", "Connection failed: %s", e,
                                   level=logging.ERROR)
             return False
 
     def get_analysis_statistics(self) -> Dict[str, Any]:
+        """Get analysis statistics, serving a successful lookup from cache until its TTL expires"""
+        now = time.monotonic()
+        if self._stats_cache is not None and now - self._stats_cached_at < _STATS_CACHE_TTL:
+            return dict(self._stats_cache)
+
+        stats = self._fetch_analysis_statistics()
+        if 'error' not in stats:
+            self._stats_cache = stats
+            self._stats_cached_at = time.monotonic()
+        return dict(stats)
+
+    def _fetch_analysis_statistics(self) -> Dict[str, Any]:
         """Get analysis statistics and model information"""
         try:
             # Try to get model info from Gemini API
@@ -466,13 +991,7 @@ Bu test so'rovidir. Iltimos, faqat "test successful" deb javob bering.
                 'model_info': current_model_info,
                 'timeout_seconds': self.config.timeout_seconds,
                 'max_retries': self.config.max_retries,
-                'supported_statuses': {
-                    158: "5 marta javob bermadi",
-                    227: "Notog'ri raqam",
-                    229: "Ariza qoldirmagan",
-                    783: "Notog'ri mijoz",
-                    807: "Yoshi to'g'ri kelmadi"
-                }
+                'supported_statuses': self.lead_config.junk_statuses
             }
 
         except Exception as e:
@@ -483,7 +1002,16 @@ Bu test so'rovidir. Iltimos, faqat "test successful" deb javob bering.
                 'error': str(e)
             }
 
+    async def healthcheck(self) -> Dict[str, Any]:
+        """Run the connection probe and model listing concurrently"""
+        ok, stats = await asyncio.gather(
+            asyncio.to_thread(self.test_connection),
+            asyncio.to_thread(self.get_analysis_statistics)
+        )
+        return {'ok': ok, **stats}
+
     def close(self):
         """Close the service and cleanup resources"""
-        # Gemini client doesn't need explicit cleanup
+        with self._analysis_model_lock:
+            self._analysis_model = None
         self.log_service_action("EnhancedGeminiService", "close", "Enhanced service closed")
\ No newline at end of file
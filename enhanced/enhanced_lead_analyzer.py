@@ -2,23 +2,152 @@
 Enhanced Lead Analyzer Service for Bitrix24 with improved analysis logic
 """
 
+import asyncio
+import itertools
+import json
+import struct
+import threading
 import time
+import uuid
+import zlib
+import aiohttp
 import requests
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Iterable, Iterator, Tuple, AsyncIterator
+
+try:
+    import orjson
+except ImportError:  # optional, faster JSON decoding
+    orjson = None
 
 from app.config import get_config
 from app.logger import LoggerMixin
-from app.models.lead import Lead, LeadFilter
+from app.models.lead import JUNK_STATUS_IDS, JUNK_STATUS_NAMES, Lead, LeadFilter, LeadActivity
 from app.models.analysis_result import (
     LeadAnalysisResult, BatchAnalysisResult, AnalysisAction, AnalysisReason,
-    TranscriptionResult
+    TranscriptionResult, AIAnalysisResult
 )
 from app.services.bitrix_service import BitrixService
 from app.services.gemini_service import GeminiService
+from app.services.transcription_cache import TranscriptionCache
 from app.utils.exceptions import LeadAnalyzerError, ValidationError
+from app.utils.health import run_health_probes
 from enhanced.enhanced_gemini import EnhancedGeminiService
 
+# Upper bound on recordings of one lead transcribed at the same time
+_MAX_TRANSCRIPTION_WORKERS = 8
+
+# Upper bound on recordings of all leads transcribed at the same time by the async pipeline
+_MAX_ASYNC_TRANSCRIPTIONS = 8
+
+# Canonical RIFF/WAVE header length
+_WAV_HEADER_SIZE = 44
+
+# Chunk size used when piping a recording from Bitrix to the transcription service
+_UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Warmup clip: 15 seconds of 16 kHz mono 16-bit silence
+_WARMUP_SECONDS = 15
+_WARMUP_SAMPLE_RATE = 16000
+
+# PCM audio roughly halves even at the fastest gzip level; higher levels mostly cost CPU
+_UPLOAD_GZIP_LEVEL = 1
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
+# Async pipeline connection pool: many recordings at once, but not too many per host
+_ASYNC_CONNECTION_LIMIT = 64
+_ASYNC_CONNECTION_LIMIT_PER_HOST = 16
+
+
+def _multipart_envelope(boundary: str, field: str, filename: str, content_type: str) -> Tuple[bytes, bytes]:
+    """Return the bytes before and after the file content of a single-part multipart/form-data body"""
+    opening = (
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f'Content-Type: {content_type}\r\n\r\n'
+    ).encode()
+    return opening, f'\r\n--{boundary}--\r\n'.encode()
+
+
+def _multipart_file_stream(boundary: str, field: str, filename: str, content_type: str,
+                           chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Yield a multipart/form-data body with a single file part built from byte chunks"""
+    opening, closing = _multipart_envelope(boundary, field, filename, content_type)
+    yield opening
+    for chunk in chunks:
+        if chunk:
+            yield chunk
+    yield closing
+
+
+async def _multipart_file_stream_async(boundary: str, field: str, filename: str, content_type: str,
+                                       head: bytes, chunks: AsyncIterator[bytes],
+                                       compress: bool) -> AsyncIterator[bytes]:
+    """Async variant of _multipart_file_stream, optionally gzip-compressing the body"""
+    compressor = zlib.compressobj(_UPLOAD_GZIP_LEVEL, zlib.DEFLATED, 31) if compress else None
+    opening, closing = _multipart_envelope(boundary, field, filename, content_type)
+
+    async def parts() -> AsyncIterator[bytes]:
+        yield opening
+        yield head
+        async for chunk in chunks:
+            yield chunk
+        yield closing
+
+    async for part in parts():
+        if compressor is not None:
+            part = compressor.compress(part)
+        if part:
+            yield part
+    if compressor is not None:
+        yield compressor.flush()
+
+
+def _gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Gzip-compress a byte stream chunk by chunk"""
+    compressor = zlib.compressobj(_UPLOAD_GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31 selects the gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _silent_wav(seconds: int, sample_rate: int) -> bytes:
+    """Build a 16-bit mono PCM WAV file of silence"""
+    data_size = seconds * sample_rate * 2
+    header = struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+        b'data', data_size
+    )
+    return header + bytes(data_size)
+
+
+def _wav_duration(header: bytes, content_length: Optional[int]) -> Optional[float]:
+    """Estimate a WAV recording's duration from its 44-byte header, None if it isn't a WAV"""
+    if len(header) < _WAV_HEADER_SIZE or header[0:4] != b'RIFF' or header[8:12] != b'WAVE':
+        return None
+
+    byte_rate = struct.unpack_from('<I', header, 28)[0]
+    if not byte_rate:
+        return None
+
+    data_size = None
+    if header[36:40] == b'data':
+        data_size = struct.unpack_from('<I', header, 40)[0]
+    # Streamed recorders leave the size as 0 or 0xFFFFFFFF; fall back to the HTTP length
+    if not data_size or data_size == 0xFFFFFFFF:
+        data_size = content_length - _WAV_HEADER_SIZE if content_length else None
+
+    return data_size / byte_rate if data_size is not None else None
+
 
 class EnhancedTranscriptionService(LoggerMixin):
     """Enhanced transcription service for audio analysis"""
@@ -26,81 +155,277 @@ class EnhancedTranscriptionService(LoggerMixin):
     def __init__(self):
         self.config = get_config().transcription
         self.session = requests.Session()
-        self.session.timeout = self.config.timeout_seconds
+        # Several recordings per lead go to the same service; retry its transient gateway errors.
+        # Uploads are one-shot streams, so POST is only retried before the body is sent
+        service_adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=self.config.connection_pool_size,
+            pool_block=self.config.pool_block,
+            max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount('http://', service_adapter)
+        self.session.mount('https://', service_adapter)
+
+        # Recordings of one lead come from the same host; keep those connections alive
+        self.download_session = requests.Session()
+        download_adapter = HTTPAdapter(pool_connections=10, pool_maxsize=self.config.connection_pool_size,
+                                       pool_block=self.config.pool_block)
+        self.download_session.mount('http://', download_adapter)
+        self.download_session.mount('https://', download_adapter)
+
+        self.cache = None
+        if self.config.cache_path:
+            self.cache = TranscriptionCache(self.config.cache_path, self.config.cache_ttl_hours,
+                                            self.config.cache_max_entries)
+
+        self._warmup_audio: Optional[bytes] = None
+        # Monotonic time of the last request the backend answered; None until the first one
+        self._last_request_at: Optional[float] = None
+
+        # Shared by every lead of an async batch; rebuilt for each event loop it is used on
+        self._async_slots: Optional[asyncio.Semaphore] = None
+        self._async_slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
         self.log_service_action("EnhancedTranscriptionService", "init", "Initialized enhanced transcription service")
 
+    @staticmethod
+    def _analyze_url(language: str) -> str:
+        """URL of the transcription service's /analyze endpoint"""
+        return f"http://127.0.0.1:8101/analyze?language={language}"
+
+    def _post_audio(self, chunks: Iterable[bytes], language: str) -> Dict[str, Any]:
+        """Stream WAV bytes to the /analyze endpoint and return the decoded JSON"""
+        url = self._analyze_url(language)
+        boundary = uuid.uuid4().hex
+
+        body = _multipart_file_stream(boundary, 'file', 'audio.wav', 'audio/wav', chunks)
+        headers = {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+        if self.config.compress_uploads:
+            body = _gzip_stream(body)
+            headers['Content-Encoding'] = 'gzip'
+
+        response = self.session.post(
+            url,
+            data=body,
+            headers=headers,
+            timeout=self.config.timeout_seconds
+        )
+        response.raise_for_status()
+        self._last_request_at = time.monotonic()
+        return _json_loads(response.content)
+
+    def idle_seconds(self) -> Optional[float]:
+        """Seconds since the backend last answered a request, or None if it has not been used yet"""
+        if self._last_request_at is None:
+            return None
+        return time.monotonic() - self._last_request_at
+
+    def warmup(self) -> bool:
+        """Send a short silent clip so the ASR backend loads its models before the first real recording"""
+        if self._warmup_audio is None:
+            self._warmup_audio = _silent_wav(_WARMUP_SECONDS, _WARMUP_SAMPLE_RATE)
+
+        start_time = time.monotonic()
+        try:
+            self._post_audio([self._warmup_audio], "uz")
+        except Exception as e:
+            self.logger.warning("Transcription service warmup failed: %s", e)
+            return False
+
+        self.log_service_action("EnhancedTranscriptionService", "warmup",
+                                "Warmed up in %.2fs", time.monotonic() - start_time)
+        return True
+
     def analyze_audio(self, audio_url: str, language: str = "uz") -> Dict[str, Any]:
         """
         Send audio to transcription service and get detailed analysis
         """
         try:
-            self.logger.info(f"Analyzing audio from URL: {audio_url}")
+            self.logger.info("Analyzing audio from URL: %s", audio_url)
+
+            # Pipe the download straight into the upload instead of buffering the whole file
+            with self.download_session.get(audio_url, stream=True, timeout=30) as audio_response:
+                audio_response.raise_for_status()
 
-            # Download audio file first
-            audio_response = requests.get(audio_url, timeout=30)
-            audio_response.raise_for_status()
+                # Peek at the header so dead-air and beep-only recordings skip the ASR call
+                chunks = audio_response.iter_content(chunk_size=_UPLOAD_CHUNK_SIZE)
+                head = b''
+                for chunk in chunks:
+                    head += chunk
+                    if len(head) >= _WAV_HEADER_SIZE:
+                        break
 
-            # Prepare the request
-            url = f"http://127.0.0.1:8101/analyze?language={language}"
-            files = {
-                'file': ('audio.wav', audio_response.content, 'audio/wav')
-            }
+                content_length = audio_response.headers.get('Content-Length')
+                duration = _wav_duration(head, int(content_length) if content_length else None)
+                if duration is not None and duration < self.config.min_duration_seconds:
+                    self.logger.info("Skipping %.1fs recording: %s", duration, audio_url)
+                    return {"error": "too_short"}
 
-            # Make request to transcription service
-            response = self.session.post(url, files=files)
-            response.raise_for_status()
+                result = self._post_audio(itertools.chain([head], chunks), language)
 
-            result = response.json()
-            self.logger.info(f"Successfully analyzed audio: {audio_url}")
+            self.logger.info("Successfully analyzed audio: %s", audio_url)
 
             return result
 
         except Exception as e:
-            self.logger.error(f"Error analyzing audio {audio_url}: {e}")
+            self.logger.error("Error analyzing audio %s: %s", audio_url, e)
             return {"error": str(e)}
 
     def transcribe_url(self, audio_url: str) -> TranscriptionResult:
         """
-        Transcribe audio from URL using enhanced service
+        Transcribe audio from URL, reusing a cached transcription of the same recording
         """
-        try:
-            analysis_result = self.analyze_audio(audio_url)
+        cached = self._get_cached(audio_url)
+        if cached is not None:
+            return cached
 
-            if "error" in analysis_result:
-                return TranscriptionResult(
-                    audio_file=audio_url,
-                    transcription='',
-                    error=analysis_result["error"]
+        result = self._transcribe_url_uncached(audio_url)
+        self._store_cached(result)
+        return result
+
+    def _get_cached(self, audio_url: str) -> Optional[TranscriptionResult]:
+        """Return the cached transcription of a recording, if any"""
+        if self.cache is None:
+            return None
+
+        cached = self.cache.get(audio_url)
+        if cached is not None:
+            self.logger.info("Using cached transcription for: %s", audio_url)
+        return cached
+
+    def _store_cached(self, result: TranscriptionResult):
+        """Remember a transcription; cache failures never fail the analysis"""
+        if self.cache is None:
+            return
+
+        try:
+            self.cache.put(result)
+        except Exception as e:
+            self.logger.warning("Failed to cache transcription for %s: %s", result.audio_file, e)
+
+    def open_async_session(self) -> aiohttp.ClientSession:
+        """Create an aiohttp session for downloading recordings and calling the transcription service"""
+        connector = aiohttp.TCPConnector(limit=_ASYNC_CONNECTION_LIMIT,
+                                         limit_per_host=_ASYNC_CONNECTION_LIMIT_PER_HOST,
+                                         keepalive_timeout=self.config.keepalive_timeout_seconds)
+        return aiohttp.ClientSession(connector=connector,
+                                     timeout=aiohttp.ClientTimeout(total=self.config.timeout_seconds))
+
+    async def analyze_audio_async(self, session: aiohttp.ClientSession, audio_url: str,
+                                  language: str = "uz") -> Dict[str, Any]:
+        """Async variant of analyze_audio over a shared aiohttp session"""
+        try:
+            self.logger.info("Analyzing audio from URL: %s", audio_url)
+
+            async with session.get(audio_url) as audio_response:
+                audio_response.raise_for_status()
+
+                # Peek at the header so dead-air and beep-only recordings skip the ASR call
+                head = b''
+                while len(head) < _WAV_HEADER_SIZE:
+                    chunk = await audio_response.content.read(_WAV_HEADER_SIZE - len(head))
+                    if not chunk:
+                        break
+                    head += chunk
+
+                duration = _wav_duration(head, audio_response.content_length)
+                if duration is not None and duration < self.config.min_duration_seconds:
+                    self.logger.info("Skipping %.1fs recording: %s", duration, audio_url)
+                    return {"error": "too_short"}
+
+                boundary = uuid.uuid4().hex
+                headers = {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+                if self.config.compress_uploads:
+                    headers['Content-Encoding'] = 'gzip'
+
+                body = _multipart_file_stream_async(
+                    boundary, 'file', 'audio.wav', 'audio/wav', head,
+                    audio_response.content.iter_chunked(_UPLOAD_CHUNK_SIZE),
+                    self.config.compress_uploads
                 )
+                async with session.post(self._analyze_url(language), data=body, headers=headers) as response:
+                    response.raise_for_status()
+                    result = _json_loads(await response.read())
+                self._last_request_at = time.monotonic()
 
-            # Extract transcription from the detailed response
-            transcription_parts = []
-            if "transcription" in analysis_result:
-                for part in analysis_result["transcription"]:
-                    transcription_parts.append(f"{part['speaker']}: {part['text']}")
+            self.logger.info("Successfully analyzed audio: %s", audio_url)
+            return result
 
-            full_transcription = "\n".join(transcription_parts)
+        except Exception as e:
+            self.logger.error("Error analyzing audio %s: %s", audio_url, e)
+            return {"error": str(e)}
+
+    def _transcription_slots(self) -> asyncio.Semaphore:
+        """Return the semaphore capping in-flight transcriptions on the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._async_slots_loop is not loop:
+            self._async_slots = asyncio.Semaphore(_MAX_ASYNC_TRANSCRIPTIONS)
+            self._async_slots_loop = loop
+        return self._async_slots
+
+    async def transcribe_url_async(self, session: aiohttp.ClientSession, audio_url: str) -> TranscriptionResult:
+        """Async variant of transcribe_url"""
+        cached = self._get_cached(audio_url)
+        if cached is not None:
+            return cached
+
+        try:
+            async with self._transcription_slots():
+                analysis_result = await self.analyze_audio_async(session, audio_url)
+            result = self._to_transcription_result(audio_url, analysis_result)
+        except Exception as e:
+            self.logger.error("Error transcribing audio %s: %s", audio_url, e)
+            result = TranscriptionResult(audio_file=audio_url, transcription='', error=str(e))
 
+        self._store_cached(result)
+        return result
+
+    def _transcribe_url_uncached(self, audio_url: str) -> TranscriptionResult:
+        """
+        Transcribe audio from URL using enhanced service
+        """
+        try:
+            return self._to_transcription_result(audio_url, self.analyze_audio(audio_url))
+
+        except Exception as e:
+            self.logger.error("Error transcribing audio %s: %s", audio_url, e)
             return TranscriptionResult(
                 audio_file=audio_url,
-                transcription=full_transcription,
-                confidence=analysis_result.get("overall_performance_score", 0) / 100.0 if analysis_result.get(
-                    "overall_performance_score") else None,
-                language="uz"
+                transcription='',
+                error=str(e)
             )
 
-        except Exception as e:
-            self.logger.error(f"Error transcribing audio {audio_url}: {e}")
+    @staticmethod
+    def _to_transcription_result(audio_url: str, analysis_result: Dict[str, Any]) -> TranscriptionResult:
+        """Convert an /analyze response into a TranscriptionResult"""
+        if "error" in analysis_result:
             return TranscriptionResult(
                 audio_file=audio_url,
                 transcription='',
-                error=str(e)
+                error=analysis_result["error"]
             )
 
+        # Extract transcription from the detailed response
+        full_transcription = "\n".join(
+            f"{part['speaker']}: {part['text']}" for part in analysis_result.get("transcription", ())
+        )
+        score = analysis_result.get("overall_performance_score")
+
+        return TranscriptionResult(
+            audio_file=audio_url,
+            transcription=full_transcription,
+            confidence=score / 100.0 if score else None,
+            language="uz"
+        )
+
     def close(self):
         """Close the service"""
         if hasattr(self, 'session'):
             self.session.close()
+        if hasattr(self, 'download_session'):
+            self.download_session.close()
+        if getattr(self, 'cache', None) is not None:
+            self.cache.close()
         self.log_service_action("EnhancedTranscriptionService", "close", "Service closed")
 
 
@@ -116,22 +441,40 @@ class EnhancedLeadAnalyzerService(LoggerMixin):
         # self.gemini_service = GeminiService()
         self.gemini_service = EnhancedGeminiService()
 
+        # Leads are I/O-bound (Bitrix, downloads, ASR, Gemini), so analyze several at once
+        self._lead_pool = ThreadPoolExecutor(max_workers=self.config.scheduler.max_parallel_leads,
+                                             thread_name_prefix="lead-analyzer")
+        # Bitrix writes started while a streamed AI answer is still generating its reasons
+        self._update_pool = ThreadPoolExecutor(max_workers=self.config.scheduler.max_parallel_leads,
+                                               thread_name_prefix="lead-update")
+
         self.last_analysis_time = datetime.now() - timedelta(hours=self.config.scheduler.check_interval_hours)
 
         # Junk status definitions
-        self.junk_statuses = {
-            158: "5 marta javob bermadi",
-            227: "Notog'ri raqam",
-            229: "Ariza qoldirmagan",
-            783: "Notog'ri mijoz",
-            807: "Yoshi to'g'ri kelmadi"
-        }
+        self.junk_statuses = dict(JUNK_STATUS_NAMES)
+
+        # Optionally load the ASR models in the background so the first lead doesn't pay for it
+        self._warmup_thread: Optional[threading.Thread] = None
+        if self.config.transcription.warmup_on_startup:
+            self._warmup_thread = threading.Thread(target=self.warmup, name="transcription-warmup", daemon=True)
+            self._warmup_thread.start()
 
         self.log_service_action("EnhancedLeadAnalyzerService", "init", "Initialized enhanced lead analyzer service")
 
+    def warmup(self) -> bool:
+        """Warm up the transcription backend"""
+        return self.transcription_service.warmup()
+
+    def warmup_if_idle(self) -> bool:
+        """Warm up the transcription backend if it may have unloaded its models since it was last used"""
+        idle_seconds = self.transcription_service.idle_seconds()
+        if idle_seconds is not None and idle_seconds < self.config.transcription.warmup_idle_minutes * 60:
+            return False
+        return self.warmup()
+
     def analyze_new_leads(self, dry_run: bool = False) -> BatchAnalysisResult:
         """Analyze leads added since last check"""
-        batch_id = f"new_leads_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        batch_id = f"new_leads_{time.time_ns()}"
         batch_result = BatchAnalysisResult(batch_id=batch_id)
 
         try:
@@ -140,7 +483,7 @@ class EnhancedLeadAnalyzerService(LoggerMixin):
             # Create filter for new junk leads added since last analysis
             lead_filter = LeadFilter(
                 status_id=self.config.lead_status.junk_status_value,
-                junk_statuses=list(self.junk_statuses.keys()),
+                junk_statuses=list(JUNK_STATUS_NAMES),
                 date_from=self.last_analysis_time,
                 limit=self.config.scheduler.max_concurrent_leads
             )
@@ -153,19 +496,30 @@ class EnhancedLeadAnalyzerService(LoggerMixin):
                 batch_result.mark_completed()
                 return batch_result
 
-            self.logger.info(f"Found {len(leads)} new junk leads to analyze")
+            self.logger.info("Found %s new junk leads to analyze", len(leads))
 
-            # Analyze each lead
-            for lead in leads:
-                try:
-                    result = self._analyze_single_lead(lead, dry_run)
-                    batch_result.add_result(result)
+            # Fetch call data for the whole batch up front instead of one Bitrix request per lead
+            call_activities, call_records = self._prefetch_call_data(leads)
 
-                    # Small delay between leads to avoid overwhelming services
-                    time.sleep(self.config.scheduler.delay_between_leads)
+            # Prepare leads in parallel (call checks, transcriptions); Bitrix calls are throttled
+            # inside BitrixService. Leads needing AI come back with their combined transcription
+            futures = [
+                (lead, self._lead_pool.submit(self._prepare_single_lead, lead, dry_run,
+                                              call_activities.get(lead.id), call_records.get(lead.id)))
+                for lead in leads
+            ]
+            pending_ai = []
+
+            for lead, future in futures:
+                try:
+                    result, transcription = future.result()
+                    if transcription is None:
+                        batch_result.add_result(result)
+                    else:
+                        pending_ai.append((lead, result, transcription))
 
                 except Exception as e:
-                    self.log_lead_action(lead.id, "analyze_error", f"Error analyzing lead: {e}")
+                    self.log_lead_action(lead.id, "analyze_error", "Error analyzing lead: %s", e)
                     error_result = LeadAnalysisResult(
                         lead_id=lead.id,
                         original_status=lead.status_id,
@@ -174,15 +528,33 @@ class EnhancedLeadAnalyzerService(LoggerMixin):
                     error_result.set_error(str(e))
                     batch_result.add_result(error_result)
 
+            if pending_ai:
+                # One grouped Gemini pass for the whole batch instead of a request per lead
+                ai_results = self.gemini_service.analyze_leads_grouped([
+                    {
+                        'transcription': transcription,
+                        'junk_status': lead.junk_status,
+                        'status_name': JUNK_STATUS_NAMES.get(lead.junk_status, "Unknown")
+                    }
+                    for lead, _, transcription in pending_ai
+                ])
+
+                apply_futures = [
+                    self._lead_pool.submit(self._finish_ai_lead, lead, result, ai_result, dry_run)
+                    for (lead, result, _), ai_result in zip(pending_ai, ai_results)
+                ]
+                for future in apply_futures:
+                    batch_result.add_result(future.result())
+
             # Update last analysis time
             self.last_analysis_time = datetime.now()
             batch_result.mark_completed()
 
-            self.logger.info(f"New leads analysis completed: {batch_result.success_rate:.2f} success rate")
+            self.logger.info("New leads analysis completed: %.2f success rate", batch_result.success_rate)
             return batch_result
 
         except Exception as e:
-            self.logger.error(f"Error in new leads analysis: {e}")
+            self.logger.error("Error in new leads analysis: %s", e)
             batch_result.mark_completed()
             raise LeadAnalyzerError(f"New leads analysis failed: {e}")
 
@@ -195,10 +567,10 @@ class EnhancedLeadAnalyzerService(LoggerMixin):
         )
 
         try:
-            self.log_lead_action(lead.id, "analyze", f"Analyzing junk status {lead.junk_status}")
+            self.log_lead_action(lead.id, "analyze", "Analyzing junk status %s", lead.junk_status)
 
             # Check if lead has valid junk status
-            if lead.junk_status not in self.junk_statuses:
+            if lead.junk_status not in JUNK_STATUS_IDS:
                 result.set_action(AnalysisAction.SKIP, AnalysisReason.NOT_TARGET_STATUS)
                 result.mark_completed()
                 return result
@@ -215,26 +587,93 @@ class EnhancedLeadAnalyzerService(LoggerMixin):
             return result
 
         except Exception as e:
-            self.log_lead_action(lead.id, "analyze_error", f"Analysis error: {e}")
+            self.log_lead_action(lead.id, "analyze_error", "Analysis error: %s", e)
+            result.set_error(str(e))
+            return result
+
+    def _prefetch_call_data(self, leads: List[Lead]) -> Tuple[Dict[str, List[LeadActivity]],
+                                                             Dict[str, List[Dict[str, Any]]]]:
+        """Batch-fetch call activities for status 158 leads and Voximplant records for the rest"""
+        target_leads = [lead for lead in leads if lead.junk_status in JUNK_STATUS_IDS]
+
+        try:
+            call_activities = self.bitrix_service.batch_get_lead_activities(
+                [lead.id for lead in target_leads if lead.junk_status == 158]
+            )
+            call_records = self.bitrix_service.batch_get_voximplant_call_data(
+                [lead.id for lead in target_leads if lead.junk_status != 158]
+            )
+        except Exception as e:
+            # Leads missing from the maps fall back to per-lead requests
+            self.logger.warning("Batched call data fetch failed: %s", e)
+            return {}, {}
+
+        return call_activities, call_records
+
+    def _prepare_single_lead(self, lead: Lead, dry_run: bool = False,
+                             activities: Optional[List[LeadActivity]] = None,
+                             voximplant_data: Optional[List[Dict[str, Any]]] = None
+                             ) -> Tuple[LeadAnalysisResult, Optional[str]]:
+        """Run every step short of the AI call; returns the result and, if AI is needed, the transcription"""
+        result = LeadAnalysisResult(
+            lead_id=lead.id,
+            original_status=lead.status_id,
+            original_junk_status=lead.junk_status
+        )
+
+        try:
+            self.log_lead_action(lead.id, "analyze", "Analyzing junk status %s", lead.junk_status)
+
+            # Check if lead has valid junk status
+            if lead.junk_status not in JUNK_STATUS_IDS:
+                result.set_action(AnalysisAction.SKIP, AnalysisReason.NOT_TARGET_STATUS)
+                result.mark_completed()
+                return result, None
+
+            if lead.junk_status == 158:
+                # Status 158: "5 marta javob bermadi" - check unsuccessful calls
+                result = self._analyze_unsuccessful_calls(lead, result, dry_run, activities)
+                result.mark_completed()
+                return result, None
+
+            transcription = self._collect_transcription(lead, result, voximplant_data)
+            if transcription is None:
+                result.mark_completed()
+            return result, transcription
+
+        except Exception as e:
+            self.log_lead_action(lead.id, "analyze_error", "Analysis error: %s", e)
             result.set_error(str(e))
+            return result, None
+
+    def _finish_ai_lead(self, lead: Lead, result: LeadAnalysisResult, ai_result: AIAnalysisResult,
+                        dry_run: bool) -> LeadAnalysisResult:
+        """Apply a batched AI decision to a prepared lead"""
+        try:
+            result = self._apply_ai_result(lead, result, ai_result, dry_run)
+        except Exception as e:
+            self.logger.error("Error in AI analysis: %s", e)
+            result.set_error(f"Error in AI analysis: {e}")
             return result
 
-    def _analyze_unsuccessful_calls(self, lead: Lead, result: LeadAnalysisResult, dry_run: bool) -> LeadAnalysisResult:
+        result.mark_completed()
+        return result
+
+    def _analyze_unsuccessful_calls(self, lead: Lead, result: LeadAnalysisResult, dry_run: bool,
+                                    activities: Optional[List[LeadActivity]] = None) -> LeadAnalysisResult:
         """Analyze lead with status 158 by checking unsuccessful calls"""
         try:
-            # Get lead activities
-            activities = self.bitrix_service.get_lead_activities(lead.id)
+            # Get lead activities unless they were prefetched
+            if activities is None:
+                activities = self.bitrix_service.get_lead_activities(lead.id)
             lead.activities = activities
 
             # Count unsuccessful calls
-            unsuccessful_calls = 0
-            for activity in activities:
-                if activity.is_unsuccessful_call:
-                    unsuccessful_calls += 1
+            unsuccessful_calls = lead.unsuccessful_calls_count
 
             result.unsuccessful_calls_count = unsuccessful_calls
 
-            self.log_lead_action(lead.id, "call_analysis", f"Found {unsuccessful_calls} unsuccessful calls")
+            self.log_lead_action(lead.id, "call_analysis", "Found %s unsuccessful calls", unsuccessful_calls)
 
             if unsuccessful_calls >= 5:
                 # Keep current junk status - sufficient unsuccessful calls
@@ -268,150 +707,208 @@ class EnhancedLeadAnalyzerService(LoggerMixin):
                                        dry_run: bool) -> LeadAnalysisResult:
         """Analyze lead using AI with enhanced transcription and alternative status checking"""
         try:
-            # Get audio files from Voximplant
-            voximplant_data = self.bitrix_service.get_voximplant_call_data(lead.id)
-
-            audio_files = []
-            for call_data in voximplant_data:
-                # Extract audio file URL from call data
-                if 'CALL_RECORD_URL' in call_data and call_data['CALL_FAILED_CODE'] == "200":
-                    audio_files.append(call_data['CALL_RECORD_URL'])
-
-            if not audio_files:
-                result.set_action(AnalysisAction.SKIP, AnalysisReason.NO_AUDIO_FILES)
-                self.log_lead_action(lead.id, "ai_analysis", "No audio files found")
+            combined_transcription = self._collect_transcription(lead, result)
+            if combined_transcription is None:
                 return result
 
-            self.log_lead_action(lead.id, "ai_analysis", f"Found {len(audio_files)} audio files")
+            # Analyze with Gemini AI, starting the Bitrix update as soon as the decision streams in
+            update_future: Optional[Future] = None
 
-            # Analyze all audio files with enhanced transcription
-            transcription_results = []
-            all_transcription_text = []
-
-            for audio_file in audio_files:
-                try:
-                    # Use enhanced transcription service
-                    transcription_result = self.transcription_service.transcribe_url(audio_file)
-                    transcription_results.append(transcription_result)
-                    result.add_transcription_result(transcription_result)
+            def start_update(is_suitable: bool, alternative_status: Optional[int]):
+                nonlocal update_future
+                target = self._target_status(is_suitable, alternative_status)
+                if target is not None and not dry_run:
+                    update_future = self._update_pool.submit(self.bitrix_service.update_lead_complete,
+                                                             lead.id, *target)
 
-                    if transcription_result.is_successful:
-                        all_transcription_text.append(transcription_result.transcription)
-
-                except Exception as e:
-                    self.log_lead_action(lead.id, "transcription_error", f"Error transcribing {audio_file}: {e}")
-                    error_transcription = TranscriptionResult(
-                        audio_file=audio_file,
-                        transcription='',
-                        error=str(e)
-                    )
-                    transcription_results.append(error_transcription)
-                    result.add_transcription_result(error_transcription)
-
-            # Check if we have successful transcriptions
-            successful_transcriptions = [tr for tr in transcription_results if tr.is_successful]
-
-            if not successful_transcriptions:
-                result.set_action(AnalysisAction.SKIP, AnalysisReason.NO_TRANSCRIPTION)
-                self.log_lead_action(lead.id, "ai_analysis", "No successful transcriptions")
-                return result
-
-            # Combine all transcriptions
-            combined_transcription = "\n\n".join(all_transcription_text)
-
-            self.log_lead_action(lead.id, "ai_analysis", f"Analyzing {len(successful_transcriptions)} transcriptions")
-
-            # Analyze with Gemini AI
-            status_name = self.junk_statuses.get(lead.junk_status, "Unknown")
-            ai_result = self.gemini_service.analyze_lead_status(
+            status_name = JUNK_STATUS_NAMES.get(lead.junk_status, "Unknown")
+            ai_result = self.gemini_service.analyze_lead_status_stream(
                 combined_transcription,
                 lead.junk_status,
-                status_name
+                status_name,
+                on_decision=start_update
             )
 
-            result.set_ai_analysis(ai_result)
+            return self._apply_ai_result(lead, result, ai_result, dry_run, update_future)
 
-            if not ai_result.is_successful:
-                result.set_error(f"AI analysis failed: {ai_result.error}")
-                return result
+        except Exception as e:
+            self.logger.error("Error in AI analysis: %s", e)
+            result.set_error(f"Error in AI analysis: {e}")
+            return result
 
-            # Enhanced decision logic with alternative status handling
-            if ai_result.is_suitable:
-                if ai_result.has_alternative_status:
-                    # Current status not suitable, but alternative status is suitable
-                    alternative_status = ai_result.alternative_status
-                    alternative_name = self.junk_statuses.get(alternative_status, f"Status {alternative_status}")
-
-                    result.set_action(
-                        AnalysisAction.CHANGE_STATUS,
-                        AnalysisReason.AI_NOT_SUITABLE,
-                        new_status=self.config.lead_status.junk_status_value,  # Keep as JUNK
-                        new_junk_status=alternative_status  # Change to alternative status
-                    )
+    def _collect_transcription(self, lead: Lead, result: LeadAnalysisResult,
+                               voximplant_data: Optional[List[Dict[str, Any]]] = None) -> Optional[str]:
+        """Transcribe the lead's recordings; returns the combined text, or None after marking a skip"""
+        # Get audio files from Voximplant unless they were prefetched
+        if voximplant_data is None:
+            voximplant_data = self.bitrix_service.get_voximplant_call_data(lead.id)
 
-                    self.log_lead_action(
-                        lead.id,
-                        "decision",
-                        f"Changing junk status from {lead.junk_status} to {alternative_status} ({alternative_name})"
-                    )
+        audio_files = self._recording_urls(voximplant_data)
+        if not audio_files:
+            result.set_action(AnalysisAction.SKIP, AnalysisReason.NO_AUDIO_FILES)
+            self.log_lead_action(lead.id, "ai_analysis", "No audio files found")
+            return None
+
+        self.log_lead_action(lead.id, "ai_analysis", "Found %s audio files", len(audio_files))
+
+        # Recordings are independent network-bound jobs; transcribe them concurrently
+        # and collect in call order so the combined transcript stays stable
+        with ThreadPoolExecutor(max_workers=min(_MAX_TRANSCRIPTION_WORKERS, len(audio_files))) as executor:
+            futures = [
+                (audio_file, executor.submit(self.transcription_service.transcribe_url, audio_file))
+                for audio_file in audio_files
+            ]
+
+        transcription_results = []
+        for audio_file, future in futures:
+            try:
+                # Use enhanced transcription service
+                transcription_results.append(future.result())
+
+            except Exception as e:
+                self.log_lead_action(lead.id, "transcription_error", "Error transcribing %s: %s", audio_file, e)
+                transcription_results.append(TranscriptionResult(
+                    audio_file=audio_file,
+                    transcription='',
+                    error=str(e)
+                ))
+
+        return self._combine_transcriptions(lead, result, transcription_results)
+
+    def _combine_transcriptions(self, lead: Lead, result: LeadAnalysisResult,
+                                transcription_results: List[TranscriptionResult]) -> Optional[str]:
+        """Record the transcriptions on the result and join the successful ones, None after marking a skip"""
+        # Record every result and gather the successful texts in one pass
+        pieces = []
+        for transcription_result in transcription_results:
+            result.add_transcription_result(transcription_result)
+            if transcription_result.is_successful:
+                pieces.append(transcription_result.transcription)
+
+        if not pieces:
+            result.set_action(AnalysisAction.SKIP, AnalysisReason.NO_TRANSCRIPTION)
+            self.log_lead_action(lead.id, "ai_analysis", "No successful transcriptions")
+            return None
+
+        # Combine all transcriptions
+        combined_transcription = "\n\n".join(pieces)
+
+        self.log_lead_action(lead.id, "ai_analysis", "Analyzing %s transcriptions", len(pieces))
+
+        return combined_transcription
+
+    def _target_status(self, is_suitable: bool,
+                       alternative_status: Optional[int]) -> Optional[Tuple[str, Optional[int]]]:
+        """Return the (status, junk status) an AI decision moves the lead to, or None to keep it"""
+        if not is_suitable:
+            return self.config.lead_status.active_status_value, None
+        if alternative_status is not None:
+            return self.config.lead_status.junk_status_value, alternative_status
+        return None
+
+    def _commit_status_update(self, lead_id: str, new_status: str, new_junk_status: Optional[int],
+                              update_future: Optional[Future] = None) -> bool:
+        """Update the lead, or wait for the update already started from the streamed decision"""
+        if update_future is not None:
+            return update_future.result()
+        return self.bitrix_service.update_lead_complete(lead_id, new_status, new_junk_status)
+
+    @staticmethod
+    def _recording_urls(voximplant_data: List[Dict[str, Any]]) -> List[str]:
+        """Extract the recording URLs of answered calls from Voximplant call data"""
+        return [
+            call_data['CALL_RECORD_URL']
+            for call_data in voximplant_data
+            if 'CALL_RECORD_URL' in call_data and call_data['CALL_FAILED_CODE'] == "200"
+        ]
+
+    def _apply_ai_result(self, lead: Lead, result: LeadAnalysisResult, ai_result: AIAnalysisResult,
+                         dry_run: bool, update_future: Optional[Future] = None) -> LeadAnalysisResult:
+        """Record the AI decision on the result and update the lead in Bitrix24"""
+        result.set_ai_analysis(ai_result)
+
+        if not ai_result.is_successful:
+            if update_future is not None and update_future.result():
+                # The decision streamed in and was applied before the rest of the answer failed
+                self.log_lead_action(lead.id, "update_complete", "Lead updated from partial AI response")
+            result.set_error(f"AI analysis failed: {ai_result.error}")
+            return result
 
-                    # Log AI reasoning
-                    if ai_result.reasoning:
-                        self.log_lead_action(lead.id, "ai_reasoning", f"AI Decision Details:\n{ai_result.reasoning}")
-
-                    # Update lead status if not dry run
-                    if not dry_run:
-                        # Update both main status (keep as JUNK) and junk status (change to alternative)
-                        success = self.bitrix_service.update_lead_complete(
-                            lead.id,
-                            self.config.lead_status.junk_status_value,  # Keep as JUNK
-                            alternative_status  # New junk status
-                        )
-                        if not success:
-                            result.set_error("Failed to update lead status")
-                else:
-                    # Keep current junk status - AI says it's suitable
-                    result.set_action(AnalysisAction.KEEP_STATUS, AnalysisReason.AI_SUITABLE)
-                    self.log_lead_action(lead.id, "decision", "Keeping status - AI says suitable")
-
-                    # Log AI reasoning if available
-                    if ai_result.reasoning:
-                        self.log_lead_action(lead.id, "ai_reasoning", f"AI Decision Details:\n{ai_result.reasoning}")
+        # Enhanced decision logic with alternative status handling
+        if ai_result.is_suitable:
+            if ai_result.has_alternative_status:
+                # Current status not suitable, but alternative status is suitable
+                alternative_status = ai_result.alternative_status
+                alternative_name = JUNK_STATUS_NAMES.get(alternative_status, f"Status {alternative_status}")
+                junk_status_value = self.config.lead_status.junk_status_value
 
-            else:
-                # Change to active status - AI says lead is not junk at all
-                new_status = self.config.lead_status.active_status_value
                 result.set_action(
                     AnalysisAction.CHANGE_STATUS,
                     AnalysisReason.AI_NOT_SUITABLE,
-                    new_status=new_status,
-                    new_junk_status=None
+                    new_status=junk_status_value,  # Keep as JUNK
+                    new_junk_status=alternative_status  # Change to alternative status
                 )
 
-                self.log_lead_action(lead.id, "decision", "Changing status to NEW - AI says not junk")
+                self.log_lead_action(
+                    lead.id,
+                    "decision",
+                    "Changing junk status from %s to %s (%s)",
+                    lead.junk_status, alternative_status, alternative_name
+                )
 
-                # Log detailed reasoning for false results
+                # Log AI reasoning
                 if ai_result.reasoning:
-                    self.log_lead_action(lead.id, "ai_reasoning", f"AI Decision Details:\n{ai_result.reasoning}")
-                else:
-                    self.log_lead_action(
-                        lead.id,
-                        "ai_reasoning",
-                        "AI determined lead should not be junk (no detailed reasoning provided)"
-                    )
+                    self.log_lead_action(lead.id, "ai_reasoning", "AI Decision Details:\n%s", ai_result.reasoning)
 
                 # Update lead status if not dry run
                 if not dry_run:
-                    success = self.bitrix_service.update_lead_complete(lead.id, new_status, None)
+                    # Update both main status (keep as JUNK) and junk status (change to alternative)
+                    success = self._commit_status_update(
+                        lead.id,
+                        junk_status_value,  # Keep as JUNK
+                        alternative_status,  # New junk status
+                        update_future
+                    )
                     if not success:
                         result.set_error("Failed to update lead status")
+            else:
+                # Keep current junk status - AI says it's suitable
+                result.set_action(AnalysisAction.KEEP_STATUS, AnalysisReason.AI_SUITABLE)
+                self.log_lead_action(lead.id, "decision", "Keeping status - AI says suitable")
 
-            return result
+                # Log AI reasoning if available
+                if ai_result.reasoning:
+                    self.log_lead_action(lead.id, "ai_reasoning", "AI Decision Details:\n%s", ai_result.reasoning)
+
+        else:
+            # Change to active status - AI says lead is not junk at all
+            new_status = self.config.lead_status.active_status_value
+            result.set_action(
+                AnalysisAction.CHANGE_STATUS,
+                AnalysisReason.AI_NOT_SUITABLE,
+                new_status=new_status,
+                new_junk_status=None
+            )
 
-        except Exception as e:
-            self.logger.error(f"Error in AI analysis: {e}")
-            result.set_error(f"Error in AI analysis: {e}")
-            return result
+            self.log_lead_action(lead.id, "decision", "Changing status to NEW - AI says not junk")
+
+            # Log detailed reasoning for false results
+            if ai_result.reasoning:
+                self.log_lead_action(lead.id, "ai_reasoning", "AI Decision Details:\n%s", ai_result.reasoning)
+            else:
+                self.log_lead_action(
+                    lead.id,
+                    "ai_reasoning",
+                    "AI determined lead should not be junk (no detailed reasoning provided)"
+                )
+
+            # Update lead status if not dry run
+            if not dry_run:
+                success = self._commit_status_update(lead.id, new_status, None, update_future)
+                if not success:
+                    result.set_error("Failed to update lead status")
+
+        return result
 
     def analyze_lead_by_id(self, lead_id: str, dry_run: bool = False) -> Optional[LeadAnalysisResult]:
         """Analyze a specific lead by ID"""
@@ -429,55 +926,55 @@ class EnhancedLeadAnalyzerService(LoggerMixin):
             result = self._analyze_single_lead(lead, dry_run)
 
             self.log_lead_action(lead_id, "analyze_complete",
-                                 f"Analysis completed: {result.action.value if result.action else 'unknown'}")
+                                 "Analysis completed: %s", result.action.value if result.action else 'unknown')
             return result
 
         except Exception as e:
-            self.log_lead_action(lead_id, "analyze_error", f"Error analyzing lead: {e}")
+            self.log_lead_action(lead_id, "analyze_error", "Error analyzing lead: %s", e)
             error_result = LeadAnalysisResult(lead_id=lead_id)
             error_result.set_error(str(e))
             return error_result
 
+    def _probe_transcription_service(self) -> bool:
+        """Check that the transcription service answers"""
+        response = self.transcription_service.session.get(
+            "http://127.0.0.1:8101", timeout=self.config.scheduler.health_check_timeout_seconds
+        )
+        return response.status_code == 200
+
     def check_health(self) -> Dict[str, bool]:
         """Check health of all services"""
-        health_status = {}
-
-        try:
-            health_status['bitrix'] = self.bitrix_service.test_connection()
-        except Exception:
-            health_status['bitrix'] = False
-
-        try:
-            # Test enhanced transcription service
-            test_url = "http://127.0.0.1:8101/analyze?language=uz"
-            response = requests.get("http://127.0.0.1:8101", timeout=5)
-            health_status['transcription'] = response.status_code == 200
-        except Exception:
-            health_status['transcription'] = False
-
-        try:
-            health_status['gemini'] = self.gemini_service.test_connection()
-        except Exception:
-            health_status['gemini'] = False
+        probes = {
+            'bitrix': self.bitrix_service.test_connection,
+            'transcription': self._probe_transcription_service,
+            'gemini': self.gemini_service.test_connection
+        }
 
-        return health_status
+        return run_health_probes(probes, self.config.scheduler.health_check_timeout_seconds, self.logger)
 
     def close(self):
         """Close all services and cleanup resources"""
+        # Let an in-flight warmup finish before its session is closed; the upload is bounded by the service timeout
+        if self._warmup_thread is not None:
+            self._warmup_thread.join(self.config.transcription.timeout_seconds)
+
         try:
             self.bitrix_service.close()
         except Exception as e:
-            self.logger.warning(f"Error closing Bitrix service: {e}")
+            self.logger.warning("Error closing Bitrix service: %s", e)
 
         try:
             self.transcription_service.close()
         except Exception as e:
-            self.logger.warning(f"Error closing transcription service: {e}")
+            self.logger.warning("Error closing transcription service: %s", e)
 
         try:
             self.gemini_service.close()
         except Exception as e:
-            self.logger.warning(f"Error closing Gemini service: {e}")
+            self.logger.warning("Error closing Gemini service: %s", e)
+
+        self._lead_pool.shutdown(wait=True)
+        self._update_pool.shutdown(wait=True)
 
         self.log_service_action("EnhancedLeadAnalyzerService", "close", "Service closed")
 
@@ -21,14 +21,16 @@ class EnhancedDailyScheduler(LoggerMixin):
 
         # Import here to avoid circular imports
         if analyzer_service is None:
-            from enhanced_lead_analyzer import EnhancedLeadAnalyzerService
-            self.analyzer = EnhancedLeadAnalyzerService()
+            from async_lead_analyzer import create_lead_analyzer
+            self.analyzer = create_lead_analyzer()
         else:
             self.analyzer = analyzer_service
 
         self._running = False
         self._thread: Optional[threading.Thread] = None
         self._stop_event = threading.Event()
+        # Set on stop or when the job list changes so the loop recomputes its sleep
+        self._wakeup_event = threading.Event()
 
         self.last_run_time: Optional[datetime] = None
         self.next_run_time: Optional[datetime] = None
@@ -69,6 +71,7 @@ class EnhancedDailyScheduler(LoggerMixin):
 
         self._running = False
         self._stop_event.set()
+        self._wakeup_event.set()
 
         if self._thread and self._thread.is_alive():
             self._thread.join(timeout=timeout)
@@ -83,39 +86,48 @@ class EnhancedDailyScheduler(LoggerMixin):
 
     def _scheduler_loop(self):
         """Main scheduler loop using schedule library"""
-        self.logger.info(f"Scheduler loop started. Next run: {self.next_run_time}")
+        self.logger.info("Scheduler loop started. Next run: %s", self.next_run_time)
 
         while self._running and not self._stop_event.is_set():
             try:
-                # Run pending scheduled jobs
-                schedule.run_pending()
-
-                # Sleep for 1 minute before checking again
-                if not self._stop_event.wait(60):
-                    continue
-                else:
+                # Sleep until the next job is due instead of polling
+                self._wakeup_event.clear()
+                self._wakeup_event.wait(self._seconds_until_next_run())
+                if self._stop_event.is_set():
                     break
 
+                schedule.run_pending()
+                self._calculate_next_run_time()
+
             except Exception as e:
-                self.logger.error(f"Error in scheduler loop: {e}")
+                self.logger.error("Error in scheduler loop: %s", e)
                 # Wait 5 minutes before retrying
                 if self._stop_event.wait(300):
                     break
 
         self.logger.info("Scheduler loop ended")
 
+    def _seconds_until_next_run(self) -> float:
+        """Seconds to sleep before the next scheduled job is due"""
+        next_run = schedule.next_run()
+        if next_run is None:
+            return self.config.check_interval_hours * 3600
+        return max(1.0, (next_run - datetime.now()).total_seconds())
+
     def _scheduled_analysis(self):
         """Scheduled analysis job"""
         try:
             self.logger.info("Starting scheduled lead analysis")
-            start_time = datetime.now()
-            self.last_run_time = start_time
+            self.last_run_time = datetime.now()
+            start_time = time.monotonic()
+
+            # The ASR backend may have unloaded its models if it sat idle since the last run
+            self.analyzer.warmup_if_idle()
 
             # Check for new leads and run analysis
             batch_result = self.analyzer.analyze_new_leads()
 
-            end_time = datetime.now()
-            processing_time = (end_time - start_time).total_seconds()
+            processing_time = time.monotonic() - start_time
 
             # Log comprehensive results
             self._log_analysis_results(batch_result, processing_time)
@@ -124,20 +136,20 @@ class EnhancedDailyScheduler(LoggerMixin):
             self._calculate_next_run_time()
 
         except Exception as e:
-            self.logger.error(f"Scheduled analysis failed: {e}")
+            self.logger.error("Scheduled analysis failed: %s", e)
             raise SchedulerError(f"Scheduled analysis failed: {e}")
 
     def _log_analysis_results(self, batch_result, processing_time: float):
         """Log detailed analysis results"""
-        self.logger.info(f"Scheduled analysis completed in {processing_time:.2f} seconds")
-        self.logger.info(f"Total leads processed: {batch_result.total_leads}")
-        self.logger.info(f"Success rate: {batch_result.success_rate:.2f}")
-        self.logger.info(f"Leads updated: {batch_result.leads_updated}")
-        self.logger.info(f"Leads kept: {batch_result.leads_kept}")
-        self.logger.info(f"Leads skipped: {batch_result.leads_skipped}")
+        self.logger.info("Scheduled analysis completed in %.2f seconds", processing_time)
+        self.logger.info("Total leads processed: %s", batch_result.total_leads)
+        self.logger.info("Success rate: %.2f", batch_result.success_rate)
+        self.logger.info("Leads updated: %s", batch_result.leads_updated)
+        self.logger.info("Leads kept: %s", batch_result.leads_kept)
+        self.logger.info("Leads skipped: %s", batch_result.leads_skipped)
 
         if batch_result.failed_analyses > 0:
-            self.logger.warning(f"Failed analyses: {batch_result.failed_analyses}")
+            self.logger.warning("Failed analyses: %s", batch_result.failed_analyses)
 
         # Log breakdown by action
         from app.models.analysis_result import AnalysisAction
@@ -148,7 +160,7 @@ class EnhancedDailyScheduler(LoggerMixin):
                 action_summary[action.value] = count
 
         if action_summary:
-            self.logger.info(f"Action breakdown: {action_summary}")
+            self.logger.info("Action breakdown: %s", action_summary)
 
     def _calculate_next_run_time(self):
         """Calculate the next scheduled run time"""
@@ -156,7 +168,7 @@ class EnhancedDailyScheduler(LoggerMixin):
         next_job = schedule.next_run()
         if next_job:
             self.next_run_time = next_job
-            self.logger.info(f"Next scheduled run: {self.next_run_time}")
+            self.logger.info("Next scheduled run: %s", self.next_run_time)
         else:
             # Fallback: calculate based on interval
             if self.last_run_time:
@@ -174,7 +186,7 @@ class EnhancedDailyScheduler(LoggerMixin):
         try:
             self._scheduled_analysis()
         except Exception as e:
-            self.logger.error(f"Forced analysis run failed: {e}")
+            self.logger.error("Forced analysis run failed: %s", e)
             raise
 
     def get_status(self) -> dict:
@@ -195,13 +207,15 @@ class EnhancedDailyScheduler(LoggerMixin):
             job_func = self._scheduled_analysis
 
         schedule.every().day.at(time_str).do(job_func)
-        self.logger.info(f"Added custom schedule at {time_str}")
+        self._wakeup_event.set()
+        self.logger.info("Added custom schedule at %s", time_str)
 
     def set_interval_schedule(self, hours: int):
         """Set interval-based scheduling instead of daily"""
         schedule.clear()
         schedule.every(hours).hours.do(self._scheduled_analysis)
-        self.logger.info(f"Set interval schedule: every {hours} hours")
+        self._wakeup_event.set()
+        self.logger.info("Set interval schedule: every %s hours", hours)
 
     def __enter__(self):
         """Context manager entry"""
@@ -225,7 +239,7 @@ def run_daily_analysis():
     # Add project root to path
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-    from enhanced_lead_analyzer import EnhancedLeadAnalyzerService
+    from async_lead_analyzer import create_lead_analyzer
     from app.logger import get_logger
 
     logger = get_logger('CronAnalysis')
@@ -233,17 +247,17 @@ def run_daily_analysis():
     try:
         logger.info("Starting cron-triggered lead analysis")
 
-        with EnhancedLeadAnalyzerService() as analyzer:
+        with create_lead_analyzer() as analyzer:
             batch_result = analyzer.analyze_new_leads()
 
-            logger.info(f"Cron analysis completed: {batch_result.total_leads} leads processed")
-            logger.info(f"Success rate: {batch_result.success_rate:.2f}")
-            logger.info(f"Leads updated: {batch_result.leads_updated}")
+            logger.info("Cron analysis completed: %s leads processed", batch_result.total_leads)
+            logger.info("Success rate: %.2f", batch_result.success_rate)
+            logger.info("Leads updated: %s", batch_result.leads_updated)
 
             return 0  # Success
 
     except Exception as e:
-        logger.error(f"Cron analysis failed: {e}")
+        logger.error("Cron analysis failed: %s", e)
         return 1  # Error
 
 
@@ -3,13 +3,17 @@ Main application script for Enhanced Bitrix24 Lead Analyzer
 """
 
 import argparse
+import logging
+import signal
 import sys
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Optional
 
 from app.config import get_config, validate_config
 from app.logger import get_logger, setup_logging
+from async_lead_analyzer import create_lead_analyzer
 from enhanced_lead_analyzer import EnhancedLeadAnalyzerService
 from enhanced_scheduler import EnhancedDailyScheduler
 from app.utils.exceptions import LeadAnalyzerError
@@ -116,14 +120,7 @@ def test_configuration() -> bool:
         logger.info(f"  - Junk status field: {config.lead_status.junk_status_field}")
 
         # Test junk status mappings
-        junk_statuses = {
-            158: "5 marta javob bermadi",
-            227: "Notog'ri raqam",
-            229: "Ariza qoldirmagan",
-            783: "Notog'ri mijoz",
-            807: "Yoshi to'g'ri kelmadi"
-        }
-        logger.info(f"  - Junk statuses configured: {len(junk_statuses)}")
+        logger.info(f"  - Junk statuses configured: {len(config.lead_status.junk_statuses)}")
 
         return True
 
@@ -132,14 +129,16 @@ def test_configuration() -> bool:
         return False
 
 
-def health_check() -> bool:
-    """Check health of all services"""
+def health_check(analyzer: Optional[EnhancedLeadAnalyzerService] = None) -> bool:
+    """Check health of all services, on the given analyzer or a temporary one"""
     logger = get_logger('HealthCheck')
 
     logger.info("Performing enhanced health check...")
 
+    owns_analyzer = analyzer is None
     try:
-        analyzer = EnhancedLeadAnalyzerService()
+        if owns_analyzer:
+            analyzer = EnhancedLeadAnalyzerService()
         health_status = analyzer.check_health()
 
         logger.info("Enhanced health check results:")
@@ -165,7 +164,8 @@ def health_check() -> bool:
                 logger.warning("      - GEMINI_API_KEY is set correctly")
                 logger.warning("      - Internet connection is available")
 
-        analyzer.close()
+        if owns_analyzer:
+            analyzer.close()
         return overall_health
 
     except Exception as e:
@@ -178,7 +178,7 @@ def run_single_analysis(lead_id: Optional[str] = None, dry_run: bool = False) ->
     logger = get_logger('SingleAnalysis')
 
     try:
-        with EnhancedLeadAnalyzerService() as analyzer:
+        with create_lead_analyzer() as analyzer:
             if lead_id:
                 logger.info(f"Analyzing specific lead: {lead_id}")
                 result = analyzer.analyze_lead_by_id(lead_id, dry_run=dry_run)
@@ -218,7 +218,7 @@ def run_all_junk_analysis(dry_run: bool = False) -> bool:
     logger = get_logger('AllJunkAnalysis')
 
     try:
-        with EnhancedLeadAnalyzerService() as analyzer:
+        with create_lead_analyzer() as analyzer:
             logger.info("Starting enhanced analysis of all junk leads...")
             batch_result = analyzer.analyze_new_leads(dry_run=dry_run)  # Will process all recent junk leads
 
@@ -245,7 +245,7 @@ def run_scheduled_mode(schedule_time: str = "09:00", interval_hours: Optional[in
         logger.info("Starting enhanced scheduled mode...")
 
         # Create analyzer and scheduler
-        analyzer = EnhancedLeadAnalyzerService()
+        analyzer = create_lead_analyzer()
         scheduler = EnhancedDailyScheduler(analyzer)
 
         # Configure scheduling
@@ -262,13 +262,14 @@ def run_scheduled_mode(schedule_time: str = "09:00", interval_hours: Optional[in
         logger.info("Enhanced scheduler started successfully")
         logger.info("Schedule status:", scheduler.get_status())
 
-        # Keep running until interrupted
-        try:
-            while True:
-                time.sleep(60)  # Check every minute
+        # Sleep until Ctrl-C or a termination signal instead of polling
+        shutdown_requested = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: shutdown_requested.set())
 
-        except KeyboardInterrupt:
-            logger.info("Shutdown requested by user")
+        try:
+            shutdown_requested.wait()
+            logger.info("Shutdown requested")
 
         finally:
             logger.info("Stopping enhanced scheduler...")
@@ -281,6 +282,25 @@ def run_scheduled_mode(schedule_time: str = "09:00", interval_hours: Optional[in
         raise
 
 
+def _test_pipeline(analyzer: EnhancedLeadAnalyzerService) -> bool:
+    """Run a dry-run analysis of new leads as a pipeline test"""
+    logger = get_logger('TestMode')
+
+    try:
+        logger.info("Testing enhanced analysis pipeline...")
+
+        # Test with a small batch
+        batch_result = analyzer.analyze_new_leads(dry_run=True)
+
+        logger.info(f"✅ Enhanced analysis pipeline test completed")
+        logger.info(f"   Processed {batch_result.total_leads} leads in test mode")
+        return True
+
+    except Exception as e:
+        logger.error(f"❌ Enhanced analysis pipeline test failed: {e}")
+        return False
+
+
 def run_test_mode() -> bool:
     """Run comprehensive test mode"""
     logger = get_logger('TestMode')
@@ -290,24 +310,23 @@ def run_test_mode() -> bool:
     # Test configuration
     config_ok = test_configuration()
 
-    # Test service health
-    health_ok = health_check()
+    # Every later check talks to the configured endpoints; with a bad config each would only time out
+    if not config_ok:
+        logger.warning("⚠️  Skipping service and pipeline checks until the configuration is fixed.")
+        return False
 
-    # Test analysis pipeline
+    # Service health and the pipeline dry run are independent network work, so run them
+    # together on one analyzer instead of building and tearing down one per check
     try:
-        with EnhancedLeadAnalyzerService() as analyzer:
-            logger.info("Testing enhanced analysis pipeline...")
-
-            # Test with a small batch
-            batch_result = analyzer.analyze_new_leads(dry_run=True)
-
-            pipeline_ok = True
-            logger.info(f"✅ Enhanced analysis pipeline test completed")
-            logger.info(f"   Processed {batch_result.total_leads} leads in test mode")
+        with EnhancedLeadAnalyzerService() as analyzer, ThreadPoolExecutor(max_workers=2) as executor:
+            health_future = executor.submit(health_check, analyzer)
+            pipeline_future = executor.submit(_test_pipeline, analyzer)
+            health_ok = health_future.result()
+            pipeline_ok = pipeline_future.result()
 
     except Exception as e:
-        logger.error(f"❌ Enhanced analysis pipeline test failed: {e}")
-        pipeline_ok = False
+        logger.error(f"❌ Enhanced test mode failed: {e}")
+        health_ok = pipeline_ok = False
 
     overall_success = config_ok and health_ok and pipeline_ok
 
@@ -356,7 +375,6 @@ def main():
 
     # Override log level if verbose
     if args.verbose:
-        import logging
         logging.getLogger().setLevel(logging.DEBUG)
 
     logger.info("Starting Enhanced Bitrix24 Lead Analyzer")
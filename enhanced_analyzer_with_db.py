@@ -2,27 +2,113 @@
 Enhanced Lead Analyzer Service with Database Caching
 """
 
-import hashlib
+import asyncio
+import atexit
+import threading
 import time
+import uuid
+from collections import OrderedDict
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
+
+import aiohttp
+from sqlalchemy import and_, bindparam, case, delete, func, insert, or_, select, true, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
 from database_models import (
     Lead, Transcription, AnalysisHistory, SchedulerState,
-    db_manager, get_db
+    audio_url_hash, get_db_manager, session_scope
 )
 from app.config import get_config
 from app.logger import LoggerMixin
-from app.models.lead import LeadFilter
+from app.models.lead import JUNK_STATUS_NAMES, LeadFilter
 from app.models.analysis_result import (
     LeadAnalysisResult, BatchAnalysisResult, AnalysisAction, AnalysisReason,
     TranscriptionResult, AIAnalysisResult
 )
 from app.services.bitrix_service import BitrixService
 from enhanced.enhanced_gemini import EnhancedGeminiService
+from enhanced.enhanced_lead_analyzer import _multipart_file_stream
 from app.utils.exceptions import LeadAnalyzerError
+from app.utils.health import run_health_probes
 import requests
+from requests.adapters import HTTPAdapter
+
+# Uncached recordings are downloaded and transcribed concurrently, at most this many at once;
+# it is also the number of files sent in one /analyze_batch request
+_MAX_CONCURRENT_AUDIO = 8
+_ASYNC_CONNECTION_LIMIT = 32
+_ASYNC_CONNECTION_LIMIT_PER_HOST = 16
+_DNS_CACHE_TTL_SECONDS = 300
+
+# Chunk size used when piping a recording from Bitrix to the transcription service
+_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Recently used transcriptions kept in memory in front of the database cache
+_MEMORY_CACHE_SIZE = 4096
+
+# Responses meaning the transcription service does not provide /analyze_batch
+_BATCH_UNSUPPORTED_STATUSES = frozenset({404, 405, 501})
+
+# Dialect-specific INSERT constructs supporting ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {
+    'postgresql': postgresql_insert,
+    'sqlite': sqlite_insert
+}
+
+# Lead columns refreshed from Bitrix when an already stored lead is seen again
+_LEAD_UPSERT_COLUMNS = ('title', 'status_id', 'junk_status', 'junk_status_name', 'raw_data', 'updated_at')
+
+# Rows removed per cleanup transaction, keeping lock time and write-ahead log growth bounded
+_CLEANUP_BATCH_SIZE = 10000
+
+# Hot read queries, built once so each call only binds parameters. A lead's history is read as
+# plain column rows labelled with their response keys, skipping ORM instances for read-only data
+_LEAD_ANALYSES_QUERY = select(
+    AnalysisHistory.analysis_date,
+    AnalysisHistory.action,
+    AnalysisHistory.reason,
+    AnalysisHistory.original_junk_status,
+    AnalysisHistory.new_junk_status,
+    AnalysisHistory.ai_suitable,
+    AnalysisHistory.ai_reasoning,
+    AnalysisHistory.ai_alternative_status,
+    AnalysisHistory.total_processing_time.label('processing_time'),
+    AnalysisHistory.is_successful
+).where(AnalysisHistory.lead_id == bindparam('lead_id')).order_by(AnalysisHistory.analysis_date.desc())
+_LEAD_TRANSCRIPTIONS_QUERY = select(
+    Transcription.audio_url,
+    Transcription.transcription_text,
+    Transcription.confidence,
+    Transcription.is_successful,
+    Transcription.created_at
+).where(Transcription.lead_id == bindparam('lead_id')).order_by(Transcription.created_at.desc())
+_RECENT_RUNS_QUERY = select(SchedulerState).order_by(SchedulerState.created_at.desc()).limit(5)
+
+# Analyzer workers claim fetched leads by stamping last_analyzed in one conditional UPDATE, so
+# concurrent runs never analyze the same lead twice; a claim from a crashed run expires after the TTL
+_LEAD_CLAIM_TTL = timedelta(hours=1)
+_CLAIMABLE_LEADS = and_(
+    Lead.id.in_(bindparam('lead_ids', expanding=True)),
+    or_(
+        Lead.last_analyzed.is_(None),
+        Lead.last_analyzed < bindparam('analyzed_before'),
+        Lead.last_analyzed < bindparam('stale_before')
+    )
+)
+_CLAIM_LEADS_STATEMENT = update(Lead).where(_CLAIMABLE_LEADS).values(
+    last_analyzed=bindparam('claimed_at')
+).returning(Lead.id).execution_options(synchronize_session=False)
+
+# Dialects without UPDATE ... RETURNING lock the claimable rows first, then stamp them
+_LOCK_CLAIMABLE_LEADS_QUERY = select(Lead.id).where(_CLAIMABLE_LEADS).with_for_update()
+_STAMP_LEADS_STATEMENT = update(Lead).where(Lead.id.in_(bindparam('claimed_ids', expanding=True))).values(
+    last_analyzed=bindparam('claimed_at')
+).execution_options(synchronize_session=False)
 
 
 class CachedTranscriptionService(LoggerMixin):
@@ -31,125 +117,440 @@ class CachedTranscriptionService(LoggerMixin):
     def __init__(self):
         self.config = get_config().transcription
         self.session = requests.Session()
-        self.session.timeout = self.config.timeout_seconds
+
+        # Lead workers share these sessions; size the pools so concurrent calls reuse kept-alive
+        # connections instead of opening and discarding extra ones
+        service_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.config.connection_pool_size,
+                                      pool_block=self.config.pool_block)
+        self.session.mount('http://', service_adapter)
+        self.session.mount('https://', service_adapter)
+
+        self.download_session = requests.Session()
+        download_adapter = HTTPAdapter(pool_connections=10, pool_maxsize=self.config.connection_pool_size,
+                                       pool_block=self.config.pool_block)
+        self.download_session.mount('http://', download_adapter)
+        self.download_session.mount('https://', download_adapter)
+        # Cleared the first time the transcription service turns out to have no batch endpoint
+        self._batch_supported = True
+
+        # Cached rows never change, so recently used ones are kept in memory to spare the database
+        self._memory_cache: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self._memory_cache_lock = threading.Lock()
+        self._memory_cache_hits = 0
+        self._memory_cache_misses = 0
+
+        # Async transcriptions run on one background event loop, so its aiohttp session and the
+        # kept-alive connections in it outlive a single batch
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_loop_lock = threading.Lock()
+        self._async_session: Optional[aiohttp.ClientSession] = None
         self.log_service_action("CachedTranscriptionService", "init", "Initialized with database caching")
 
-    def _get_audio_hash(self, audio_url: str) -> str:
-        """Generate hash for audio URL"""
-        return hashlib.sha256(audio_url.encode()).hexdigest()
+    def _get_audio_hash(self, audio_url: str) -> int:
+        """Generate a 64-bit hash key for audio URL"""
+        return audio_url_hash(audio_url)
 
     def _get_cached_transcription(self, db: Session, audio_url: str) -> Optional[Transcription]:
         """Get cached transcription from database"""
         audio_hash = self._get_audio_hash(audio_url)
-        return db.query(Transcription).filter(Transcription.audio_hash == audio_hash).first()
+        # The URL check guards against 64-bit hash collisions
+        return db.query(Transcription).filter(
+            and_(Transcription.audio_hash == audio_hash, Transcription.audio_url == audio_url)
+        ).first()
+
+    def _get_cached_transcriptions(self, db: Session, audio_urls: List[str]) -> Dict[str, Transcription]:
+        """Get cached transcriptions for several recordings with a single query"""
+        urls_by_hash = {self._get_audio_hash(audio_url): audio_url for audio_url in audio_urls}
+        if not urls_by_hash:
+            return {}
+
+        rows = db.query(Transcription).filter(Transcription.audio_hash.in_(list(urls_by_hash))).all()
+        return {row.audio_url: row for row in rows if urls_by_hash[row.audio_hash] == row.audio_url}
+
+    def _cache_row(self, lead_id: str, audio_url: str, transcription_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build transcription cache column values"""
+        return {
+            'lead_id': lead_id,
+            'audio_url': audio_url,
+            'audio_hash': self._get_audio_hash(audio_url),
+            'transcription_text': transcription_data.get('transcription', ''),
+            'confidence': transcription_data.get('confidence'),
+            'duration': transcription_data.get('duration'),
+            'language': transcription_data.get('language', 'uz'),
+            'is_successful': transcription_data.get('is_successful', False),
+            'error_message': transcription_data.get('error'),
+            'processing_time': transcription_data.get('processing_time'),
+            'transcription_service': 'docker_service',
+            'service_version': '1.0'
+        }
 
-    def _save_transcription_to_cache(self, db: Session, lead_id: str, audio_url: str,
-                                     transcription_data: Dict[str, Any]) -> Transcription:
-        """Save transcription to database cache"""
-        audio_hash = self._get_audio_hash(audio_url)
+    def _get_memory_cached(self, audio_url: str) -> Optional[Dict[str, Any]]:
+        """Get analysis data from the in-memory cache"""
+        with self._memory_cache_lock:
+            cached = self._memory_cache.get(audio_url)
+            if cached is None:
+                self._memory_cache_misses += 1
+                return None
 
-        transcription = Transcription(
-            lead_id=lead_id,
-            audio_url=audio_url,
-            audio_hash=audio_hash,
-            transcription_text=transcription_data.get('transcription', ''),
-            confidence=transcription_data.get('confidence'),
-            duration=transcription_data.get('duration'),
-            language=transcription_data.get('language', 'uz'),
-            is_successful=transcription_data.get('is_successful', False),
-            error_message=transcription_data.get('error'),
-            processing_time=transcription_data.get('processing_time'),
-            transcription_service='docker_service',
-            service_version='1.0'
-        )
+            self._memory_cache_hits += 1
+            self._memory_cache.move_to_end(audio_url)
+            return dict(cached)
 
-        db.add(transcription)
-        db.commit()
-        db.refresh(transcription)
+    def _set_memory_cached(self, audio_url: str, cache_data: Dict[str, Any]):
+        """Store analysis data in the in-memory cache"""
+        with self._memory_cache_lock:
+            self._memory_cache[audio_url] = dict(cache_data, from_cache=True)
+            self._memory_cache.move_to_end(audio_url)
+            if len(self._memory_cache) > _MEMORY_CACHE_SIZE:
+                self._memory_cache.popitem(last=False)
 
-        return transcription
+    def _save_transcription_to_cache(self, db: Session, lead_id: str, audio_url: str,
+                                     transcription_data: Dict[str, Any]) -> int:
+        """Save transcription to database cache; the caller commits"""
+        result = db.execute(insert(Transcription).values(**self._cache_row(lead_id, audio_url, transcription_data)))
+        self._set_memory_cached(audio_url, transcription_data)
+
+        return result.inserted_primary_key[0]
+
+    @staticmethod
+    def _cached_data(cached: Transcription) -> Dict[str, Any]:
+        """Convert a cached transcription row to analysis data"""
+        return {
+            'transcription': cached.transcription_text,
+            'confidence': cached.confidence,
+            'duration': cached.duration,
+            'language': cached.language,
+            'is_successful': cached.is_successful,
+            'error': cached.error_message,
+            'from_cache': True
+        }
+
+    @staticmethod
+    def _build_cache_data(result: Dict[str, Any], language: str, processing_time: float) -> Dict[str, Any]:
+        """Convert a transcription service response to analysis data"""
+        # Process transcription result
+        transcription_parts = []
+        if "transcription" in result:
+            for part in result["transcription"]:
+                transcription_parts.append(f"{part['speaker']}: {part['text']}")
+
+        full_transcription = "\n".join(transcription_parts)
+
+        return {
+            'transcription': full_transcription,
+            'confidence': result.get("overall_performance_score", 0) / 100.0 if result.get(
+                "overall_performance_score") else None,
+            'duration': result.get("duration"),
+            'language': language,
+            'is_successful': bool(full_transcription),
+            'processing_time': processing_time,
+            'from_cache': False
+        }
+
+    @staticmethod
+    def _is_service_result(cache_data: Dict[str, Any]) -> bool:
+        """Whether analysis data came back from the transcription service rather than a failed download or request"""
+        return not cache_data.get('error')
+
+    @staticmethod
+    def _error_data(error: Exception, start_time: float) -> Dict[str, Any]:
+        """Build analysis data for a failed transcription"""
+        return {
+            'transcription': '',
+            'error': str(error),
+            'is_successful': False,
+            'processing_time': time.time() - start_time,
+            'from_cache': False
+        }
 
     def analyze_audio_with_cache(self, lead_id: str, audio_url: str, language: str = "uz") -> Dict[str, Any]:
         """Analyze audio with database caching"""
-        with next(get_db()) as db:
+        memory_cached = self._get_memory_cached(audio_url)
+        if memory_cached is not None:
+            return memory_cached
+
+        with session_scope() as db:
             # Check cache first
             cached = self._get_cached_transcription(db, audio_url)
             if cached:
-                self.logger.info(f"Using cached transcription for: {audio_url}")
-                return {
-                    'transcription': cached.transcription_text,
-                    'confidence': cached.confidence,
-                    'duration': cached.duration,
-                    'language': cached.language,
-                    'is_successful': cached.is_successful,
-                    'error': cached.error_message,
-                    'from_cache': True
-                }
+                self.logger.info("Using cached transcription for: %s", audio_url)
+                cache_data = self._cached_data(cached)
+                self._set_memory_cached(audio_url, cache_data)
+                return cache_data
 
             # Not in cache, analyze with service
-            self.logger.info(f"Analyzing new audio: {audio_url}")
+            self.logger.info("Analyzing new audio: %s", audio_url)
             start_time = time.time()
 
             try:
-                # Download audio file
-                audio_response = requests.get(audio_url, timeout=30)
+                # Download audio file, piping it to the transcription service chunk by chunk
+                with self.download_session.get(audio_url, timeout=30, stream=True) as audio_response:
+                    audio_response.raise_for_status()
+
+                    # Send to transcription service
+                    url = f"http://127.0.0.1:8101/analyze?language={language}"
+                    boundary = uuid.uuid4().hex
+                    body = _multipart_file_stream(boundary, 'file', 'audio.wav', 'audio/wav',
+                                                  audio_response.iter_content(_DOWNLOAD_CHUNK_SIZE))
+
+                    response = self.session.post(
+                        url,
+                        data=body,
+                        headers={'Content-Type': f'multipart/form-data; boundary={boundary}'},
+                        timeout=self.config.timeout_seconds
+                    )
+                    response.raise_for_status()
+
+                cache_data = self._build_cache_data(response.json(), language, time.time() - start_time)
+
+                # Save to cache
+                self._save_transcription_to_cache(db, lead_id, audio_url, cache_data)
+
+                self.logger.info("Successfully analyzed and cached audio: %s", audio_url)
+                return cache_data
+
+            except Exception as e:
+                # Download and transport failures are usually transient, so they are retried next run
+                self.logger.error("Error analyzing audio %s: %s", audio_url, e)
+                return self._error_data(e, start_time)
+
+    def _open_async_session(self) -> aiohttp.ClientSession:
+        """Create an aiohttp session for downloading recordings and calling the transcription service"""
+        connector = aiohttp.TCPConnector(limit=_ASYNC_CONNECTION_LIMIT,
+                                         limit_per_host=_ASYNC_CONNECTION_LIMIT_PER_HOST,
+                                         ttl_dns_cache=_DNS_CACHE_TTL_SECONDS,
+                                         keepalive_timeout=self.config.keepalive_timeout_seconds)
+        return aiohttp.ClientSession(connector=connector,
+                                     timeout=aiohttp.ClientTimeout(total=self.config.timeout_seconds))
+
+    def _get_async_session(self) -> aiohttp.ClientSession:
+        """Return the shared aiohttp session; only called on the background loop"""
+        if self._async_session is None or self._async_session.closed:
+            self._async_session = self._open_async_session()
+        return self._async_session
+
+    def _run_async(self, coro):
+        """Run a coroutine on the background loop, starting it on first use, and wait for its result"""
+        with self._async_loop_lock:
+            if self._async_loop is None:
+                self._async_loop = asyncio.new_event_loop()
+                threading.Thread(target=self._async_loop.run_forever, name="transcription-loop",
+                                 daemon=True).start()
+                # The loop thread is a daemon; close the session before interpreter shutdown
+                atexit.register(self._stop_async_loop)
+        return asyncio.run_coroutine_threadsafe(coro, self._async_loop).result()
+
+    async def _close_async_session(self):
+        """Close the shared aiohttp session"""
+        if self._async_session is not None:
+            await self._async_session.close()
+            self._async_session = None
+
+    async def _analyze_audio_async(self, session: aiohttp.ClientSession, audio_url: str,
+                                   language: str) -> Dict[str, Any]:
+        """Download and transcribe one recording without touching the cache"""
+        self.logger.info("Analyzing new audio: %s", audio_url)
+        start_time = time.time()
+
+        try:
+            async with session.get(audio_url) as audio_response:
                 audio_response.raise_for_status()
 
-                # Send to transcription service
+                # The download stream is piped into the upload instead of being buffered
+                form = aiohttp.FormData()
+                form.add_field('file', audio_response.content, filename='audio.wav', content_type='audio/wav')
+
                 url = f"http://127.0.0.1:8101/analyze?language={language}"
-                files = {'file': ('audio.wav', audio_response.content, 'audio/wav')}
+                async with session.post(url, data=form) as response:
+                    response.raise_for_status()
+                    result = await response.json(content_type=None)
 
-                response = self.session.post(url, files=files)
+            return self._build_cache_data(result, language, time.time() - start_time)
+
+        except Exception as e:
+            self.logger.error("Error analyzing audio %s: %s", audio_url, e)
+            return self._error_data(e, start_time)
+
+    async def _download_audio_async(self, session: aiohttp.ClientSession, audio_url: str) -> bytes:
+        """Download one recording"""
+        async with session.get(audio_url) as audio_response:
+            audio_response.raise_for_status()
+            return await audio_response.read()
+
+    async def _transcribe_content_async(self, session: aiohttp.ClientSession, audio_url: str, content: bytes,
+                                        language: str) -> Dict[str, Any]:
+        """Transcribe one already downloaded recording"""
+        start_time = time.time()
+
+        try:
+            form = aiohttp.FormData()
+            form.add_field('file', content, filename='audio.wav', content_type='audio/wav')
+
+            url = f"http://127.0.0.1:8101/analyze?language={language}"
+            async with session.post(url, data=form) as response:
                 response.raise_for_status()
+                result = await response.json(content_type=None)
 
-                result = response.json()
-                processing_time = time.time() - start_time
+            return self._build_cache_data(result, language, time.time() - start_time)
 
-                # Process transcription result
-                transcription_parts = []
-                if "transcription" in result:
-                    for part in result["transcription"]:
-                        transcription_parts.append(f"{part['speaker']}: {part['text']}")
-
-                full_transcription = "\n".join(transcription_parts)
-
-                # Prepare data for caching
-                cache_data = {
-                    'transcription': full_transcription,
-                    'confidence': result.get("overall_performance_score", 0) / 100.0 if result.get(
-                        "overall_performance_score") else None,
-                    'duration': result.get("duration"),
-                    'language': language,
-                    'is_successful': bool(full_transcription),
-                    'processing_time': processing_time,
-                    'from_cache': False
-                }
+        except Exception as e:
+            self.logger.error("Error analyzing audio %s: %s", audio_url, e)
+            return self._error_data(e, start_time)
+
+    async def _analyze_audio_batch_async(self, session: aiohttp.ClientSession, audio_urls: List[str],
+                                         language: str) -> Optional[List[Dict[str, Any]]]:
+        """Transcribe up to _MAX_CONCURRENT_AUDIO recordings with one batch request, or None if the service
+        has no batch endpoint"""
+        start_time = time.time()
+        semaphore = asyncio.Semaphore(_MAX_CONCURRENT_AUDIO)
+
+        async def _download(audio_url: str):
+            async with semaphore:
+                return await self._download_audio_async(session, audio_url)
+
+        downloads = await asyncio.gather(*[_download(audio_url) for audio_url in audio_urls],
+                                         return_exceptions=True)
+        downloaded = [(audio_url, content) for audio_url, content in zip(audio_urls, downloads)
+                      if not isinstance(content, BaseException)]
+
+        transcribed = {}
+        if downloaded:
+            form = aiohttp.FormData()
+            for _, content in downloaded:
+                form.add_field('file', content, filename='audio.wav', content_type='audio/wav')
+
+            # The session timeout is sized for one file; the batch uploads and transcribes a whole chunk
+            batch_timeout = aiohttp.ClientTimeout(total=self.config.timeout_seconds * len(downloaded))
 
-                # Save to cache
-                self._save_transcription_to_cache(db, lead_id, audio_url, cache_data)
+            try:
+                url = f"http://127.0.0.1:8101/analyze_batch?language={language}"
+                async with session.post(url, data=form, timeout=batch_timeout) as response:
+                    if response.status in _BATCH_UNSUPPORTED_STATUSES:
+                        return None
+                    response.raise_for_status()
+                    payload = await response.json(content_type=None)
 
-                self.logger.info(f"Successfully analyzed and cached audio: {audio_url}")
-                return cache_data
+                batch_results = payload['results'] if isinstance(payload, dict) else payload
+                if len(batch_results) != len(downloaded):
+                    raise ValueError(f"Batch returned {len(batch_results)} results for {len(downloaded)} files")
 
-            except Exception as e:
-                self.logger.error(f"Error analyzing audio {audio_url}: {e}")
-
-                # Save error to cache to avoid retrying
-                error_data = {
-                    'transcription': '',
-                    'error': str(e),
-                    'is_successful': False,
-                    'processing_time': time.time() - start_time,
-                    'from_cache': False
+                processing_time = time.time() - start_time
+                transcribed = {
+                    audio_url: self._build_cache_data(batch_result, language, processing_time)
+                    for (audio_url, _), batch_result in zip(downloaded, batch_results)
                 }
 
-                self._save_transcription_to_cache(db, lead_id, audio_url, error_data)
-                return error_data
+            except Exception as e:
+                # A failed batch says nothing about its recordings, so none of them may be cached as errors
+                self.logger.warning("Batch request for %s files failed, analyzing them one by one: %s",
+                                    len(downloaded), e)
+
+                async def _transcribe(audio_url: str, content: bytes) -> Dict[str, Any]:
+                    async with semaphore:
+                        return await self._transcribe_content_async(session, audio_url, content, language)
+
+                fallback_results = await asyncio.gather(*[
+                    _transcribe(audio_url, content) for audio_url, content in downloaded
+                ])
+                transcribed = {audio_url: result for (audio_url, _), result in zip(downloaded, fallback_results)}
+
+        analyzed = []
+        for audio_url, content in zip(audio_urls, downloads):
+            if isinstance(content, BaseException):
+                self.logger.error("Error analyzing audio %s: %s", audio_url, content)
+                analyzed.append(self._error_data(content, start_time))
+            else:
+                analyzed.append(transcribed[audio_url])
+
+        return analyzed
+
+    async def _analyze_audios_async(self, audio_urls: List[str], language: str) -> List[Dict[str, Any]]:
+        """Transcribe recordings in batch requests of _MAX_CONCURRENT_AUDIO files, or file by file with at most
+        _MAX_CONCURRENT_AUDIO at a time"""
+        session = self._get_async_session()
+        analyzed = []
+        if self._batch_supported:
+            self.logger.info("Analyzing %s new audio files in batches of %s", len(audio_urls), _MAX_CONCURRENT_AUDIO)
+            # Fixed-size chunks keep the buffered downloads and each request's timeout bounded
+            while len(analyzed) < len(audio_urls):
+                chunk = audio_urls[len(analyzed):len(analyzed) + _MAX_CONCURRENT_AUDIO]
+                chunk_results = await self._analyze_audio_batch_async(session, chunk, language)
+                if chunk_results is None:
+                    self.logger.warning("Transcription service has no batch endpoint, analyzing files one by one")
+                    self._batch_supported = False
+                    break
+                analyzed.extend(chunk_results)
+            else:
+                return analyzed
 
-    def transcribe_url(self, lead_id: str, audio_url: str) -> TranscriptionResult:
-        """Transcribe URL with caching"""
-        analysis_result = self.analyze_audio_with_cache(lead_id, audio_url)
+        audio_urls = audio_urls[len(analyzed):]
+        semaphore = asyncio.Semaphore(_MAX_CONCURRENT_AUDIO)
+
+        async def _analyze(audio_url: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._analyze_audio_async(session, audio_url, language)
+
+        return analyzed + list(await asyncio.gather(*[_analyze(audio_url) for audio_url in audio_urls]))
+
+    def analyze_audios_batch(self, items: List[Tuple[str, str]], language: str = "uz",
+                             db: Optional[Session] = None) -> Dict[str, Dict[str, Any]]:
+        """Analyze (lead_id, audio_url) recordings with database caching, keyed by audio URL"""
+        lead_ids = {}
+        for lead_id, audio_url in items:
+            lead_ids.setdefault(audio_url, lead_id)
+
+        analyzed = {}
+        for audio_url in lead_ids:
+            memory_cached = self._get_memory_cached(audio_url)
+            if memory_cached is not None:
+                analyzed[audio_url] = memory_cached
+
+        missing = [audio_url for audio_url in lead_ids if audio_url not in analyzed]
+        if not missing:
+            return analyzed
+
+        # Reuse the caller's session when it has one open
+        with nullcontext(db) if db is not None else session_scope() as db:
+            # Check cache first
+            cached_rows = self._get_cached_transcriptions(db, missing)
+            if cached_rows:
+                self.logger.info("Using %s cached transcriptions", len(cached_rows))
+            for audio_url, cached in cached_rows.items():
+                analyzed[audio_url] = self._cached_data(cached)
+                self._set_memory_cached(audio_url, analyzed[audio_url])
+
+            pending = [audio_url for audio_url in missing if audio_url not in analyzed]
+            if pending:
+                pending_results = self._run_async(self._analyze_audios_async(pending, language))
+                analyzed.update(zip(pending, pending_results))
+
+                # Cache what the service returned; failed downloads and requests are retried next run
+                returned = [(audio_url, cache_data) for audio_url, cache_data in zip(pending, pending_results)
+                            if self._is_service_result(cache_data)]
+                if returned:
+                    # A savepoint keeps a failed cache write from rolling back the caller's pending work
+                    try:
+                        with db.begin_nested():
+                            db.bulk_insert_mappings(Transcription, [
+                                self._cache_row(lead_ids[audio_url], audio_url, cache_data)
+                                for audio_url, cache_data in returned
+                            ])
+                        for audio_url, cache_data in returned:
+                            self._set_memory_cached(audio_url, cache_data)
+                    except Exception as e:
+                        self.logger.warning("Error caching %s transcriptions: %s", len(returned), e)
+
+            return analyzed
 
+    def analyze_audios_with_cache(self, lead_id: str, audio_urls: List[str], language: str = "uz",
+                                  db: Optional[Session] = None) -> List[Dict[str, Any]]:
+        """Analyze a lead's recordings with database caching"""
+        analyzed = self.analyze_audios_batch([(lead_id, audio_url) for audio_url in audio_urls], language, db)
+        return [analyzed[audio_url] for audio_url in audio_urls]
+
+    @staticmethod
+    def _to_transcription_result(audio_url: str, analysis_result: Dict[str, Any]) -> TranscriptionResult:
+        """Convert analysis data to a transcription result"""
         return TranscriptionResult(
             audio_file=audio_url,
             transcription=analysis_result.get('transcription', ''),
@@ -159,20 +560,71 @@ class CachedTranscriptionService(LoggerMixin):
             error=analysis_result.get('error')
         )
 
-    def get_cache_statistics(self) -> Dict[str, Any]:
-        """Get transcription cache statistics"""
-        with next(get_db()) as db:
-            total_transcriptions = db.query(Transcription).count()
-            successful_transcriptions = db.query(Transcription).filter(Transcription.is_successful == True).count()
-            failed_transcriptions = db.query(Transcription).filter(Transcription.is_successful == False).count()
+    def transcribe_url(self, lead_id: str, audio_url: str) -> TranscriptionResult:
+        """Transcribe URL with caching"""
+        return self._to_transcription_result(audio_url, self.analyze_audio_with_cache(lead_id, audio_url))
+
+    def transcribe_urls(self, lead_id: str, audio_urls: List[str],
+                        db: Optional[Session] = None) -> List[TranscriptionResult]:
+        """Transcribe a lead's recording URLs with caching"""
+        return [
+            self._to_transcription_result(audio_url, analysis_result)
+            for audio_url, analysis_result in zip(
+                audio_urls, self.analyze_audios_with_cache(lead_id, audio_urls, db=db)
+            )
+        ]
 
-            return {
-                'total_transcriptions': total_transcriptions,
-                'successful_transcriptions': successful_transcriptions,
-                'failed_transcriptions': failed_transcriptions,
-                'success_rate': successful_transcriptions / total_transcriptions if total_transcriptions > 0 else 0.0
+    def close(self):
+        """Close the HTTP sessions and stop the background event loop"""
+        self.session.close()
+        self.download_session.close()
+        self._stop_async_loop()
+
+    def _stop_async_loop(self):
+        """Close the shared aiohttp session and stop the background loop, if running"""
+        with self._async_loop_lock:
+            loop, self._async_loop = self._async_loop, None
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(self._close_async_session(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            atexit.unregister(self._stop_async_loop)
+
+    @staticmethod
+    def cache_statistics_query():
+        """Build a query aggregating the transcription cache counts in one row"""
+        return select(
+            func.count(Transcription.id).label('total_transcriptions'),
+            func.coalesce(func.sum(case((Transcription.is_successful == True, 1), else_=0)), 0)
+            .label('successful_transcriptions'),
+            func.coalesce(func.sum(case((Transcription.is_successful == False, 1), else_=0)), 0)
+            .label('failed_transcriptions')
+        )
+
+    def build_cache_statistics(self, total_transcriptions: int, successful_transcriptions: int,
+                               failed_transcriptions: int) -> Dict[str, Any]:
+        """Combine database cache counts with the in-memory cache counters"""
+        with self._memory_cache_lock:
+            memory_lookups = self._memory_cache_hits + self._memory_cache_misses
+            memory_stats = {
+                'memory_cache_size': len(self._memory_cache),
+                'memory_cache_hits': self._memory_cache_hits,
+                'memory_cache_misses': self._memory_cache_misses,
+                'memory_cache_hit_rate': self._memory_cache_hits / memory_lookups if memory_lookups > 0 else 0.0
             }
 
+        return {
+            'total_transcriptions': total_transcriptions,
+            'successful_transcriptions': successful_transcriptions,
+            'failed_transcriptions': failed_transcriptions,
+            'success_rate': successful_transcriptions / total_transcriptions if total_transcriptions > 0 else 0.0,
+            **memory_stats
+        }
+
+    def get_cache_statistics(self) -> Dict[str, Any]:
+        """Get transcription cache statistics"""
+        with session_scope() as db:
+            return self.build_cache_statistics(*db.execute(self.cache_statistics_query()).one())
+
 
 class EnhancedLeadAnalyzerWithDB(LoggerMixin):
     """Enhanced Lead Analyzer with Database Integration"""
@@ -186,154 +638,225 @@ class EnhancedLeadAnalyzerWithDB(LoggerMixin):
         self.gemini_service = EnhancedGeminiService()
 
         # Junk status definitions
-        self.junk_statuses = {
-            158: "5 marta javob bermadi",
-            227: "Notog'ri raqam",
-            229: "Ariza qoldirmagan",
-            783: "Notog'ri mijoz",
-            807: "Yoshi to'g'ri kelmadi"
-        }
+        self.junk_statuses = dict(JUNK_STATUS_NAMES)
 
-        self.log_service_action("EnhancedLeadAnalyzerWithDB", "init", "Initialized with database integration")
+        # Lead status settings read once instead of through the config chain for every lead
+        self._junk_status_field = self.config.lead_status.junk_status_field
+        self._junk_status_value = self.config.lead_status.junk_status_value
+        self._active_status_value = self.config.lead_status.active_status_value
 
-    def _save_lead_to_db(self, db: Session, lead_data: Dict[str, Any]) -> Lead:
-        """Save or update lead in database"""
-        lead_id = str(lead_data['ID'])
-
-        # Check if lead exists
-        existing_lead = db.query(Lead).filter(Lead.id == lead_id).first()
+        self.log_service_action("EnhancedLeadAnalyzerWithDB", "init", "Initialized with database integration")
 
-        if existing_lead:
-            # Update existing lead
-            existing_lead.title = lead_data.get('TITLE')
-            existing_lead.status_id = lead_data.get('STATUS_ID')
-            existing_lead.junk_status = lead_data.get(self.config.lead_status.junk_status_field)
-            existing_lead.junk_status_name = self.junk_statuses.get(existing_lead.junk_status)
-            existing_lead.raw_data = lead_data
-            existing_lead.updated_at = datetime.utcnow()
+    def _junk_status_of(self, lead_data: Dict[str, Any]) -> Optional[int]:
+        """Read a lead's junk status as an int, None if missing or malformed"""
+        junk_status = lead_data.get(self._junk_status_field)
+        if junk_status is not None:
+            try:
+                junk_status = int(junk_status)
+            except (ValueError, TypeError):
+                junk_status = None
+        return junk_status
+
+    @staticmethod
+    def _recording_urls(voximplant_data: List[Dict[str, Any]]) -> List[str]:
+        """Return recording URLs of a lead's answered calls"""
+        return [
+            call_data['CALL_RECORD_URL']
+            for call_data in voximplant_data
+            if 'CALL_RECORD_URL' in call_data and call_data['CALL_FAILED_CODE'] == "200"
+        ]
+
+    def _lead_row(self, lead_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build lead column values from Bitrix lead data"""
+        date_create = None
+        if lead_data.get('DATE_CREATE'):
+            try:
+                date_create = datetime.fromisoformat(lead_data['DATE_CREATE'])
+            except ValueError:
+                pass
+
+        junk_status = self._junk_status_of(lead_data)
+
+        return {
+            'id': str(lead_data['ID']),
+            'title': lead_data.get('TITLE'),
+            'status_id': lead_data.get('STATUS_ID'),
+            'junk_status': junk_status,
+            'junk_status_name': self.junk_statuses.get(junk_status),
+            'date_create': date_create,
+            'phone': lead_data.get('PHONE'),
+            'email': lead_data.get('EMAIL'),
+            'name': lead_data.get('NAME'),
+            'raw_data': lead_data,
+            'updated_at': datetime.utcnow()
+        }
 
-            lead = existing_lead
+    def _save_lead_to_db(self, db: Session, lead_data: Dict[str, Any]):
+        """Save or update lead in database; the caller commits"""
+        self._save_leads_to_db(db, [lead_data])
+
+    def _save_leads_to_db(self, db: Session, leads_data: List[Dict[str, Any]]):
+        """Save or update leads in database with a single upsert; the caller commits"""
+        # Keep the last occurrence of a lead so one statement never touches a row twice
+        rows = list({row['id']: row for row in map(self._lead_row, leads_data)}.values())
+        if not rows:
+            return
+
+        upsert_insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+        if upsert_insert is None:
+            # No native upsert: update existing leads and insert the rest
+            existing_ids = {lead_id for (lead_id,) in
+                            db.query(Lead.id).filter(Lead.id.in_([row['id'] for row in rows]))}
+            db.bulk_update_mappings(Lead, [
+                {key: row[key] for key in ('id', *_LEAD_UPSERT_COLUMNS)}
+                for row in rows if row['id'] in existing_ids
+            ])
+            db.bulk_insert_mappings(Lead, [row for row in rows if row['id'] not in existing_ids])
         else:
-            # Create new lead
-            date_create = None
-            if lead_data.get('DATE_CREATE'):
-                try:
-                    date_create = datetime.fromisoformat(lead_data['DATE_CREATE'].replace('Z', '+00:00'))
-                except ValueError:
-                    pass
-
-            junk_status = lead_data.get(self.config.lead_status.junk_status_field)
-            if junk_status is not None:
-                try:
-                    junk_status = int(junk_status)
-                except (ValueError, TypeError):
-                    junk_status = None
-
-            lead = Lead(
-                id=lead_id,
-                title=lead_data.get('TITLE'),
-                status_id=lead_data.get('STATUS_ID'),
-                junk_status=junk_status,
-                junk_status_name=self.junk_statuses.get(junk_status),
-                date_create=date_create,
-                phone=lead_data.get('PHONE'),
-                email=lead_data.get('EMAIL'),
-                name=lead_data.get('NAME'),
-                raw_data=lead_data
-            )
+            # Rows are passed as execute parameters rather than inlined VALUES, so the compiled
+            # statement is the same for every batch size and stays in the statement cache
+            statement = upsert_insert(Lead.__table__)
+            db.execute(statement.on_conflict_do_update(
+                index_elements=[Lead.id],
+                set_={column: statement.excluded[column] for column in _LEAD_UPSERT_COLUMNS}
+            ), rows)
+
+    @staticmethod
+    def _analysis_row(lead_id: str, result: LeadAnalysisResult) -> Dict[str, Any]:
+        """Build analysis history column values from an analysis result"""
+        row = {
+            'lead_id': lead_id,
+            'original_status': result.original_status,
+            'original_junk_status': result.original_junk_status,
+            'action': result.action.value if result.action else None,
+            'reason': result.reason.value if result.reason else None,
+            'new_status': result.new_status,
+            'new_junk_status': result.new_junk_status,
+            'unsuccessful_calls_count': result.unsuccessful_calls_count,
+            'transcription_success_rate': result.transcription_success_rate,
+            'total_processing_time': result.processing_time,
+            'is_successful': result.is_successful,
+            'requires_update': result.requires_update,
+            'error_message': result.error_message,
+            'dry_run': False  # Set based on actual run mode
+        }
 
-            db.add(lead)
+        # Add AI analysis data if available
+        if result.ai_analysis:
+            row.update(
+                ai_suitable=result.ai_analysis.is_suitable,
+                ai_confidence=result.ai_analysis.confidence,
+                ai_reasoning=result.ai_analysis.reasoning,
+                ai_alternative_status=getattr(result.ai_analysis, 'alternative_status', None),
+                ai_processing_time=result.ai_analysis.processing_time,
+                ai_model_used=result.ai_analysis.model_used
+            )
 
-        db.commit()
-        db.refresh(lead)
-        return lead
+        return row
 
     def _save_analysis_to_db(self, db: Session, lead_id: str, result: LeadAnalysisResult):
-        """Save analysis result to database"""
-        analysis = AnalysisHistory(
-            lead_id=lead_id,
-            original_status=result.original_status,
-            original_junk_status=result.original_junk_status,
-            action=result.action.value if result.action else None,
-            reason=result.reason.value if result.reason else None,
-            new_status=result.new_status,
-            new_junk_status=result.new_junk_status,
-            unsuccessful_calls_count=result.unsuccessful_calls_count,
-            transcription_success_rate=result.transcription_success_rate,
-            total_processing_time=result.processing_time,
-            is_successful=result.is_successful,
-            requires_update=result.requires_update,
-            error_message=result.error_message,
-            dry_run=False  # Set based on actual run mode
-        )
+        """Save analysis result to database; the caller commits"""
+        self._save_analyses_to_db(db, [(lead_id, result)])
 
-        # Add AI analysis data if available
-        if result.ai_analysis:
-            analysis.ai_suitable = result.ai_analysis.is_suitable
-            analysis.ai_confidence = result.ai_analysis.confidence
-            analysis.ai_reasoning = result.ai_analysis.reasoning
-            analysis.ai_alternative_status = getattr(result.ai_analysis, 'alternative_status', None)
-            analysis.ai_processing_time = result.ai_analysis.processing_time
-            analysis.ai_model_used = result.ai_analysis.model_used
-
-        db.add(analysis)
-
-        # Update lead's analysis tracking
-        lead = db.query(Lead).filter(Lead.id == lead_id).first()
-        if lead:
-            lead.last_analyzed = datetime.utcnow()
-            lead.analysis_count = (lead.analysis_count or 0) + 1
-            lead.last_analysis_result = result.action.value if result.action else None
-            lead.last_analysis_reason = result.reason.value if result.reason else None
-            lead.unsuccessful_calls_count = result.unsuccessful_calls_count
-
-        db.commit()
-
-    def get_new_leads_since_last_analysis(self) -> List[Dict[str, Any]]:
-        """Get new leads since last analysis with database tracking"""
-        with next(get_db()) as db:
-            # Get last analysis time from database
-            last_analysis_time_str = db_manager.get_config_value('last_analysis_time')
-
-            if last_analysis_time_str:
-                try:
-                    last_analysis_time = datetime.fromisoformat(last_analysis_time_str)
-                except ValueError:
-                    last_analysis_time = datetime.now() - timedelta(days=1)
-            else:
-                last_analysis_time = datetime.now() - timedelta(days=1)
+    def _save_analyses_to_db(self, db: Session, analyses: List[Tuple[str, LeadAnalysisResult]]):
+        """Save analysis results to database; the caller commits them in one transaction"""
+        if not analyses:
+            return
 
-            self.logger.info(f"Checking for new leads since: {last_analysis_time}")
+        db.bulk_insert_mappings(AnalysisHistory, [
+            self._analysis_row(lead_id, result) for lead_id, result in analyses
+        ])
 
-            # Create filter for new junk leads
-            lead_filter = LeadFilter(
-                status_id=self.config.lead_status.junk_status_value,
-                junk_statuses=list(self.junk_statuses.keys()),
-                date_from=last_analysis_time,
-                limit=50
-            )
+        # Update leads' analysis tracking
+        analysis_counts = dict(
+            db.query(Lead.id, Lead.analysis_count).filter(Lead.id.in_([lead_id for lead_id, _ in analyses]))
+        )
+        now = datetime.utcnow()
+        lead_updates = {}
+        for lead_id, result in analyses:
+            if lead_id not in analysis_counts:
+                continue
+            analysis_counts[lead_id] = (analysis_counts[lead_id] or 0) + 1
+            lead_updates[lead_id] = {
+                'id': lead_id,
+                'last_analyzed': now,
+                'analysis_count': analysis_counts[lead_id],
+                'last_analysis_result': result.action.value if result.action else None,
+                'last_analysis_reason': result.reason.value if result.reason else None,
+                'unsuccessful_calls_count': result.unsuccessful_calls_count
+            }
+        db.bulk_update_mappings(Lead, list(lead_updates.values()))
 
-            # Get leads from Bitrix24
-            leads = self.bitrix_service.get_leads(lead_filter)
+    def get_new_leads_since_last_analysis(self, claim: bool = True) -> List[Dict[str, Any]]:
+        """Get new leads since last analysis with database tracking; claim=False leaves them for other runs"""
+        # Get last analysis time from database
+        last_analysis_time_str = get_db_manager().get_config_value('last_analysis_time')
 
-            # Convert to dict format and save to database
-            leads_data = []
-            for lead in leads:
-                lead_dict = lead.raw_data
+        if last_analysis_time_str:
+            try:
+                last_analysis_time = datetime.fromisoformat(last_analysis_time_str)
+            except ValueError:
+                last_analysis_time = datetime.now() - timedelta(days=1)
+        else:
+            last_analysis_time = datetime.now() - timedelta(days=1)
+
+        self.logger.info("Checking for new leads since: %s", last_analysis_time)
+
+        # Create filter for new junk leads
+        lead_filter = LeadFilter(
+            status_id=self._junk_status_value,
+            junk_statuses=list(self.junk_statuses.keys()),
+            date_from=last_analysis_time,
+            limit=50
+        )
 
-                # Save to database
-                self._save_lead_to_db(db, lead_dict)
-                leads_data.append(lead_dict)
+        # Get leads from Bitrix24
+        leads = self.bitrix_service.get_leads(lead_filter)
+
+        # Convert to dict format and save to database; the session is only held for the upsert and claim
+        leads_data = [lead.raw_data for lead in leads]
+        with session_scope() as db:
+            self._save_leads_to_db(db, leads_data)
+            if not claim:
+                self.logger.info("Found %s new leads", len(leads_data))
+                return leads_data
+            claimed_ids = self._claim_leads(db, [str(lead_data['ID']) for lead_data in leads_data],
+                                            last_analysis_time)
+
+        skipped = len(leads_data) - len(claimed_ids)
+        if skipped:
+            self.logger.info("Skipping %s leads already claimed by another analyzer run", skipped)
+        leads_data = [lead_data for lead_data in leads_data if str(lead_data['ID']) in claimed_ids]
+
+        self.logger.info("Found %s new leads", len(leads_data))
+        return leads_data
+
+    @staticmethod
+    def _claim_leads(db: Session, lead_ids: List[str], analyzed_before: datetime) -> set:
+        """Mark leads as taken by this run, returning the ids no other run has claimed; the caller commits"""
+        if not lead_ids:
+            return set()
+        claimed_at = datetime.utcnow()
+        params = {
+            'lead_ids': lead_ids,
+            'analyzed_before': analyzed_before,
+            'stale_before': claimed_at - _LEAD_CLAIM_TTL,
+            'claimed_at': claimed_at
+        }
+        if db.get_bind().dialect.update_returning:
+            return set(db.execute(_CLAIM_LEADS_STATEMENT, params).scalars())
 
-            self.logger.info(f"Found {len(leads_data)} new leads")
-            return leads_data
+        claimed_ids = list(db.execute(_LOCK_CLAIMABLE_LEADS_QUERY, params).scalars())
+        if claimed_ids:
+            db.execute(_STAMP_LEADS_STATEMENT, {'claimed_ids': claimed_ids, 'claimed_at': claimed_at})
+        return set(claimed_ids)
 
     def analyze_new_leads(self, dry_run: bool = False) -> BatchAnalysisResult:
         """Analyze new leads with database integration"""
         batch_id = f"new_leads_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         batch_result = BatchAnalysisResult(batch_id=batch_id)
 
-        with next(get_db()) as db:
+        with session_scope() as db:
             # Record scheduler state
             scheduler_state = SchedulerState(
                 last_analysis_time=datetime.utcnow(),
@@ -347,7 +870,8 @@ class EnhancedLeadAnalyzerWithDB(LoggerMixin):
                 self.logger.info("Starting analysis of new leads with database caching")
 
                 # Get new leads
-                leads_data = self.get_new_leads_since_last_analysis()
+                # A dry run changes nothing, so it must not hide leads from the next real run
+                leads_data = self.get_new_leads_since_last_analysis(claim=not dry_run)
 
                 if not leads_data:
                     self.logger.info("No new leads found")
@@ -357,31 +881,47 @@ class EnhancedLeadAnalyzerWithDB(LoggerMixin):
                     batch_result.mark_completed()
                     return batch_result
 
-                # Analyze each lead
-                for lead_data in leads_data:
-                    try:
-                        lead_id = str(lead_data['ID'])
-                        result = self._analyze_single_lead_with_db(lead_data, dry_run)
-                        batch_result.add_result(result)
+                voximplant_data = self._prefetch_recordings(leads_data)
 
-                        # Save analysis to database
-                        self._save_analysis_to_db(db, lead_id, result)
+                # Leads are dominated by network waits, so analyze them on worker threads; Bitrix calls
+                # stay capped by the service's request slots in place of a fixed per-lead delay
+                with ThreadPoolExecutor(max_workers=self.config.scheduler.max_parallel_leads) as executor:
+                    # Workers only decide; status changes are written afterwards in batched requests
+                    futures = {
+                        executor.submit(self._analyze_single_lead_with_db, lead_data, True, None,
+                                        voximplant_data.get(str(lead_data['ID']))): lead_data
+                        for lead_data in leads_data
+                    }
 
-                        # Small delay between leads
-                        time.sleep(self.config.scheduler.delay_between_leads)
+                    # The batch session stays on this thread; results are saved together once all complete
+                    analyses = []
+                    for future in as_completed(futures):
+                        lead_data = futures[future]
+                        try:
+                            lead_id = str(lead_data['ID'])
+                            result = future.result()
+                            batch_result.add_result(result)
+                            analyses.append((lead_id, result))
+
+                        except Exception as e:
+                            self.log_lead_action(lead_data['ID'], "analyze_error", "Error: %s", e)
+                            error_result = LeadAnalysisResult(
+                                lead_id=str(lead_data['ID']),
+                                original_status=lead_data.get('STATUS_ID'),
+                                original_junk_status=lead_data.get(self._junk_status_field)
+                            )
+                            error_result.set_error(str(e))
+                            batch_result.add_result(error_result)
 
-                    except Exception as e:
-                        self.log_lead_action(lead_data['ID'], "analyze_error", f"Error: {e}")
-                        error_result = LeadAnalysisResult(
-                            lead_id=str(lead_data['ID']),
-                            original_status=lead_data.get('STATUS_ID'),
-                            original_junk_status=lead_data.get(self.config.lead_status.junk_status_field)
-                        )
-                        error_result.set_error(str(e))
-                        batch_result.add_result(error_result)
+                if not dry_run:
+                    self._apply_status_updates([result for _, result in analyses])
+
+                # Save analyses to database; committed before the config write, which uses its own session
+                self._save_analyses_to_db(db, analyses)
+                db.commit()
 
                 # Update last analysis time
-                db_manager.set_config_value('last_analysis_time', datetime.utcnow().isoformat())
+                get_db_manager().set_config_value('last_analysis_time', datetime.utcnow().isoformat())
 
                 # Update scheduler state
                 scheduler_state.status = 'completed'
@@ -394,28 +934,111 @@ class EnhancedLeadAnalyzerWithDB(LoggerMixin):
                 db.commit()
                 batch_result.mark_completed()
 
-                self.logger.info(f"Analysis completed: {batch_result.success_rate:.2f} success rate")
+                self.logger.info("Analysis completed: %.2f success rate", batch_result.success_rate)
                 return batch_result
 
             except Exception as e:
-                self.logger.error(f"Error in lead analysis: {e}")
+                self.logger.error("Error in lead analysis: %s", e)
                 scheduler_state.status = 'failed'
                 scheduler_state.error_message = str(e)
                 scheduler_state.completed_at = datetime.utcnow()
                 db.commit()
                 raise LeadAnalyzerError(f"Lead analysis failed: {e}")
 
-    def _analyze_single_lead_with_db(self, lead_data: Dict[str, Any], dry_run: bool = False) -> LeadAnalysisResult:
-        """Analyze single lead with database integration"""
-        lead_id = str(lead_data['ID'])
-        junk_status = lead_data.get(self.config.lead_status.junk_status_field)
+    def _apply_status_updates(self, results: List[LeadAnalysisResult]):
+        """Write the decided status changes to Bitrix24 together, marking leads whose update failed"""
+        pending = {result.lead_id: result for result in results if result.requires_update}
+        if not pending:
+            return
 
-        # Convert junk status to int
-        if junk_status is not None:
+        try:
+            updated = self.bitrix_service.batch_update_leads({
+                lead_id: (result.new_status, result.new_junk_status) for lead_id, result in pending.items()
+            })
+        except Exception as e:
+            self.logger.error("Error updating lead statuses: %s", e)
+            updated = {}
+
+        for lead_id, result in pending.items():
+            if not updated.get(lead_id):
+                result.set_error("Failed to update lead status")
+
+    def _prefetch_recordings(self, leads_data: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        """Fetch target leads' call records in batches, then transcribe and analyze the AI-analyzed ones together"""
+        junk_statuses = {}
+        for lead_data in leads_data:
+            junk_status = self._junk_status_of(lead_data)
+            if junk_status in self.junk_statuses:
+                junk_statuses[str(lead_data['ID'])] = junk_status
+        if not junk_statuses:
+            return {}
+
+        try:
+            voximplant_data = self.bitrix_service.batch_get_voximplant_call_data(list(junk_statuses))
+        except Exception as e:
+            self.logger.warning("Error prefetching call records, fetching per lead: %s", e)
+            return {}
+
+        # Status 158 is decided from call counts alone
+        ai_call_data = {
+            lead_id: call_data for lead_id, call_data in voximplant_data.items()
+            if junk_statuses[lead_id] != 158
+        }
+
+        # Recordings shared between leads are looked up and transcribed once; the leads' own
+        # transcription calls are then served from the in-memory cache
+        recordings = [
+            (lead_id, audio_url)
+            for lead_id, call_data in ai_call_data.items()
+            for audio_url in self._recording_urls(call_data)
+        ]
+        if recordings:
             try:
-                junk_status = int(junk_status)
-            except (ValueError, TypeError):
-                junk_status = None
+                analyzed = self.transcription_service.analyze_audios_batch(recordings)
+            except Exception as e:
+                self.logger.warning("Error prefetching transcriptions: %s", e)
+            else:
+                self._prefetch_ai_decisions(junk_statuses, ai_call_data, analyzed)
+
+        return voximplant_data
+
+    def _prefetch_ai_decisions(self, junk_statuses: Dict[str, int],
+                               voximplant_data: Dict[str, List[Dict[str, Any]]],
+                               analyzed: Dict[str, Dict[str, Any]]):
+        """Analyze the leads' combined transcriptions several per Gemini request.
+
+        The results land in the Gemini service's result cache, so each lead's own
+        analyze_lead_status call returns without another model round-trip.
+        """
+        lead_transcriptions = []
+        for lead_id, call_data in voximplant_data.items():
+            transcriptions = [
+                self.transcription_service._to_transcription_result(audio_url, analyzed[audio_url])
+                for audio_url in self._recording_urls(call_data)
+                if audio_url in analyzed
+            ]
+            # Must match the text _analyze_with_ai_and_db builds, or the cache is missed
+            combined_transcription = "\n\n".join(tr.transcription for tr in transcriptions if tr.is_successful)
+            if combined_transcription:
+                junk_status = junk_statuses[lead_id]
+                lead_transcriptions.append({
+                    'transcription': combined_transcription,
+                    'junk_status': junk_status,
+                    'status_name': self.junk_statuses.get(junk_status, "Unknown")
+                })
+
+        if lead_transcriptions:
+            try:
+                self.gemini_service.analyze_leads_grouped(lead_transcriptions)
+            except Exception as e:
+                self.logger.warning("Error prefetching AI decisions: %s", e)
+
+    def _analyze_single_lead_with_db(self, lead_data: Dict[str, Any], dry_run: bool = False,
+                                     db: Optional[Session] = None,
+                                     voximplant_data: Optional[List[Dict[str, Any]]] = None) -> LeadAnalysisResult:
+        """Analyze single lead with database integration"""
+        lead_id = str(lead_data['ID'])
+        junk_status = self._junk_status_of(lead_data)
 
         result = LeadAnalysisResult(
             lead_id=lead_id,
@@ -424,7 +1047,7 @@ class EnhancedLeadAnalyzerWithDB(LoggerMixin):
         )
 
         try:
-            self.log_lead_action(lead_id, "analyze", f"Analyzing junk status {junk_status}")
+            self.log_lead_action(lead_id, "analyze", "Analyzing junk status %s", junk_status)
 
             # Check if valid junk status
             if junk_status not in self.junk_statuses:
@@ -434,29 +1057,33 @@ class EnhancedLeadAnalyzerWithDB(LoggerMixin):
 
             # Handle status 158 (5 unsuccessful calls)
             if junk_status == 158:
-                result = self._analyze_unsuccessful_calls_with_db(lead_id, result, dry_run)
+                result = self._analyze_unsuccessful_calls_with_db(lead_id, result, dry_run, voximplant_data)
             else:
                 # Other statuses: use AI analysis
-                result = self._analyze_with_ai_and_db(lead_id, result, dry_run)
+                result = self._analyze_with_ai_and_db(lead_id, result, dry_run, db, voximplant_data)
 
             result.mark_completed()
             return result
 
         except Exception as e:
-            self.log_lead_action(lead_id, "analyze_error", f"Analysis error: {e}")
+            self.log_lead_action(lead_id, "analyze_error", "Analysis error: %s", e)
             result.set_error(str(e))
             return result
 
-    def _analyze_unsuccessful_calls_with_db(self, lead_id: str, result: LeadAnalysisResult,
-                                            dry_run: bool) -> LeadAnalysisResult:
+    def _analyze_unsuccessful_calls_with_db(self, lead_id: str, result: LeadAnalysisResult, dry_run: bool,
+                                            voximplant_data: Optional[List[Dict[str, Any]]] = None
+                                            ) -> LeadAnalysisResult:
         """Analyze unsuccessful calls for status 158"""
         try:
-            # Get call statistics from Voximplant
-            call_stats = self.bitrix_service.get_lead_call_statistics(lead_id)
+            # Get call statistics from Voximplant unless the batch already fetched the calls
+            if voximplant_data is None:
+                call_stats = self.bitrix_service.get_lead_call_statistics(lead_id)
+            else:
+                call_stats = self.bitrix_service.build_call_statistics(voximplant_data)
             unsuccessful_calls = call_stats['unsuccessful_calls']
 
             result.unsuccessful_calls_count = unsuccessful_calls
-            self.log_lead_action(lead_id, "call_analysis", f"Found {unsuccessful_calls} unsuccessful calls")
+            self.log_lead_action(lead_id, "call_analysis", "Found %s unsuccessful calls", unsuccessful_calls)
 
             if unsuccessful_calls >= 5:
                 # Keep current junk status
@@ -464,7 +1091,7 @@ class EnhancedLeadAnalyzerWithDB(LoggerMixin):
                 self.log_lead_action(lead_id, "decision", "Keeping status - sufficient calls")
             else:
                 # Change to active status
-                new_status = self.config.lead_status.active_status_value
+                new_status = self._active_status_value
                 result.set_action(
                     AnalysisAction.CHANGE_STATUS,
                     AnalysisReason.INSUFFICIENT_CALLS,
@@ -486,48 +1113,38 @@ class EnhancedLeadAnalyzerWithDB(LoggerMixin):
             result.set_error(f"Error analyzing calls: {e}")
             return result
 
-    def _analyze_with_ai_and_db(self, lead_id: str, result: LeadAnalysisResult,
-                                dry_run: bool) -> LeadAnalysisResult:
+    def _analyze_with_ai_and_db(self, lead_id: str, result: LeadAnalysisResult, dry_run: bool,
+                                db: Optional[Session] = None,
+                                voximplant_data: Optional[List[Dict[str, Any]]] = None) -> LeadAnalysisResult:
         """Analyze lead using AI with database caching"""
         try:
-            # Get audio files from Voximplant
-            voximplant_data = self.bitrix_service.get_voximplant_call_data(lead_id)
+            # Get audio files from Voximplant unless the batch already fetched them
+            if voximplant_data is None:
+                voximplant_data = self.bitrix_service.get_voximplant_call_data(lead_id)
 
-            audio_files = []
-            for call_data in voximplant_data:
-                if 'CALL_RECORD_URL' in call_data and call_data['CALL_FAILED_CODE'] == "200":
-                    audio_files.append(call_data['CALL_RECORD_URL'])
+            audio_files = self._recording_urls(voximplant_data)
 
             if not audio_files:
                 result.set_action(AnalysisAction.SKIP, AnalysisReason.NO_AUDIO_FILES)
                 self.log_lead_action(lead_id, "ai_analysis", "No audio files found")
                 return result
 
-            self.log_lead_action(lead_id, "ai_analysis", f"Found {len(audio_files)} audio files")
+            self.log_lead_action(lead_id, "ai_analysis", "Found %s audio files", len(audio_files))
 
-            # Analyze all audio files with caching
-            transcription_results = []
-            all_transcription_text = []
-
-            for audio_file in audio_files:
-                try:
-                    # Use cached transcription service
-                    transcription_result = self.transcription_service.transcribe_url(lead_id, audio_file)
-                    transcription_results.append(transcription_result)
-                    result.add_transcription_result(transcription_result)
+            # Analyze all audio files with caching; uncached recordings are transcribed concurrently
+            try:
+                transcription_results = self.transcription_service.transcribe_urls(lead_id, audio_files, db)
+            except Exception as e:
+                self.log_lead_action(lead_id, "transcription_error", "Error transcribing audio files: %s", e)
+                transcription_results = [
+                    TranscriptionResult(audio_file=audio_file, transcription='', error=str(e))
+                    for audio_file in audio_files
+                ]
 
-                    if transcription_result.is_successful:
-                        all_transcription_text.append(transcription_result.transcription)
+            for transcription_result in transcription_results:
+                result.add_transcription_result(transcription_result)
 
-                except Exception as e:
-                    self.log_lead_action(lead_id, "transcription_error", f"Error transcribing {audio_file}: {e}")
-                    error_transcription = TranscriptionResult(
-                        audio_file=audio_file,
-                        transcription='',
-                        error=str(e)
-                    )
-                    transcription_results.append(error_transcription)
-                    result.add_transcription_result(error_transcription)
+            all_transcription_text = [tr.transcription for tr in transcription_results if tr.is_successful]
 
             # Check if we have successful transcriptions
             successful_transcriptions = [tr for tr in transcription_results if tr.is_successful]
@@ -540,7 +1157,7 @@ class EnhancedLeadAnalyzerWithDB(LoggerMixin):
             # Combine all transcriptions
             combined_transcription = "\n\n".join(all_transcription_text)
 
-            self.log_lead_action(lead_id, "ai_analysis", f"Analyzing {len(successful_transcriptions)} transcriptions")
+            self.log_lead_action(lead_id, "ai_analysis", "Analyzing %s transcriptions", len(successful_transcriptions))
 
             # Analyze with Enhanced Gemini AI
             status_name = self.junk_statuses.get(result.original_junk_status, "Unknown")
@@ -566,21 +1183,22 @@ class EnhancedLeadAnalyzerWithDB(LoggerMixin):
                     result.set_action(
                         AnalysisAction.CHANGE_STATUS,
                         AnalysisReason.AI_NOT_SUITABLE,
-                        new_status=self.config.lead_status.junk_status_value,  # Keep as JUNK
+                        new_status=self._junk_status_value,  # Keep as JUNK
                         new_junk_status=alternative_status  # Change to alternative status
                     )
 
                     self.log_lead_action(
                         lead_id,
                         "decision",
-                        f"Changing junk status from {result.original_junk_status} to {alternative_status} ({alternative_name})"
+                        "Changing junk status from %s to %s (%s)",
+                        result.original_junk_status, alternative_status, alternative_name
                     )
 
                     # Update lead status if not dry run
                     if not dry_run:
                         success = self.bitrix_service.update_lead_complete(
                             lead_id,
-                            self.config.lead_status.junk_status_value,
+                            self._junk_status_value,
                             alternative_status
                         )
                         if not success:
@@ -591,7 +1209,7 @@ class EnhancedLeadAnalyzerWithDB(LoggerMixin):
                     self.log_lead_action(lead_id, "decision", "Keeping status - AI says suitable")
             else:
                 # Change to active status - AI says lead is not junk at all
-                new_status = self.config.lead_status.active_status_value
+                new_status = self._active_status_value
                 result.set_action(
                     AnalysisAction.CHANGE_STATUS,
                     AnalysisReason.AI_NOT_SUITABLE,
@@ -609,12 +1227,12 @@ class EnhancedLeadAnalyzerWithDB(LoggerMixin):
 
             # Log AI reasoning
             if ai_result.reasoning:
-                self.log_lead_action(lead_id, "ai_reasoning", f"AI Decision Details:\n{ai_result.reasoning}")
+                self.log_lead_action(lead_id, "ai_reasoning", "AI Decision Details:\n%s", ai_result.reasoning)
 
             return result
 
         except Exception as e:
-            self.logger.error(f"Error in AI analysis: {e}")
+            self.logger.error("Error in AI analysis: %s", e)
             result.set_error(f"Error in AI analysis: {e}")
             return result
 
@@ -630,44 +1248,60 @@ class EnhancedLeadAnalyzerWithDB(LoggerMixin):
                 self.log_lead_action(lead_id, "analyze_error", "Lead not found")
                 return None
 
-            # Save lead to database
-            with next(get_db()) as db:
+            # One session for the lead, its transcriptions and its analysis
+            with session_scope() as db:
+                # Save lead to database, committing before the slow analysis so no write transaction stays open
                 self._save_lead_to_db(db, lead.raw_data)
+                db.commit()
 
-            # Analyze the lead
-            result = self._analyze_single_lead_with_db(lead.raw_data, dry_run)
+                # Analyze the lead
+                result = self._analyze_single_lead_with_db(lead.raw_data, dry_run, db)
 
-            # Save analysis to database
-            with next(get_db()) as db:
+                # Save analysis to database
                 self._save_analysis_to_db(db, lead_id, result)
 
             self.log_lead_action(lead_id, "analyze_complete",
-                                 f"Analysis completed: {result.action.value if result.action else 'unknown'}")
+                                 "Analysis completed: %s", result.action.value if result.action else 'unknown')
             return result
 
         except Exception as e:
-            self.log_lead_action(lead_id, "analyze_error", f"Error analyzing lead: {e}")
+            self.log_lead_action(lead_id, "analyze_error", "Error analyzing lead: %s", e)
             error_result = LeadAnalysisResult(lead_id=lead_id)
             error_result.set_error(str(e))
             return error_result
 
     def get_analysis_statistics(self) -> Dict[str, Any]:
         """Get comprehensive analysis statistics from database"""
-        with next(get_db()) as db:
-            # Lead statistics
-            total_leads = db.query(Lead).count()
-            analyzed_leads = db.query(Lead).filter(Lead.last_analyzed.isnot(None)).count()
-
-            # Analysis history statistics
-            total_analyses = db.query(AnalysisHistory).count()
-            successful_analyses = db.query(AnalysisHistory).filter(AnalysisHistory.is_successful == True).count()
-            leads_updated = db.query(AnalysisHistory).filter(AnalysisHistory.requires_update == True).count()
+        with session_scope() as db:
+            # Lead, analysis history and transcription cache counts, aggregated per table in one round trip
+            lead_counts = select(
+                func.count(Lead.id).label('total_leads'),
+                func.count(Lead.last_analyzed).label('analyzed_leads')
+            ).subquery()
+            analysis_counts = select(
+                func.count(AnalysisHistory.id).label('total_analyses'),
+                func.coalesce(func.sum(case((AnalysisHistory.is_successful == True, 1), else_=0)), 0)
+                .label('successful_analyses'),
+                func.coalesce(func.sum(case((AnalysisHistory.requires_update == True, 1), else_=0)), 0)
+                .label('leads_updated')
+            ).subquery()
+            transcription_counts = self.transcription_service.cache_statistics_query().subquery()
+
+            counts = db.execute(
+                select(lead_counts, analysis_counts, transcription_counts).select_from(
+                    lead_counts.join(analysis_counts, true()).join(transcription_counts, true())
+                )
+            ).one()
 
-            # Transcription cache statistics
-            transcription_stats = self.transcription_service.get_cache_statistics()
+            total_leads, analyzed_leads = counts.total_leads, counts.analyzed_leads
+            total_analyses = counts.total_analyses
+            successful_analyses, leads_updated = counts.successful_analyses, counts.leads_updated
+            transcription_stats = self.transcription_service.build_cache_statistics(
+                counts.total_transcriptions, counts.successful_transcriptions, counts.failed_transcriptions
+            )
 
             # Recent scheduler runs
-            recent_runs = db.query(SchedulerState).order_by(SchedulerState.created_at.desc()).limit(5).all()
+            recent_runs = db.execute(_RECENT_RUNS_QUERY).scalars().all()
 
             return {
                 'leads': {
@@ -682,6 +1316,7 @@ class EnhancedLeadAnalyzerWithDB(LoggerMixin):
                     'success_rate': successful_analyses / total_analyses if total_analyses > 0 else 0.0
                 },
                 'transcription_cache': transcription_stats,
+                'database_pool': get_db_manager().get_pool_status(),
                 'recent_scheduler_runs': [
                     {
                         'started_at': run.started_at.isoformat() if run.started_at else None,
@@ -697,21 +1332,16 @@ class EnhancedLeadAnalyzerWithDB(LoggerMixin):
 
     def get_lead_history(self, lead_id: str) -> Dict[str, Any]:
         """Get complete history for a specific lead"""
-        with next(get_db()) as db:
+        with session_scope() as db:
             # Get lead info
-            lead = db.query(Lead).filter(Lead.id == lead_id).first()
+            lead = db.get(Lead, lead_id)
             if not lead:
                 return {'error': 'Lead not found'}
 
-            # Get analysis history
-            analyses = db.query(AnalysisHistory).filter(
-                AnalysisHistory.lead_id == lead_id
-            ).order_by(AnalysisHistory.analysis_date.desc()).all()
-
-            # Get transcriptions
-            transcriptions = db.query(Transcription).filter(
-                Transcription.lead_id == lead_id
-            ).order_by(Transcription.created_at.desc()).all()
+            # Get analysis history and transcriptions, newest first
+            params = {'lead_id': lead_id}
+            analyses = db.execute(_LEAD_ANALYSES_QUERY, params).all()
+            transcriptions = db.execute(_LEAD_TRANSCRIPTIONS_QUERY, params).all()
 
             return {
                 'lead': {
@@ -727,27 +1357,14 @@ class EnhancedLeadAnalyzerWithDB(LoggerMixin):
                     'unsuccessful_calls_count': lead.unsuccessful_calls_count
                 },
                 'analysis_history': [
-                    {
-                        'analysis_date': analysis.analysis_date.isoformat(),
-                        'action': analysis.action,
-                        'reason': analysis.reason,
-                        'original_junk_status': analysis.original_junk_status,
-                        'new_junk_status': analysis.new_junk_status,
-                        'ai_suitable': analysis.ai_suitable,
-                        'ai_reasoning': analysis.ai_reasoning,
-                        'ai_alternative_status': analysis.ai_alternative_status,
-                        'processing_time': analysis.total_processing_time,
-                        'is_successful': analysis.is_successful
-                    }
+                    {**analysis._mapping, 'analysis_date': analysis.analysis_date.isoformat()}
                     for analysis in analyses
                 ],
                 'transcriptions': [
                     {
-                        'audio_url': trans.audio_url,
+                        **trans._mapping,
                         'transcription_text': trans.transcription_text[:200] + '...' if len(
                             trans.transcription_text) > 200 else trans.transcription_text,
-                        'confidence': trans.confidence,
-                        'is_successful': trans.is_successful,
                         'created_at': trans.created_at.isoformat()
                     }
                     for trans in transcriptions
@@ -758,80 +1375,66 @@ class EnhancedLeadAnalyzerWithDB(LoggerMixin):
         """Clean up old analysis and transcription data"""
         cutoff_date = datetime.utcnow() - timedelta(days=days)
 
-        with next(get_db()) as db:
+        with session_scope() as db:
             # Clean old analysis history
-            old_analyses = db.query(AnalysisHistory).filter(
-                AnalysisHistory.analysis_date < cutoff_date
-            ).count()
-
-            db.query(AnalysisHistory).filter(
-                AnalysisHistory.analysis_date < cutoff_date
-            ).delete()
+            old_analyses = self._delete_in_batches(db, AnalysisHistory, AnalysisHistory.analysis_date < cutoff_date)
 
             # Clean old scheduler states
-            old_scheduler_states = db.query(SchedulerState).filter(
-                SchedulerState.created_at < cutoff_date
-            ).count()
-
-            db.query(SchedulerState).filter(
-                SchedulerState.created_at < cutoff_date
-            ).delete()
+            old_scheduler_states = self._delete_in_batches(db, SchedulerState, SchedulerState.created_at < cutoff_date)
 
             # Keep transcriptions as they are valuable cache
 
+            self.logger.info("Cleaned up %s old analyses and %s old scheduler states",
+                             old_analyses, old_scheduler_states)
+
+    @staticmethod
+    def _delete_in_batches(db: Session, model, condition) -> int:
+        """Delete matching rows a batch per transaction and return how many were removed"""
+        total = 0
+        while True:
+            batch_ids = select(model.id).where(condition).limit(_CLEANUP_BATCH_SIZE)
+            deleted = db.execute(
+                delete(model).where(model.id.in_(batch_ids)).execution_options(synchronize_session=False)
+            ).rowcount
             db.commit()
-
-            self.logger.info(f"Cleaned up {old_analyses} old analyses and {old_scheduler_states} old scheduler states")
+            total += deleted
+            if deleted < _CLEANUP_BATCH_SIZE:
+                return total
+
+    def _probe_transcription_service(self) -> bool:
+        """Check that the transcription service answers"""
+        response = self.transcription_service.session.get(
+            "http://127.0.0.1:8101", timeout=self.config.scheduler.health_check_timeout_seconds
+        )
+        return response.status_code == 200
 
     def check_health(self) -> Dict[str, bool]:
         """Check health of all services including database"""
-        health_status = {}
-
-        # Check Bitrix service
-        try:
-            health_status['bitrix'] = self.bitrix_service.test_connection()
-        except Exception:
-            health_status['bitrix'] = False
-
-        # Check transcription service
-        try:
-            response = requests.get("http://127.0.0.1:8101", timeout=5)
-            health_status['transcription'] = response.status_code == 200
-        except Exception:
-            health_status['transcription'] = False
-
-        # Check Gemini service
-        try:
-            health_status['gemini'] = self.gemini_service.test_connection()
-        except Exception:
-            health_status['gemini'] = False
-
-        # Check database
-        try:
-            with next(get_db()) as db:
-                db.execute("SELECT 1")
-                health_status['database'] = True
-        except Exception:
-            health_status['database'] = False
+        probes = {
+            'bitrix': self.bitrix_service.test_connection,
+            'transcription': self._probe_transcription_service,
+            'gemini': self.gemini_service.test_connection,
+            'database': get_db_manager().ping
+        }
 
-        return health_status
+        return run_health_probes(probes, self.config.scheduler.health_check_timeout_seconds, self.logger)
 
     def close(self):
         """Close all services and cleanup resources"""
         try:
             self.bitrix_service.close()
         except Exception as e:
-            self.logger.warning(f"Error closing Bitrix service: {e}")
+            self.logger.warning("Error closing Bitrix service: %s", e)
 
         try:
-            self.transcription_service.session.close()
+            self.transcription_service.close()
         except Exception as e:
-            self.logger.warning(f"Error closing transcription service: {e}")
+            self.logger.warning("Error closing transcription service: %s", e)
 
         try:
             self.gemini_service.close()
         except Exception as e:
-            self.logger.warning(f"Error closing Gemini service: {e}")
+            self.logger.warning("Error closing Gemini service: %s", e)
 
         self.log_service_action("EnhancedLeadAnalyzerWithDB", "close", "Service closed")
 
@@ -3,7 +3,6 @@ Comprehensive health check script
 """
 
 import sys
-import json
 from datetime import datetime
 
 # Add app to Python path
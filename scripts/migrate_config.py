@@ -34,11 +34,15 @@ LOG_BACKUP_COUNT=5
 
 # Performance tuning
 BATCH_PROCESSING_SIZE=20
-CONNECTION_POOL_SIZE=10
+CONNECTION_POOL_SIZE=32
 """
 
     if os.path.exists('.env'):
-        with open('.env', 'a') as f:
+        with open('.env', 'r+') as f:
+            # Re-running the migration must not append the options again
+            if "# Version 2.0 additions" in f.read():
+                print("✅ Configuration already at v2.0")
+                return
             f.write(new_options)
         print("✅ Configuration updated to v2.0")
     else:
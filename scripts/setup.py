@@ -1,11 +1,19 @@
 """
 Automated setup script for Bitrix24 Lead Analyzer
 """
+import hashlib
 import os
 import subprocess
 import sys
+from pathlib import Path
 
-from Scripts.activate_this import path
+# Directories the application writes to
+_DIRECTORIES = ('logs', 'data/temp_audio', 'data/backups', 'tests')
+
+# Hash of the requirements last installed successfully and the interpreter they went into;
+# pip is skipped while both still match
+_REQUIREMENTS_FILE = Path('requirements.txt')
+_REQUIREMENTS_STAMP = Path('.setup_cache/requirements.sha256')
 
 
 def check_python_version():
@@ -35,15 +43,8 @@ def check_docker():
 
 def create_directories():
     """Create required directories"""
-    directories = [
-        'logs',
-        'data/temp_audio',
-        'data/backups',
-        'tests'
-    ]
-
-    for dir_path in directories:
-        path(dir_path).mkdir(parents=True, exist_ok=True)
+    for dir_path in _DIRECTORIES:
+        Path(dir_path).mkdir(parents=True, exist_ok=True)
         print(f"✅ Created directory: {dir_path}")
 
 
@@ -53,22 +54,39 @@ def create_env_file():
 BITRIX_WEBHOOK_URL=https://your-domain.bitrix24.com/rest/USER_ID/WEBHOOK_CODE
 BITRIX_TIMEOUT_SECONDS=30
 BITRIX_MAX_RETRIES=3
+BITRIX_MAX_CONCURRENT_REQUESTS=2
 
 # Transcription Service Configuration  
 TRANSCRIPTION_SERVICE_URL=http://localhost:8101
 TRANSCRIPTION_TIMEOUT_SECONDS=60
 TRANSCRIPTION_MAX_RETRIES=3
+# Absolute path of the transcription cache database; leave empty to disable the cache
+TRANSCRIPTION_CACHE_PATH=
+TRANSCRIPTION_CACHE_TTL_HOURS=720
+TRANSCRIPTION_CACHE_MAX_ENTRIES=100000
+TRANSCRIPTION_MIN_DURATION_SECONDS=2.0
+TRANSCRIPTION_COMPRESS_UPLOADS=false
+TRANSCRIPTION_WARMUP_ON_STARTUP=false
+TRANSCRIPTION_WARMUP_IDLE_MINUTES=30
+CONNECTION_POOL_SIZE=32
+HTTP_POOL_BLOCK=false
+HTTP_KEEPALIVE_TIMEOUT=75
 
 # Google Gemini AI Configuration
 GEMINI_API_KEY=your_gemini_api_key_here
 GEMINI_MODEL_NAME=gemini-pro
 GEMINI_TIMEOUT_SECONDS=30
 GEMINI_MAX_RETRIES=3
+GEMINI_MAX_CONCURRENCY=5
+GEMINI_REQUESTS_PER_MINUTE=60
 
 # Application Settings
 CHECK_INTERVAL_HOURS=24
 MAX_CONCURRENT_LEADS=10
 DELAY_BETWEEN_LEADS=2.0
+MAX_PARALLEL_LEADS=4
+HEALTH_CHECK_TIMEOUT_SECONDS=5.0
+ASYNC_ANALYZER=false
 LOG_LEVEL=INFO
 LOG_FILE=logs/app.log
 ERROR_LOG_FILE=logs/error.log
@@ -92,10 +110,27 @@ ACTIVE_STATUS_VALUE=NEW
 
 def install_dependencies():
     """Install Python dependencies"""
+    try:
+        requirements = _REQUIREMENTS_FILE.read_bytes()
+    except OSError:
+        requirements_hash = None
+    else:
+        # A different venv or interpreter has none of the packages, whatever the requirements say
+        interpreter = f"{sys.prefix}\n{sys.executable}\n".encode()
+        requirements_hash = hashlib.sha256(interpreter + requirements).hexdigest()
+
+    if requirements_hash and _REQUIREMENTS_STAMP.is_file() \
+            and _REQUIREMENTS_STAMP.read_text().strip() == requirements_hash:
+        print("✅ Dependencies already installed (requirements and interpreter unchanged)")
+        return True
+
     try:
         print("📦 Installing Python dependencies...")
-        subprocess.run([sys.executable, '-m', 'pip', 'install', '-r', 'requirements.txt'],
+        subprocess.run([sys.executable, '-m', 'pip', 'install', '--prefer-binary', '-r', str(_REQUIREMENTS_FILE)],
                        check=True)
+        if requirements_hash:
+            _REQUIREMENTS_STAMP.parent.mkdir(parents=True, exist_ok=True)
+            _REQUIREMENTS_STAMP.write_text(requirements_hash)
         print("✅ Dependencies installed successfully")
         return True
     except subprocess.CalledProcessError as e:
@@ -3,6 +3,7 @@ Test suite for Lead Analyzer Service
 """
 
 import pytest
+import time
 import unittest.mock as mock
 from datetime import datetime, timedelta
 
@@ -12,21 +13,75 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from sqlalchemy import update
+
+from app.config import get_config
+from app.services.bitrix_service import BitrixService
+from app.services.gemini_service import GeminiService
 from app.services.lead_analyzer import LeadAnalyzerService
+from app.services.transcription_cache import TranscriptionCache
+from app.services.transcription_service import TranscriptionService
 from app.models.lead import Lead, LeadFilter
-from app.models.analysis_result import LeadAnalysisResult, AnalysisAction, AnalysisReason
+from app.models.analysis_result import (
+    LeadAnalysisResult, AnalysisAction, AnalysisReason, TranscriptionResult, AIAnalysisResult
+)
 from app.utils.exceptions import LeadAnalyzerError
+from database_models import DatabaseManager, Lead as LeadRecord
+from enhanced_analyzer_with_db import EnhancedLeadAnalyzerWithDB, _LEAD_CLAIM_TTL
+from enhanced.async_lead_analyzer import AsyncLeadAnalyzerService, create_lead_analyzer
+from enhanced.enhanced_lead_analyzer import EnhancedLeadAnalyzerService
+
+
+def call_statistics(audio_files):
+    """Call statistics, as BitrixService.get_lead_call_statistics returns them, for answered calls"""
+    return {
+        'total_calls': len(audio_files) or 1,
+        'unsuccessful_calls': 0,
+        'has_calls': True,
+        'audio_files': audio_files,
+        'call_data': []
+    }
+
+
+@pytest.fixture(scope="module")
+def mocked_analyzer():
+    """Lead analyzer service built once per module, with its service dependencies mocked"""
+    # Specced mocks reject calls to methods the real services do not have
+    mocks = {
+        'bitrix': mock.Mock(spec=BitrixService),
+        'transcription': mock.Mock(spec=TranscriptionService),
+        'gemini': mock.Mock(spec=GeminiService)
+    }
+
+    # The service only looks its dependencies up while it is constructed
+    with mock.patch.multiple('app.services.lead_analyzer',
+                             BitrixService=mock.Mock(return_value=mocks['bitrix']),
+                             TranscriptionService=mock.Mock(return_value=mocks['transcription']),
+                             GeminiService=mock.Mock(return_value=mocks['gemini'])):
+        service = LeadAnalyzerService()
+
+    return service, mocks
+
+
+@pytest.fixture
+def analyzer_service(mocked_analyzer):
+    """Lead analyzer service with mocked dependencies, reset for every test"""
+    service, mocks = mocked_analyzer
+    for service_mock in mocks.values():
+        service_mock.reset_mock(return_value=True, side_effect=True)
+    return service
 
 
 class TestLeadAnalyzerService:
     """Test cases for Lead Analyzer Service"""
 
-    def setup_method(self):
-        """Setup test fixtures"""
-        # Mock the service dependencies
-        self.mock_bitrix = mock.MagicMock()
-        self.mock_transcription = mock.MagicMock()
-        self.mock_gemini = mock.MagicMock()
+    @pytest.fixture(autouse=True)
+    def bind_mocks(self, mocked_analyzer, analyzer_service):
+        """Expose the shared service mocks to each test"""
+        _, mocks = mocked_analyzer
+        self.mock_bitrix = mocks['bitrix']
+        self.mock_transcription = mocks['transcription']
+        self.mock_gemini = mocks['gemini']
 
     @pytest.fixture
     def sample_lead(self):
@@ -39,22 +94,19 @@ class TestLeadAnalyzerService:
             date_create=datetime.now()
         )
 
-    @pytest.fixture
-    def analyzer_service(self):
-        """Lead analyzer service with mocked dependencies"""
-        with mock.patch('app.services.lead_analyzer.BitrixService') as mock_bitrix_cls, \
-                mock.patch('app.services.lead_analyzer.TranscriptionService') as mock_trans_cls, \
-                mock.patch('app.services.lead_analyzer.GeminiService') as mock_gemini_cls:
-            mock_bitrix_cls.return_value = self.mock_bitrix
-            mock_trans_cls.return_value = self.mock_transcription
-            mock_gemini_cls.return_value = self.mock_gemini
-
-            return LeadAnalyzerService()
-
     def test_analyze_new_leads_success(self, analyzer_service, sample_lead):
         """Test successful analysis of new leads"""
+        # Status 158 with fewer than five unsuccessful calls goes back to the active status
+        sample_lead.junk_status = 158
+
         # Setup mocks
-        self.mock_bitrix.get_lead_activities.return_value = activities
+        self.mock_bitrix.get_lead_call_statistics.return_value = {
+            'total_calls': 2,
+            'unsuccessful_calls': 2,
+            'has_calls': True,
+            'audio_files': [],
+            'call_data': []
+        }
         self.mock_bitrix.update_lead_complete.return_value = True
 
         # Run analysis
@@ -70,9 +122,8 @@ class TestLeadAnalyzerService:
     def test_analyze_lead_ai_not_suitable(self, analyzer_service, sample_lead):
         """Test AI analysis determining status is not suitable"""
         # Mock audio files and transcription
-        self.mock_bitrix.get_lead_audio_files.return_value = ['http://example.com/audio.wav']
+        self.mock_bitrix.get_lead_call_statistics.return_value = call_statistics(['http://example.com/audio.wav'])
 
-        from app.models.analysis_result import TranscriptionResult, AIAnalysisResult
         transcription_result = TranscriptionResult(
             audio_file='http://example.com/audio.wav',
             transcription="Customer submitted application yesterday"
@@ -93,81 +144,51 @@ class TestLeadAnalyzerService:
         assert result.new_status == "NEW"
         assert result.ai_analysis.is_suitable == False
 
-    def test_analyze_lead_no_audio_files(self, analyzer_service, sample_lead):
-        """Test analysis when no audio files are found"""
-        # Mock no audio files
-        self.mock_bitrix.get_lead_audio_files.return_value = []
-
-        # Run analysis
-        result = analyzer_service._analyze_single_lead(sample_lead, dry_run=True)
-
-        # Assertions
-        assert result.action == AnalysisAction.SKIP
-        assert result.reason == AnalysisReason.NO_AUDIO_FILES
-
-    def test_analyze_lead_transcription_failure(self, analyzer_service, sample_lead):
-        """Test analysis when transcription fails"""
-        # Mock audio files but failed transcription
-        self.mock_bitrix.get_lead_audio_files.return_value = ['http://example.com/audio.wav']
-
-        from app.models.analysis_result import TranscriptionResult
-        transcription_result = TranscriptionResult(
-            audio_file='http://example.com/audio.wav',
-            transcription='',
-            error='Transcription service unavailable'
-        )
-        self.mock_transcription.transcribe_url.return_value = transcription_result
+    @pytest.mark.parametrize("junk_status,audio_files,transcription_result,expected_reason", [
+        (229, [], None, AnalysisReason.NO_AUDIO_FILES),
+        (229, ['http://example.com/audio.wav'],
+         TranscriptionResult(audio_file='http://example.com/audio.wav', transcription='',
+                             error='Transcription service unavailable'),
+         AnalysisReason.NO_TRANSCRIPTION),
+        (999, [], None, AnalysisReason.NOT_TARGET_STATUS),
+    ], ids=["no_audio_files", "transcription_failure", "invalid_junk_status"])
+    def test_analyze_lead_skipped(self, analyzer_service, sample_lead, junk_status, audio_files,
+                                  transcription_result, expected_reason):
+        """Test analysis outcomes that skip the lead"""
+        sample_lead.junk_status = junk_status
+        self.mock_bitrix.get_lead_call_statistics.return_value = call_statistics(audio_files)
+        if transcription_result is not None:
+            self.mock_transcription.transcribe_url.return_value = transcription_result
 
         # Run analysis
         result = analyzer_service._analyze_single_lead(sample_lead, dry_run=True)
 
         # Assertions
         assert result.action == AnalysisAction.SKIP
-        assert result.reason == AnalysisReason.NO_TRANSCRIPTION
-
-    def test_analyze_lead_invalid_junk_status(self, analyzer_service, sample_lead):
-        """Test analysis with invalid junk status"""
-        # Set invalid junk status
-        sample_lead.junk_status = 999
-
-        # Run analysis
-        result = analyzer_service._analyze_single_lead(sample_lead, dry_run=True)
-
-        # Assertions
-        assert result.action == AnalysisAction.SKIP
-        assert result.reason == AnalysisReason.NOT_TARGET_STATUS
-
-    def test_health_check_all_healthy(self, analyzer_service):
-        """Test health check when all services are healthy"""
-        # Mock healthy services
-        self.mock_bitrix.test_connection.return_value = True
-        self.mock_transcription.test_connection.return_value = True
-        self.mock_gemini.test_connection.return_value = True
-
-        # Run health check
-        health_status = analyzer_service.check_health()
-
-        # Assertions
-        assert health_status['bitrix'] == True
-        assert health_status['transcription'] == True
-        assert health_status['gemini'] == True
-        assert all(health_status.values())
-
-    def test_health_check_service_failure(self, analyzer_service):
-        """Test health check when some services fail"""
-        # Mock mixed service health
-        self.mock_bitrix.test_connection.return_value = True
-        self.mock_transcription.test_connection.return_value = False
-        self.mock_gemini.test_connection.return_value = True
+        assert result.reason == expected_reason
+
+    @pytest.mark.parametrize("bitrix_ok,transcription_ok,gemini_ok", [
+        (True, True, True),
+        (True, False, True),
+        (False, True, False),
+        (False, False, False),
+    ], ids=["all_healthy", "transcription_down", "bitrix_and_gemini_down", "all_down"])
+    def test_health_check(self, analyzer_service, bitrix_ok, transcription_ok, gemini_ok):
+        """Test health check reports each service's connection test"""
+        # Mock service health
+        self.mock_bitrix.test_connection.return_value = bitrix_ok
+        self.mock_transcription.test_connection.return_value = transcription_ok
+        self.mock_gemini.test_connection.return_value = gemini_ok
 
         # Run health check
         health_status = analyzer_service.check_health()
 
         # Assertions
-        assert health_status['bitrix'] == True
-        assert health_status['transcription'] == False
-        assert health_status['gemini'] == True
-        assert not all(health_status.values())
+        assert health_status == {
+            'bitrix': bitrix_ok,
+            'transcription': transcription_ok,
+            'gemini': gemini_ok
+        }
 
     def test_analyze_lead_by_id_not_found(self, analyzer_service):
         """Test analyzing specific lead that doesn't exist"""
@@ -184,7 +205,7 @@ class TestLeadAnalyzerService:
         """Test successful analysis of specific lead"""
         # Mock lead found and successful analysis
         self.mock_bitrix.get_lead_by_id.return_value = sample_lead
-        self.mock_bitrix.get_lead_audio_files.return_value = []  # No audio files, will skip
+        self.mock_bitrix.get_lead_call_statistics.return_value = call_statistics([])  # No audio files, will skip
 
         # Run analysis
         result = analyzer_service.analyze_lead_by_id("123", dry_run=True)
@@ -215,10 +236,159 @@ class TestLeadAnalyzerService:
         assert stats['services_health']['bitrix'] == True
 
 
+class TestTranscriptionCache:
+    """On-disk transcription cache"""
+
+    @pytest.fixture
+    def clock(self):
+        """Controllable wall clock seen by the cache, in seconds"""
+        with mock.patch('app.services.transcription_cache.time') as mock_time:
+            mock_time.time.return_value = 1_000_000.0
+            yield mock_time.time
+
+    @pytest.fixture
+    def cache(self, tmp_path, clock):
+        """Cache holding at most two entries for an hour"""
+        cache = TranscriptionCache(str(tmp_path / 'cache.db'), ttl_hours=1, max_entries=2)
+        yield cache
+        cache.close()
+
+    @staticmethod
+    def transcription(audio_url, text="salom"):
+        """Successful transcription of a recording"""
+        return TranscriptionResult(audio_file=audio_url, transcription=text, confidence=0.9, language="uz")
+
+    def test_get_returns_stored_transcription(self, cache):
+        """A stored transcription is returned for its URL only"""
+        cache.put(self.transcription("a.wav"))
+
+        cached = cache.get("a.wav")
+        assert cached.transcription == "salom"
+        assert cached.confidence == 0.9
+        assert cache.get("b.wav") is None
+
+    def test_expired_entry_is_dropped(self, cache, clock):
+        """Entries older than the TTL are treated as missing"""
+        cache.put(self.transcription("a.wav"))
+
+        clock.return_value += 3600 + 1
+        assert cache.get("a.wav") is None
+
+        # Still gone once the clock is back inside the TTL: the expired row was deleted
+        clock.return_value -= 2
+        assert cache.get("a.wav") is None
+
+    def test_least_recently_used_entry_is_evicted(self, cache, clock):
+        """Going over max_entries evicts the entry read least recently"""
+        cache.put(self.transcription("a.wav"))
+        clock.return_value += 1
+        cache.put(self.transcription("b.wav"))
+        clock.return_value += 1
+        cache.get("a.wav")
+        clock.return_value += 1
+        cache.put(self.transcription("c.wav"))
+
+        assert cache.get("b.wav") is None
+        assert cache.get("a.wav") is not None
+        assert cache.get("c.wav") is not None
+
+    @pytest.mark.parametrize("result", [
+        TranscriptionResult(audio_file="a.wav", transcription=""),
+        TranscriptionResult(audio_file="a.wav", transcription="salom", error="timeout"),
+    ])
+    def test_failed_transcription_is_not_stored(self, cache, result):
+        """Empty or failed transcriptions are never cached"""
+        cache.put(result)
+        assert cache.get("a.wav") is None
+
+
+class TestLeadClaims:
+    """Lead claims that keep concurrent database-backed analyzer runs apart"""
+
+    @pytest.fixture(params=[True, False], ids=["update_returning", "select_for_update"])
+    def claim_db(self, request, tmp_path):
+        """Session on a throwaway SQLite database holding three unanalyzed leads.
+
+        Also run as a dialect without UPDATE ... RETURNING to cover the lock-then-update fallback.
+        """
+        manager = DatabaseManager(f"sqlite:///{tmp_path / 'claims.db'}")
+        with manager.session_scope() as db:
+            db.add_all(LeadRecord(id=str(i)) for i in range(3))
+        with mock.patch.object(manager.engine.dialect, 'update_returning', request.param):
+            with manager.session_scope() as db:
+                yield db
+        manager.engine.dispose()
+
+    def test_claimed_leads_are_not_claimed_again(self, claim_db):
+        """A second run gets nothing while the first run's claims are fresh"""
+        lead_ids = ['0', '1', '2']
+        analyzed_before = datetime.utcnow() - timedelta(days=1)
+
+        assert EnhancedLeadAnalyzerWithDB._claim_leads(claim_db, lead_ids, analyzed_before) == set(lead_ids)
+        assert EnhancedLeadAnalyzerWithDB._claim_leads(claim_db, lead_ids, analyzed_before) == set()
+
+    def test_expired_claim_is_taken_again(self, claim_db):
+        """A claim older than the TTL, left by a crashed run, is reclaimed"""
+        lead_ids = ['0', '1', '2']
+        analyzed_before = datetime.utcnow() - timedelta(days=1)
+        EnhancedLeadAnalyzerWithDB._claim_leads(claim_db, lead_ids, analyzed_before)
+
+        expired_at = datetime.utcnow() - _LEAD_CLAIM_TTL - timedelta(minutes=1)
+        claim_db.execute(update(LeadRecord).where(LeadRecord.id == '1').values(last_analyzed=expired_at))
+
+        assert EnhancedLeadAnalyzerWithDB._claim_leads(claim_db, lead_ids, analyzed_before) == {'1'}
+
+
+class TestAsyncLeadAnalyzer:
+    """Selection and new-lead runs of the asyncio lead analyzer"""
+
+    @pytest.fixture
+    def async_analyzer(self):
+        """Factory building analyzers with ASYNC_ANALYZER set as given and mocked service dependencies"""
+        # MagicMock also supports the async context managers the async analyzer opens
+        services = {
+            'BitrixService': mock.MagicMock(),
+            'EnhancedTranscriptionService': mock.MagicMock(),
+            'EnhancedGeminiService': mock.MagicMock()
+        }
+        analyzers = []
+
+        def build(enabled):
+            with mock.patch.multiple('enhanced.enhanced_lead_analyzer', **services), \
+                    mock.patch.object(get_config().scheduler, 'async_analyzer', enabled):
+                analyzers.append(create_lead_analyzer())
+            return analyzers[-1]
+
+        yield build, services['BitrixService'].return_value
+        for analyzer in analyzers:
+            analyzer.close()
+
+    @pytest.mark.parametrize("enabled, expected", [(True, AsyncLeadAnalyzerService),
+                                                   (False, EnhancedLeadAnalyzerService)])
+    def test_flag_selects_analyzer(self, async_analyzer, enabled, expected):
+        """ASYNC_ANALYZER picks the asyncio analyzer, otherwise the threaded one"""
+        build, _ = async_analyzer
+        assert type(build(enabled)) is expected
+
+    def test_new_leads_run_on_event_loop(self, async_analyzer):
+        """New leads are fetched and analyzed through the async path"""
+        build, bitrix = async_analyzer
+        bitrix.get_leads.return_value = [Lead(id="1", status_id="JUNK", junk_status=999)]
+
+        batch_result = build(True).analyze_new_leads(dry_run=True)
+
+        assert batch_result.total_leads == 1
+        assert batch_result.lead_results[0].action == AnalysisAction.SKIP
+        assert batch_result.lead_results[0].reason == AnalysisReason.NOT_TARGET_STATUS
+        bitrix.update_lead_status.assert_not_called()
+
+
 class TestLeadAnalyzerIntegration:
     """Integration tests for Lead Analyzer"""
 
-    @pytest.mark.integration
+    # Unit runs deselect the whole class with -m "not integration"; it uses none of the mocked fixtures
+    pytestmark = pytest.mark.integration
+
     def test_real_configuration_validation(self):
         """Test with real configuration (requires .env file)"""
         try:
@@ -230,11 +400,12 @@ class TestLeadAnalyzerIntegration:
         except Exception as e:
             pytest.skip(f"Configuration test skipped: {e}")
 
-    @pytest.mark.integration
-    def test_real_service_health(self):
+    def test_real_service_health(self, tmp_path):
         """Test with real services (requires actual service URLs)"""
         try:
-            analyzer = LeadAnalyzerService()
+            # Keep a configured transcription cache out of the working tree
+            with mock.patch.object(get_config().transcription, 'cache_path', str(tmp_path / 'transcriptions.db')):
+                analyzer = LeadAnalyzerService()
             health = analyzer.check_health()
             print(f"Service health: {health}")
             # Don't assert as this depends on actual service availability
@@ -243,88 +414,83 @@ class TestLeadAnalyzerIntegration:
 
 
 # Test fixtures and utilities
-@pytest.fixture
-def mock_config():
-    """Mock configuration for testing"""
-    config_data = {
-        'bitrix': {
-            'webhook_url': 'https://test.bitrix24.com/rest/1/abc123',
-            'timeout_seconds': 30,
-            'max_retries': 3
-        },
-        'transcription': {
-            'service_url': 'http://localhost:8101',
-            'timeout_seconds': 60,
-            'max_retries': 3
-        },
-        'gemini': {
-            'api_key': 'test_api_key',
-            'model_name': 'gemini-pro',
-            'timeout_seconds': 30,
-            'max_retries': 3
-        },
-        'scheduler': {
-            'check_interval_hours': 24,
-            'max_concurrent_leads': 10,
-            'delay_between_leads': 2.0
-        },
-        'lead_status': {
-            'junk_status_field': 'UF_CRM_1751812306933',
-            'main_status_field': 'STATUS_ID',
-            'junk_status_value': 'JUNK',
-            'active_status_value': 'NEW',
-            'junk_statuses': {
-                158: "5 marta javob bermadi",
-                227: "Notog'ri raqam",
-                229: "Ariza qoldirmagan",
-                783: "Notog'ri mijoz",
-                807: "Yoshi to'g'ri kelmadi"
-            }
+# Static configuration values behind the mock_config fixture
+_CONFIG_DATA = {
+    'bitrix': {
+        'webhook_url': 'https://test.bitrix24.com/rest/1/abc123',
+        'timeout_seconds': 30,
+        'max_retries': 3
+    },
+    'transcription': {
+        'service_url': 'http://localhost:8101',
+        'timeout_seconds': 60,
+        'max_retries': 3
+    },
+    'gemini': {
+        'api_key': 'test_api_key',
+        'model_name': 'gemini-pro',
+        'timeout_seconds': 30,
+        'max_retries': 3
+    },
+    'scheduler': {
+        'check_interval_hours': 24,
+        'max_concurrent_leads': 10,
+        'delay_between_leads': 2.0
+    },
+    'lead_status': {
+        'junk_status_field': 'UF_CRM_1751812306933',
+        'main_status_field': 'STATUS_ID',
+        'junk_status_value': 'JUNK',
+        'active_status_value': 'NEW',
+        'junk_statuses': {
+            158: "5 marta javob bermadi",
+            227: "Notog'ri raqam",
+            229: "Ariza qoldirmagan",
+            783: "Notog'ri mijoz",
+            807: "Yoshi to'g'ri kelmadi"
         }
     }
+}
 
+
+@pytest.fixture
+def mock_config():
+    """Mock configuration for testing"""
     with mock.patch('app.config.get_config') as mock_get_config:
         mock_config_obj = mock.MagicMock()
-        for key, value in config_data.items():
+        for key, value in _CONFIG_DATA.items():
             setattr(mock_config_obj, key, mock.MagicMock(**value))
         mock_get_config.return_value = mock_config_obj
         yield mock_config_obj
 
 
 # Performance tests
+@pytest.fixture(scope="module")
+def batch_leads():
+    """Junk leads for the batch performance test"""
+    return [Lead(id=str(i), status_id="JUNK", junk_status=229) for i in range(10)]
+
+
 class TestPerformance:
     """Performance tests for Lead Analyzer"""
 
     @pytest.mark.performance
-    def test_batch_analysis_performance(self):
+    def test_batch_analysis_performance(self, analyzer_service, batch_leads):
         """Test performance of batch analysis"""
-        import time
-
-        # Create mock leads
-        leads = []
-        for i in range(100):
-            lead = Lead(id=str(i), status_id="JUNK", junk_status=229)
-            leads.append(lead)
-
-        # Mock analyzer with fast responses
-        with mock.patch('app.services.lead_analyzer.BitrixService'), \
-                mock.patch('app.services.lead_analyzer.TranscriptionService'), \
-                mock.patch('app.services.lead_analyzer.GeminiService'):
-
-            analyzer = LeadAnalyzerService()
+        analyzer_service.bitrix_service.get_lead_call_statistics.return_value = call_statistics([])
 
-            start_time = time.time()
-            # Simulate batch processing (dry run)
-            for lead in leads[:10]:  # Test with smaller batch
-                result = analyzer._analyze_single_lead(lead, dry_run=True)
-            end_time = time.time()
+        # Only the analysis is timed; the mocked analyzer is built once per module
+        start_time = time.perf_counter()
+        # Simulate batch processing (dry run)
+        for lead in batch_leads:
+            analyzer_service._analyze_single_lead(lead, dry_run=True)
+        processing_time = time.perf_counter() - start_time
 
-            processing_time = end_time - start_time
-            leads_per_second = 10 / processing_time if processing_time > 0 else 0
+        leads_per_second = len(batch_leads) / processing_time if processing_time > 0 else 0
 
-            print(f"Processed 10 leads in {processing_time:.2f} seconds")
-            print(f"Rate: {leads_per_second:.2f} leads/second")
+        print(f"Processed {len(batch_leads)} leads in {processing_time:.4f} seconds")
+        print(f"Rate: {leads_per_second:.2f} leads/second")
 
-            # Performance assertion (adjust based on requirements)
-            assert leads_per_second > 1, "Processing rate should be > 1 lead/second"
+        # Performance assertion (adjust based on requirements)
+        assert leads_per_second > 1, "Processing rate should be > 1 lead/second"
 